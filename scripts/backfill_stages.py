@@ -0,0 +1,79 @@
+"""
+Upgrades a database created by an earlier version: adds the content columns
+introduced since (cluster synthesis, validation details, lifecycle stage,
+worker leases), moves embeddings to their side table, creates any missing
+content index, and fills in Content.stage from each item's pipeline fields.
+
+    python -m scripts.backfill_stages
+
+Safe to re-run; only missing columns and indexes are added, and only rows
+whose stored stage is NEW are re-derived.
+"""
+from sqlalchemy import inspect, text
+from src.core.database import SessionLocal, engine, ensure_statistics, init_db
+from src.core.lifecycle import ItemStage, infer_stage
+from src.core.models import Content
+from src.core.stats import ensure_stage_counts
+from scripts.split_content_columns import add_embedding_timestamps, move_embeddings
+
+# Columns added to content after the first release. New columns must be nullable or carry a default.
+ADDED_COLUMNS = {
+    "summary_parent_id": "INTEGER REFERENCES content(id)",
+    "validation_path": "VARCHAR",
+    "validation_score": "FLOAT",
+    "validation_flag": "VARCHAR",
+    "validation_reason": "TEXT",
+    "validation_hash": "VARCHAR",
+    "stage": "VARCHAR(16) NOT NULL DEFAULT 'NEW'",
+    "lease_owner": "VARCHAR",
+    "lease_stage": "VARCHAR",
+    "lease_expires_at": "TIMESTAMP",
+    "lease_attempts": "INTEGER NOT NULL DEFAULT 0",
+}
+
+def add_columns():
+    """Returns the names of the columns it added."""
+    existing = {c["name"] for c in inspect(engine).get_columns("content")}
+    added = [name for name in ADDED_COLUMNS if name not in existing]
+    with engine.begin() as conn:
+        for name in added:
+            conn.execute(text(f"ALTER TABLE content ADD COLUMN {name} {ADDED_COLUMNS[name]}"))
+    return added
+
+def create_indexes():
+    existing = {i["name"] for i in inspect(engine).get_indexes("content")}
+    for index in Content.__table__.indexes:
+        if index.name not in existing:
+            index.create(bind=engine)
+            print(f"Created {index.name}")
+
+def backfill_stages(batch_size: int = 1000):
+    counts = {}
+    with SessionLocal() as db:
+        last_id = 0
+        while True:
+            items = db.query(Content).filter(
+                Content.id > last_id, Content.stage == ItemStage.NEW
+            ).order_by(Content.id).limit(batch_size).all()
+            if not items:
+                break
+            for item in items:
+                item.stage = infer_stage(item)
+                counts[item.stage.name] = counts.get(item.stage.name, 0) + 1
+            last_id = items[-1].id
+            db.commit()
+    return counts
+
+if __name__ == "__main__":
+    init_db()
+    for name in add_columns():
+        print(f"Added content.{name}")
+    # Stage inference reads embeddings, which must be in content_embeddings first
+    print(f"Moved {move_embeddings()} embeddings to content_embeddings")
+    if add_embedding_timestamps():
+        print("Added content_embeddings.updated_at")
+    create_indexes()
+    for stage, count in sorted(backfill_stages().items()):
+        print(f"{stage}: {count}")
+    ensure_stage_counts(engine) # Counts the backfilled stages if init_db couldn't yet
+    ensure_statistics(engine, refresh=True) # Covers the new indexes and stages
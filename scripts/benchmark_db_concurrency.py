@@ -0,0 +1,148 @@
+"""
+Dashboard reads while the pipeline writes.
+
+A writer process commits agent-style updates in batches while reader threads
+request dashboard pages through the Flask test client. Reports read latency
+percentiles, write throughput and errors ("database is locked").
+
+    python -m scripts.benchmark_db_concurrency --compare
+    python -m scripts.benchmark_db_concurrency --profile plain --duration 20
+
+Uses its own SQLite file per profile in the temp directory unless DATABASE_URL is set.
+"""
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+parser = argparse.ArgumentParser(description="Benchmark dashboard reads during pipeline writes")
+parser.add_argument("--profile", choices=["tuned", "plain"], default="tuned")
+parser.add_argument("--compare", action="store_true", help="Run both profiles and print them side by side")
+parser.add_argument("--items", type=int, default=5000)
+parser.add_argument("--duration", type=float, default=10.0)
+parser.add_argument("--readers", type=int, default=4)
+parser.add_argument("--write-batch", type=int, default=50, help="Rows updated per write transaction")
+args = parser.parse_args()
+
+if args.compare:
+    for profile in ("plain", "tuned"):
+        argv = [a for a in sys.argv[1:] if a != "--compare"]
+        subprocess.run([sys.executable, "-m", "scripts.benchmark_db_concurrency", *argv, "--profile", profile], check=True)
+    sys.exit(0)
+
+# Must be set before src.core.config is imported
+DB_FILE = os.path.join(tempfile.gettempdir(), f"signal_digest_bench_db_{args.profile}.db")
+if "DATABASE_URL" not in os.environ:
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(DB_FILE + suffix):
+            os.remove(DB_FILE + suffix)
+    os.environ["DATABASE_URL"] = f"sqlite:///{DB_FILE}"
+os.environ.update(DB_PROFILE=args.profile, LOG_LEVEL="WARNING")
+
+from sqlalchemy import insert, text
+from src.core.database import SessionLocal, engine, init_db
+from src.core.lifecycle import ItemStage
+from src.core.models import Content
+
+SOURCE = "benchmark-db"
+
+def seed():
+    with SessionLocal() as db:
+        db.query(Content).filter(Content.source == SOURCE).delete(synchronize_session=False)
+        now = datetime.utcnow()
+        rows = [
+            {
+                "source": SOURCE, "type": "news", "title": f"Benchmark item {n}", "url": f"https://example.com/bench-db/{n}",
+                "published_at": now, "fetched_at": now, "abstract_or_body": "Benchmark body. " * 40,
+                "relevance_label": "AGENTIC_AI", "relevance_confidence": 0.9, "priority_score": 0.0,
+                "stage": ItemStage.ENRICHED.name, "authors": [], "topics": [], "summary_highlights": [],
+                "validation_status": "PENDING", "delivery_status": "PENDING",
+            }
+            for n in range(args.items)
+        ]
+        for start in range(0, len(rows), 1000):
+            db.execute(insert(Content), rows[start:start + 1000])
+        db.commit()
+
+def writer(deadline: float, results):
+    """Separate process, like the scheduler next to the web app."""
+    engine.dispose()
+    commits, latencies, errors = 0, [], 0
+    with SessionLocal() as db:
+        ids = [i for (i,) in db.query(Content.id).filter(Content.source == SOURCE).order_by(Content.id)]
+    position = 0
+    while time.time() < deadline:
+        batch = ids[position:position + args.write_batch] or ids[:args.write_batch]
+        position = (position + args.write_batch) % len(ids)
+        started = time.perf_counter()
+        try:
+            with SessionLocal() as db:
+                for item in db.query(Content).filter(Content.id.in_(batch)):
+                    item.priority_score = round(item.priority_score + 0.01, 2)
+                    item.summary_tldr = f"Rewritten at {time.time()}"
+                db.commit()
+            commits += 1
+            latencies.append(time.perf_counter() - started)
+        except Exception:
+            errors += 1
+    results.put((commits, latencies, errors))
+
+def reader(deadline: float, latencies: list, errors: list):
+    from src.ui.app import app
+    client = app.test_client()
+    pages = ["/", "/content/", "/relevant/"]
+    n = 0
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            response = client.get(pages[n % len(pages)])
+            if response.status_code != 200:
+                errors.append(response.status_code)
+            else:
+                latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(type(e).__name__)
+        n += 1
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def main():
+    init_db()
+    seed()
+    with engine.connect() as conn:
+        journal = conn.execute(text("PRAGMA journal_mode")).scalar() if engine.dialect.name == "sqlite" else "n/a"
+    from src.ui import app as _  # Import (and its init_db) outside the timed window
+
+    deadline = time.time() + args.duration
+    results = multiprocessing.Queue()
+    write_process = multiprocessing.Process(target=writer, args=(deadline, results))
+    write_process.start()
+
+    read_latencies, read_errors = [], []
+    threads = [threading.Thread(target=reader, args=(deadline, read_latencies, read_errors)) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    commits, write_latencies, write_errors = results.get()
+    write_process.join()
+
+    ms = lambda v: f"{v * 1000:.1f}ms"
+    print(f"\n== profile={args.profile} journal={journal} items={args.items} readers={args.readers} duration={args.duration:g}s")
+    print(f"Reads:  {len(read_latencies) / args.duration:.0f}/s, p50 {ms(percentile(read_latencies, 50))}, "
+          f"p95 {ms(percentile(read_latencies, 95))}, p99 {ms(percentile(read_latencies, 99))}, "
+          f"max {ms(max(read_latencies, default=0))}, errors {len(read_errors)}")
+    print(f"Writes: {commits / args.duration:.1f} commits/s ({commits * args.write_batch / args.duration:.0f} rows/s), "
+          f"p95 {ms(percentile(write_latencies, 95))}, max {ms(max(write_latencies, default=0))}, errors {write_errors}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Delivery load benchmark against the local Twilio stand-in.
+
+    python -m scripts.twilio_standin --mps 80 --latency-ms 120 &
+    python -m scripts.benchmark_delivery --users 10000 --mps 80 --concurrency 32
+
+Always uses its own SQLite file in the temp directory and ignores
+DATABASE_URL: seeding deletes every user, digest and delivery.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+parser = argparse.ArgumentParser(description="Benchmark DeliveryAgent fan-out")
+parser.add_argument("--users", type=int, default=10000)
+parser.add_argument("--items", type=int, default=5)
+parser.add_argument("--standin", default="http://127.0.0.1:5005")
+parser.add_argument("--mps", type=float, default=80)
+parser.add_argument("--concurrency", type=int, default=32)
+parser.add_argument("--keep", action="store_true", help="Keep existing benchmark rows instead of reseeding")
+args = parser.parse_args()
+
+# Must be set before src.core.config is imported
+DB_FILE = os.path.join(tempfile.gettempdir(), "signal_digest_bench_delivery.db")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{DB_FILE}",
+    TWILIO_ACCOUNT_SID="ACbenchmark",
+    TWILIO_AUTH_TOKEN="benchmark",
+    TWILIO_FROM_NUMBER="whatsapp:+14155238886",
+    TWILIO_API_BASE_URL=args.standin,
+    TWILIO_MPS=str(args.mps),
+    DELIVERY_CONCURRENCY=str(args.concurrency),
+    DRY_RUN="False",
+    LOG_LEVEL="WARNING",
+)
+
+from sqlalchemy import insert
+from src.core.database import SessionLocal, init_db
+from src.core.models import Content, User, Digest, Delivery
+from src.core.lifecycle import ItemStage
+from src.agents.delivery import DeliveryAgent
+
+def seed(db):
+    db.query(Delivery).delete()
+    db.query(Digest).delete()
+    db.query(Content).filter(Content.source == "benchmark").delete()
+    db.query(User).delete()
+    db.commit()
+
+    for start in range(0, args.users, 10000):
+        db.execute(insert(User), [
+            {"phone_number": f"+1555{n:07d}", "opt_in_status": True, "topic_preferences": [], "created_at": datetime.utcnow()}
+            for n in range(start, min(start + 10000, args.users))
+        ])
+    for n in range(args.items):
+        db.add(Content(
+            source="benchmark", type="news", title=f"Benchmark item {n}", url=f"https://example.com/bench/{n}",
+            published_at=datetime.utcnow(), abstract_or_body="Benchmark body.",
+            summary_headline=f"Benchmark headline {n}", summary_tldr="Benchmark summary.",
+            validation_status="PASS", delivery_status="PENDING", stage=ItemStage.PASSED
+        ))
+    db.commit()
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def main():
+    init_db()
+    agent = DeliveryAgent("benchmark_delivery")
+
+    with SessionLocal() as db:
+        if not args.keep:
+            t0 = time.perf_counter()
+            seed(db)
+            print(f"Seeded {args.users} users in {time.perf_counter() - t0:.1f}s")
+
+        items = db.query(Content).filter(Content.validation_status == "PASS", Content.delivery_status == "PENDING").all()
+        users = db.query(User).filter(User.opt_in_status == True).all()
+
+        t0 = time.perf_counter()
+        if items:
+            agent.plan_digests(db, items, users)
+        plan_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        report = agent.send_pending(db)
+        send_time = time.perf_counter() - t0
+
+    print(f"Plan:      {plan_time:.2f}s for {len(users)} users")
+    print(f"Send:      {send_time:.2f}s, {report.sent} messages, {report.sent / send_time if send_time else 0:.1f} sends/sec (limit {args.mps})")
+    print(f"Latency:   p50 {percentile(report.latencies, 50) * 1000:.0f}ms, p99 {percentile(report.latencies, 99) * 1000:.0f}ms")
+    print(f"Retries:   {report.retries}")
+    print(f"Failed:    {len(report.failed)} recipients")
+
+if __name__ == "__main__":
+    main()
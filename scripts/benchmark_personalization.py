@@ -0,0 +1,48 @@
+"""
+Digest personalization at subscriber scale.
+
+Builds a DigestIndex over a day's items and groups synthetic users with
+random topic preferences, in memory (no database). Reports the time to
+group them and how many distinct digests result.
+
+    python -m scripts.benchmark_personalization --users 100000 --items 5
+"""
+import argparse
+import random
+import statistics
+import time
+
+parser = argparse.ArgumentParser(description="Benchmark DigestIndex.group_users")
+parser.add_argument("--users", type=int, default=100000)
+parser.add_argument("--items", type=int, default=5)
+parser.add_argument("--topics", type=int, default=20, help="Distinct topics across items and preferences")
+parser.add_argument("--repeat", type=int, default=5)
+parser.add_argument("--seed", type=int, default=1)
+args = parser.parse_args()
+
+from src.agents.personalization import DigestIndex
+from src.core.models import Content, User
+
+rng = random.Random(args.seed)
+topics = [f"topic-{n}" for n in range(args.topics)]
+items = [
+    Content(id=n, relevance_label=rng.choice(["AGENTIC_AI", "RESEARCH", "INDUSTRY"]), topics=rng.sample(topics, 3))
+    for n in range(args.items)
+]
+# A tenth of users set no preferences; the rest pick 1-4 topics in any order and case
+users = [
+    User(id=n, topic_preferences=[] if n % 10 == 0 else [t.upper() if rng.random() < 0.2 else t
+                                                          for t in rng.sample(topics, rng.randint(1, 4))])
+    for n in range(args.users)
+]
+
+timings = []
+for _ in range(args.repeat):
+    start = time.perf_counter()
+    index = DigestIndex(items)
+    groups = index.group_users(users)
+    timings.append(time.perf_counter() - start)
+
+print(f"{args.users} users, {args.items} items, {args.topics} topics: "
+      f"median {statistics.median(timings) * 1000:.1f} ms, best {min(timings) * 1000:.1f} ms")
+print(f"{len(groups)} distinct digests; {index.unmatched_users} users matched no item and get the full digest")
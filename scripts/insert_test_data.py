@@ -1,5 +1,6 @@
 from src.core.database import SessionLocal
 from src.core.models import Content
+from src.core.lifecycle import ItemStage
 from datetime import datetime
 
 def insert_test_data():
@@ -27,6 +28,7 @@ def insert_test_data():
         abstract_or_body="This item is about cooking, not AI.",
         relevance_label="IRRELEVANT",
         relevance_reason="Not related to AI.",
+        stage=ItemStage.IRRELEVANT,
         delivery_status="PENDING",
         validation_status="PENDING"
     )
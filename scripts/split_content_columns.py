@@ -0,0 +1,51 @@
+"""
+Moves embeddings out of content.embedding_vector (databases created before
+content_embeddings existed) and drops the old column, then adds
+content_embeddings.updated_at where it is missing.
+
+    python -m scripts.split_content_columns
+
+Run VACUUM afterwards to give the freed pages back to the filesystem. Safe to re-run.
+"""
+from sqlalchemy import inspect, text
+from src.core.database import engine, init_db
+from src.core.models import ContentEmbedding # Registers the table for init_db
+
+def move_embeddings() -> int:
+    """Returns the number of embeddings copied; 0 if there was no old column."""
+    init_db()
+    columns = {c["name"] for c in inspect(engine).get_columns("content")}
+    if "embedding_vector" not in columns:
+        return 0
+    with engine.begin() as conn:
+        moved = conn.execute(text(
+            "INSERT INTO content_embeddings (content_id, vector) "
+            "SELECT id, embedding_vector FROM content "
+            # The JSON type stores None as the string 'null' unless told otherwise
+            "WHERE embedding_vector IS NOT NULL AND CAST(embedding_vector AS TEXT) != 'null' "
+            "AND id NOT IN (SELECT content_id FROM content_embeddings)"
+        )).rowcount
+    with engine.begin() as conn:
+        try:
+            conn.execute(text("ALTER TABLE content DROP COLUMN embedding_vector"))
+        except Exception:
+            # SQLite before 3.35 can't drop columns; clearing it frees the space just the same
+            conn.execute(text("UPDATE content SET embedding_vector = NULL"))
+    return moved
+
+def add_embedding_timestamps() -> bool:
+    """Existing rows keep a NULL updated_at; the related-items index loads them on its full load."""
+    init_db()
+    columns = {c["name"] for c in inspect(engine).get_columns("content_embeddings")}
+    if "updated_at" in columns:
+        return False
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE content_embeddings ADD COLUMN updated_at TIMESTAMP"))
+    for index in ContentEmbedding.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    return True
+
+if __name__ == "__main__":
+    print(f"Moved {move_embeddings()} embeddings to content_embeddings")
+    if add_embedding_timestamps():
+        print("Added content_embeddings.updated_at")
@@ -0,0 +1,101 @@
+"""
+Local stand-in for the subset of the Twilio Messages API that DeliveryAgent uses.
+
+    python -m scripts.twilio_standin --port 5005 --latency-ms 120 --mps 80 --failure-rate 0.01
+
+Point the app at it with TWILIO_API_BASE_URL=http://127.0.0.1:5005 (any SID/token work).
+"""
+import argparse
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from flask import Flask, request, jsonify
+
+app = Flask(__name__)
+
+settings = {
+    "latency_ms": 100.0,
+    "jitter_ms": 50.0,
+    "mps": 0.0,            # Account throughput; requests above it get 429. 0 = unlimited
+    "throttle_rate": 0.0,  # Extra random 429s
+    "failure_rate": 0.0,   # Random 500s
+}
+
+stats = {"accepted": 0, "throttled": 0, "failed": 0}
+lock = threading.Lock()
+bucket = {"tokens": 0.0, "updated_at": time.monotonic()}
+
+def take_token() -> bool:
+    if settings["mps"] <= 0:
+        return True
+    with lock:
+        now = time.monotonic()
+        bucket["tokens"] = min(settings["mps"], bucket["tokens"] + (now - bucket["updated_at"]) * settings["mps"])
+        bucket["updated_at"] = now
+        if bucket["tokens"] >= 1:
+            bucket["tokens"] -= 1
+            return True
+        return False
+
+def error(status, code, message):
+    return jsonify({"code": code, "message": message, "more_info": f"https://www.twilio.com/docs/errors/{code}", "status": status}), status
+
+@app.route('/2010-04-01/Accounts/<account_sid>/Messages.json', methods=['POST'])
+def create_message(account_sid):
+    time.sleep(max(0.0, settings["latency_ms"] + random.uniform(-1, 1) * settings["jitter_ms"]) / 1000)
+
+    if not take_token() or random.random() < settings["throttle_rate"]:
+        with lock:
+            stats["throttled"] += 1
+        return error(429, 20429, "Too Many Requests")
+    if random.random() < settings["failure_rate"]:
+        with lock:
+            stats["failed"] += 1
+        return error(500, 20500, "Internal Server Error")
+
+    to = request.form.get("To", "")
+    if not to.startswith("whatsapp:+"):
+        return error(400, 21211, f"The 'To' number {to} is not a valid phone number.")
+
+    with lock:
+        stats["accepted"] += 1
+    now = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")
+    return jsonify({
+        "sid": "SM" + uuid.uuid4().hex,
+        "account_sid": account_sid,
+        "to": to,
+        "from": request.form.get("From"),
+        "body": request.form.get("Body"),
+        "status": "queued",
+        "num_segments": "1",
+        "direction": "outbound-api",
+        "api_version": "2010-04-01",
+        "date_created": now,
+        "date_updated": now,
+        "date_sent": None,
+        "error_code": None,
+        "error_message": None,
+        "uri": f"/2010-04-01/Accounts/{account_sid}/Messages.json",
+    }), 201
+
+@app.route('/stats')
+def get_stats():
+    with lock:
+        return jsonify(dict(stats, **settings))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Twilio Messages API stand-in")
+    parser.add_argument("--port", type=int, default=5005)
+    parser.add_argument("--latency-ms", type=float, default=settings["latency_ms"])
+    parser.add_argument("--jitter-ms", type=float, default=settings["jitter_ms"])
+    parser.add_argument("--mps", type=float, default=settings["mps"])
+    parser.add_argument("--throttle-rate", type=float, default=settings["throttle_rate"])
+    parser.add_argument("--failure-rate", type=float, default=settings["failure_rate"])
+    args = parser.parse_args()
+
+    settings.update(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, mps=args.mps,
+                    throttle_rate=args.throttle_rate, failure_rate=args.failure_rate)
+    bucket["tokens"] = args.mps
+    app.run(port=args.port, threaded=True)
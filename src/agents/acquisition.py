@@ -1,18 +1,16 @@
 import time
-import arxiv
-import requests
-import feedparser
 from datetime import datetime, timedelta
 from typing import List
 from sqlalchemy.orm import Session
 from src.core.database import get_db, SessionLocal
 from src.core.models import Content
+from src.core.retention import is_archived
 from src.agents.base import BaseAgent
 
 class ContentAcquisitionAgent(BaseAgent):
     """
     Fetches content from configured sources (arXiv, RSS Feeds) and stores 'RawContent' in DB.
-    Deduplicates based on URL.
+    Deduplicates based on URL, including items retention has archived.
     """
     
     ARXIV_CATEGORIES = ["cs.AI", "cs.CL", "cs.LG", "stat.ML"]
@@ -39,10 +37,12 @@ class ContentAcquisitionAgent(BaseAgent):
         # Using a fresh session for this execution
         with SessionLocal() as db:
             new_count = 0
+            self.items_in = 0 # Entries fetched, before deduplication
             
             # --- 1. Fetch arXiv ---
             try:
                 arxiv_papers = self.fetch_arxiv()
+                self.items_in += len(arxiv_papers)
                 for paper in arxiv_papers:
                     if self.save_content(db, paper):
                         new_count += 1
@@ -52,6 +52,7 @@ class ContentAcquisitionAgent(BaseAgent):
             # --- 2. Fetch RSS Feeds ---
             try:
                 rss_items = self.fetch_rss_feeds()
+                self.items_in += len(rss_items)
                 for item in rss_items:
                     if self.save_content(db, item):
                         new_count += 1
@@ -66,6 +67,8 @@ class ContentAcquisitionAgent(BaseAgent):
         """
         Fetch latest papers from arXiv.
         """
+        import arxiv # Imported on first fetch; slow to load
+
         query = " OR ".join([f"cat:{cat}" for cat in self.ARXIV_CATEGORIES])
         
         # Sort by SubmittedDate (newest first)
@@ -97,53 +100,63 @@ class ContentAcquisitionAgent(BaseAgent):
         """
         results = []
         for feed_config in self.RSS_FEEDS:
-            try:
-                self.logger.info(f"Fetching RSS: {feed_config['name']}")
-                feed = feedparser.parse(feed_config['url'])
-                
-                # Check for bozo error (malformed feed)
-                if feed.bozo:
-                    self.logger.warning(f"Malformated feed {feed_config['name']}: {feed.bozo_exception}")
-                    # Continue anyway as feedparser often parses partially valid feeds
+            results.extend(self.fetch_rss_feed(feed_config))
+        return results
 
-                # Process entries (limit to 5 per feed to avoid spamming)
-                for entry in feed.entries[:5]: 
-                    
-                    # Parse Date
-                    published_at = datetime.utcnow()
-                    if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                         published_at = datetime.fromtimestamp(time.mktime(entry.published_parsed))
-                    elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                         published_at = datetime.fromtimestamp(time.mktime(entry.updated_parsed))
-                    
-                    # Extract Summary
-                    summary = ""
-                    if hasattr(entry, 'summary'):
-                        summary = entry.summary
-                    elif hasattr(entry, 'description'):
-                        summary = entry.description
-                    elif hasattr(entry, 'content'):
-                        # Atom feeds often have content list
-                        summary = entry.content[0].value
-                    
-                    # Extract Author
-                    author = "Unknown"
-                    if hasattr(entry, 'author'):
-                        author = entry.author
-                    
-                    results.append({
-                        "source": feed_config['name'],
-                        "type": feed_config['type'],
-                        "title": entry.title,
-                        "url": entry.link,
-                        "published_at": published_at,
-                        "abstract_or_body": summary,
-                        "authors": [author] # Adapter for schema
-                    })
-                    
-            except Exception as e:
-                self.logger.error(f"Error fetching {feed_config['name']}: {e}")
+    def fetch_rss_feed(self, feed_config: dict) -> List[dict]:
+        """
+        Fetch items from a single RSS feed.
+        """
+        import feedparser # Imported on first fetch; slow to load
+
+        results = []
+        try:
+            self.logger.info(f"Fetching RSS: {feed_config['name']}")
+            feed = feedparser.parse(feed_config['url'])
+            
+            # Check for bozo error (malformed feed)
+            if feed.bozo:
+                self.logger.warning(f"Malformated feed {feed_config['name']}: {feed.bozo_exception}")
+                # Continue anyway as feedparser often parses partially valid feeds
+
+            # Process entries (limit to 5 per feed to avoid spamming)
+            for entry in feed.entries[:5]: 
+                
+                # Parse Date
+                published_at = datetime.utcnow()
+                if hasattr(entry, 'published_parsed') and entry.published_parsed:
+                     published_at = datetime.fromtimestamp(time.mktime(entry.published_parsed))
+                elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
+                     published_at = datetime.fromtimestamp(time.mktime(entry.updated_parsed))
                 
+                # Extract Summary
+                summary = ""
+                if hasattr(entry, 'summary'):
+                    summary = entry.summary
+                elif hasattr(entry, 'description'):
+                    summary = entry.description
+                elif hasattr(entry, 'content'):
+                    # Atom feeds often have content list
+                    summary = entry.content[0].value
+                
+                # Extract Author
+                author = "Unknown"
+                if hasattr(entry, 'author'):
+                    author = entry.author
+                
+                results.append({
+                    "source": feed_config['name'],
+                    "type": feed_config['type'],
+                    "title": entry.title,
+                    "url": entry.link,
+                    "published_at": published_at,
+                    "abstract_or_body": summary,
+                    "authors": [author] # Adapter for schema
+                })
+                
+        except Exception as e:
+            self.logger.error(f"Error fetching {feed_config['name']}: {e}")
+            
         return results
 
     def save_content(self, db: Session, item: dict) -> bool:
@@ -151,8 +164,8 @@ class ContentAcquisitionAgent(BaseAgent):
         Save content to DB if URL doesn't exist.
         Returns True if saved, False if duplicate.
         """
-        exists = db.query(Content).filter(Content.url == item["url"]).first()
-        if exists:
+        exists = db.query(Content.id).filter(Content.url == item["url"]).first()
+        if exists or is_archived(db, item["url"]):
             # self.logger.debug(f"Duplicate content skipped: {item['url']}")
             return False
         
@@ -1,20 +1,38 @@
 import logging
+import os
+import socket
 import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import select
 from src.core.config import Config
+from src.core.database import SessionLocal
 from src.core.logger import setup_logger
+from src.core import leases, metrics
+from src.core.models import Content
+from src.core.run_history import StageRecorder
+from src.core import profiling
 
 class BaseAgent(ABC):
     """
     Abstract base class for all agents in the pipeline.
     Enforces a standard execution interface and logging.
+
+    Agents for a pipeline stage (`STAGE`) lease the items they work on, the
+    same leases `src.worker` and the streaming executor take, so a batch
+    pass never works on an item another process is processing.
     """
 
+    STAGE: Optional[str] = None # Lease stage, as named in src.streaming.build_stages
+
     def __init__(self, agent_name: str):
         self.agent_name = agent_name
         self.logger = setup_logger(agent_name)
         self.config = Config
+        self.items_in = None # Set by _execute to the number of items it picked up, for run history
+        self.owner = f"{socket.gethostname()}:{os.getpid()}/{agent_name}"
+        self.lease_token = None
+        self.claimed = set() # Leased this run and not released yet
 
     def run(self, *args, **kwargs) -> Any:
         """
@@ -23,18 +41,71 @@ class BaseAgent(ABC):
         """
         self.logger.info(f"Starting execution of {self.agent_name}...")
         start_time = time.time()
+        self.items_in = None
+        recorder = StageRecorder(self.agent_name, self.logger)
+        self.claimed = set()
         
         try:
-            result = self._execute(*args, **kwargs)
+            with recorder, profiling.profile(self.agent_name):
+                try:
+                    result = self._execute(*args, **kwargs)
+                finally:
+                    self.report_parked()
             duration = time.time() - start_time
             self.logger.info(f"Finished {self.agent_name} in {duration:.2f}s.")
+            metrics.AGENT_RUNS.inc(self.agent_name, "ok")
+            metrics.AGENT_DURATION.observe(duration, self.agent_name)
+            if isinstance(result, int):
+                metrics.ITEMS_PROCESSED.inc(self.agent_name, amount=result)
+            recorder.save(self.items_in, result if isinstance(result, int) else None)
             return result
         except Exception as e:
+            metrics.AGENT_RUNS.inc(self.agent_name, "error")
+            metrics.AGENT_DURATION.observe(time.time() - start_time, self.agent_name)
+            recorder.save(self.items_in)
             self.logger.error(f"Error in {self.agent_name}: {str(e)}", exc_info=True)
             # In a real system, we might decide to re-raise or return a Failure object
             # For now, re-raising to bubble up to the scheduler/orchestrator
             raise e
 
+    def claim_items(self, db, criteria: tuple, limit: Optional[int] = None, order_by: tuple = (Content.id,)) -> List[int]:
+        """
+        Leases up to `limit` items matching `criteria` for this agent's stage
+        and commits. Items leased elsewhere are skipped.
+        """
+        self.lease_token, item_ids = leases.claim(
+            db, self.STAGE, criteria, self.owner, limit, Config.WORKER_LEASE_SECONDS, order_by
+        )
+        self.claimed.update(item_ids)
+        return item_ids
+
+    def release_items(self, db, item_ids: Iterable[int]) -> bool:
+        """
+        Releases the leases of finished items and commits their results. Items
+        that failed keep their lease and are retried once it expires. If any
+        lease ran out and was re-claimed meanwhile, nothing is committed.
+        """
+        item_ids = list(item_ids)
+        lost = [item_id for item_id in item_ids if not leases.release(db, item_id, self.lease_token)]
+        if lost:
+            db.rollback()
+            self.logger.warning(f"Leases on {lost} expired before the batch finished; discarded its results.")
+            return False
+        db.commit()
+        self.claimed.difference_update(item_ids)
+        return True
+
+    def report_parked(self):
+        """Logs the items this run failed for the last time."""
+        if not self.claimed:
+            return
+        with SessionLocal() as db:
+            parked = list(db.scalars(select(Content.id).where(
+                Content.id.in_(self.claimed), Content.lease_attempts >= Config.WORKER_MAX_ATTEMPTS
+            )))
+        if parked:
+            self.logger.warning(f"Parking {parked} after {Config.WORKER_MAX_ATTEMPTS} failed attempts.")
+
     @abstractmethod
     def _execute(self, *args, **kwargs) -> Any:
         """
@@ -1,19 +1,27 @@
+import hashlib
+import json
+from datetime import datetime
+from sqlalchemy import exists, insert
+from sqlalchemy.orm import aliased, undefer_group
 from tenacity import retry, stop_after_attempt, wait_exponential
 from src.core.database import SessionLocal
-from src.core.models import Content, User
+from src.core.models import Content, User, Digest, Delivery
+from src.core.lifecycle import ItemStage, advance
 from src.agents.base import BaseAgent
+from src.agents.personalization import DigestIndex
+from src.agents.delivery_engine import DeliveryEngine, DeliveryReport, is_retryable
 from src.core.config import Config
-
-# --- Twilio Client ---
-try:
-    from twilio.rest import Client
-    twilio_client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN) if Config.TWILIO_ACCOUNT_SID else None
-except ImportError:
-    twilio_client = None
+from src.core import metrics
+from src.core.clients import twilio_client
 
 class DeliveryAgent(BaseAgent):
     """
     Delivers validated insights via WhatsApp.
+    Each user gets the items matching their topic preferences (all items if none set).
+
+    Work is planned into the `deliveries` ledger first (one row per user and
+    message part) and then sent from it, so a crashed broadcast resumes with
+    only the unsent pairs and nothing is sent twice.
     """
 
     def _execute(self, target_phone=None):
@@ -21,93 +29,276 @@ class DeliveryAgent(BaseAgent):
         processed_count = 0
         
         with SessionLocal() as db:
+            self.recover_interrupted(db)
+
             # Select PASS validation items that haven't been delivered
-            items = db.query(Content).filter(
-                Content.validation_status == "PASS",
-                Content.delivery_status == "PENDING"
-            ).all()
+            items = db.query(Content).options(undefer_group("summary")).filter(
+                Content.stage == ItemStage.PASSED
+            ).order_by(Content.id).all()
+            self.items_in = len(items)
 
             if not items:
-                self.logger.info("No items to deliver.")
-                return 0
-
-            # Get all subscribed users
-            users = db.query(User).filter(User.opt_in_status == True).all()
-            if not users:
-                self.logger.info("No subscribed users found.")
-                # We still mark items as delivered? No, maybe keep them pending until we hava users?
-                # Or just mark them as sent to "ghosts" so they don't pile up?
-                # Let's log and return.
-                return 0
-
-            # Prepare Digest Body
-            digest_body = "*AI Signal Digest*\n\n"
-            sent_ids = []
-            
-            # Construct the single digest from all items
-            # Note: This constructs ONE digest for ALL users. 
-            # Personalization would require per-user construction.
-            
-            temp_body = digest_body
-            for item in items:
-                entry = f"*{item.summary_headline}*\n{item.summary_tldr}\n_{item.url}_\n\n"
-                if len(temp_body) + len(entry) > 1000:
-                    # If we exceed limit, we would need to split. 
-                    # For MVP, let's just truncate or stop adding items to this batch?
-                    # Or send multiple messages?
-                    # Let's send multiple messages if needed.
-                    pass 
-                temp_body += entry
-                sent_ids.append(item.id)
-            
-            # For MVP, let's just blast the full body (split by Twilio if needed, or we split)
-            # Simple splitter:
-            messages_to_send = []
-            current_msg = "*AI Signal Digest*\n\n"
-            
-            for item in items:
-                entry = f"*{item.summary_headline}*\n{item.summary_tldr}\n_{item.url}_\n\n"
-                if len(current_msg) + len(entry) > 1500: # Safety margin for Twilio
-                     messages_to_send.append(current_msg)
-                     current_msg = "*AI Signal Digest (Cont.)*\n\n" + entry
+                self.logger.info("No new items to deliver.")
+            else:
+                # Get all subscribed users
+                users = db.query(User).filter(User.opt_in_status == True).all()
+                if not users:
+                    # Keep items pending until we have users.
+                    self.logger.info("No subscribed users found.")
                 else:
-                    current_msg += entry
-            
-            if current_msg:
-                messages_to_send.append(current_msg)
-
-            # Broadcast to all users
-            for user in users:
-                self.logger.info(f"Sending digest to {user.phone_number}...")
-                for msg in messages_to_send:
-                    self.send_whatsapp(msg, user.phone_number)
-            
-            # Mark items as SENT
-            for item in items:
-                item.delivery_status = "SENT"
-            
-            processed_count = len(items)
+                    self.plan_digests(db, items, users)
+                    processed_count = len(items)
+
+            report = self.send_pending(db)
+            self.finalize_items(db)
             db.commit()
             
-        self.logger.info(f"Delivery complete. Sent {processed_count} items to {len(users)} users.")
+        self.logger.info(f"Delivery complete. Queued {processed_count} items; sent {report.sent} messages, {len(report.failed)} recipients failed.")
         return processed_count
 
+    def recover_interrupted(self, db):
+        """
+        Rows left SENDING by a crashed run may or may not have reached Twilio.
+        They are parked as UNKNOWN (not resent) so a restart never double-sends.
+        """
+        count = db.query(Delivery).filter(Delivery.status == "SENDING").update(
+            {"status": "UNKNOWN", "last_error": "Interrupted mid-send"}, synchronize_session=False
+        )
+        if count:
+            self.logger.warning(f"Marked {count} interrupted deliveries as UNKNOWN.")
+        db.commit()
+
+    def plan_digests(self, db, items, users):
+        """
+        Renders each distinct digest once and writes PENDING ledger rows for
+        its users, marking the items QUEUED in the same transaction.
+        """
+        # Personalize: one digest per distinct item set, shared by every user who maps to it
+        index = DigestIndex(items)
+        groups = index.group_users(users)
+        self.logger.info(f"Built {len(groups)} distinct digests for {len(users)} users.")
+        if index.unmatched_users:
+            self.logger.info(f"{index.unmatched_users} users match none of the items; sending them the full digest.")
+
+        for selected, group_users in groups.items():
+            digest_items = index.items_for(selected)
+            item_ids = sorted(item.id for item in digest_items)
+            digest_id = hashlib.sha1(json.dumps(item_ids).encode("utf-8")).hexdigest()
+
+            digest = db.get(Digest, digest_id)
+            if not digest:
+                digest = Digest(id=digest_id, item_ids=item_ids, parts=self.build_messages(digest_items))
+                db.add(digest)
+                db.flush()
+
+            existing = {
+                (user_id, part) for user_id, part in
+                db.query(Delivery.user_id, Delivery.part).filter(Delivery.digest_id == digest_id)
+            }
+            rows = [
+                {"user_id": user.id, "digest_id": digest_id, "part": part, "status": "PENDING", "attempts": 0}
+                for user in group_users
+                for part in range(len(digest.parts))
+                if (user.id, part) not in existing
+            ]
+            if rows:
+                db.execute(insert(Delivery), rows)
+
+        for item in items:
+            item.delivery_status = "QUEUED"
+            advance(item, ItemStage.QUEUED)
+        db.commit()
+
+    def settle_failed(self, db):
+        """
+        PENDING rows out of attempts become FAILED, and the later parts of a
+        failed (user, digest) are CANCELLED: a digest never arrives with a
+        hole in it.
+        """
+        exhausted = db.query(Delivery).filter(
+            Delivery.status == "PENDING",
+            Delivery.attempts >= Config.DELIVERY_MAX_ATTEMPTS
+        ).update(
+            {"status": "FAILED", "last_error": f"Gave up after {Config.DELIVERY_MAX_ATTEMPTS} attempts"},
+            synchronize_session=False
+        )
+        failed = aliased(Delivery)
+        cancelled = db.query(Delivery).filter(
+            Delivery.status == "PENDING",
+            exists().where(
+                failed.user_id == Delivery.user_id,
+                failed.digest_id == Delivery.digest_id,
+                failed.part < Delivery.part,
+                failed.status == "FAILED"
+            )
+        ).update({"status": "CANCELLED", "last_error": "An earlier part failed"}, synchronize_session=False)
+        if exhausted or cancelled:
+            self.logger.warning(f"Gave up on {exhausted} deliveries; cancelled {cancelled} later parts.")
+        db.commit()
+
+    def send_pending(self, db) -> DeliveryReport:
+        """
+        Sends PENDING ledger rows in id-ordered chunks. Each chunk is claimed
+        (SENDING) and committed before any message goes out, then settled
+        with the per-message results. A part waits while an earlier part of
+        the same digest is still pending outside the chunk.
+        """
+        engine = DeliveryEngine(
+            self.send_whatsapp,
+            rate=Config.TWILIO_MPS,
+            concurrency=Config.DELIVERY_CONCURRENCY,
+            max_attempts=Config.MAX_RETRIES,
+            logger=self.logger
+        )
+        total = DeliveryReport()
+        last_id = 0
+        self.settle_failed(db)
+
+        while True:
+            rows = db.query(Delivery).filter(
+                Delivery.status == "PENDING",
+                Delivery.attempts < Config.DELIVERY_MAX_ATTEMPTS,
+                Delivery.id > last_id
+            ).order_by(Delivery.id).limit(Config.DELIVERY_CHUNK_SIZE).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            users = {u.id: u for u in db.query(User).filter(User.id.in_({r.user_id for r in rows}))}
+            digests = {d.id: d for d in db.query(Digest).filter(Digest.id.in_({r.digest_id for r in rows}))}
+            chunk_ids = {r.id for r in rows}
+            # Earliest part of each (user, digest) still pending in another chunk
+            waiting_on = {}
+            for user_id, digest_id, part in db.query(Delivery.user_id, Delivery.digest_id, Delivery.part).filter(
+                Delivery.status == "PENDING",
+                Delivery.user_id.in_(list(users)),
+                Delivery.digest_id.in_(list(digests)),
+                Delivery.id.notin_(chunk_ids)
+            ):
+                key = (user_id, digest_id)
+                waiting_on[key] = min(part, waiting_on.get(key, part))
+
+            # One job per (user, digest) so parts go out in order
+            jobs, job_rows = [], []
+            by_recipient = {}
+            for row in sorted(rows, key=lambda r: (r.user_id, r.digest_id, r.part)):
+                user = users.get(row.user_id)
+                if not user or not user.opt_in_status:
+                    row.status = "CANCELLED"
+                    continue
+                key = (row.user_id, row.digest_id)
+                if waiting_on.get(key, row.part) < row.part:
+                    continue
+                if key not in by_recipient:
+                    by_recipient[key] = len(jobs)
+                    jobs.append((user.phone_number, []))
+                    job_rows.append([])
+                jobs[by_recipient[key]][1].append(digests[row.digest_id].parts[row.part])
+                job_rows[by_recipient[key]].append(row)
+                row.status = "SENDING"
+            db.commit()
+
+            report = engine.broadcast(jobs)
+
+            now = datetime.utcnow()
+            attempted = set()
+            rejected_jobs = set()
+            for job_index, message_index, sid, attempts, error in report.results:
+                row = job_rows[job_index][message_index]
+                attempted.add(row.id)
+                row.attempts += attempts
+                if error is None:
+                    row.status = "SENT"
+                    row.message_sid = sid
+                    row.sent_at = now
+                elif is_retryable(error):
+                    row.status = "PENDING"
+                    row.last_error = str(error)
+                else:
+                    row.status = "FAILED"
+                    row.last_error = str(error)
+                    rejected_jobs.add(job_index)
+            for job_index, row_list in enumerate(job_rows):
+                for row in row_list:
+                    if row.id not in attempted:
+                        # Never attempted because an earlier part failed
+                        row.status = "CANCELLED" if job_index in rejected_jobs else "PENDING"
+            db.commit()
+            self.settle_failed(db)
+
+            total.sent += report.sent
+            total.retries += report.retries
+            total.failed.update(report.failed)
+            total.latencies.extend(report.latencies)
+            self.logger.info(f"Chunk sent {report.sent} messages ({report.retries} retries), {len(report.failed)} recipients failed.")
+
+        return total
+
+    def finalize_items(self, db):
+        """
+        QUEUED items become SENT once no digest containing them has outstanding rows.
+        """
+        queued = db.query(Content).filter(Content.stage == ItemStage.QUEUED).all()
+        if not queued:
+            return
+
+        outstanding_digests = [
+            digest_id for (digest_id,) in db.query(Delivery.digest_id).filter(
+                Delivery.status.in_(["PENDING", "SENDING"]),
+                Delivery.attempts < Config.DELIVERY_MAX_ATTEMPTS
+            ).distinct()
+        ]
+        outstanding_items = set()
+        for digest in db.query(Digest).filter(Digest.id.in_(outstanding_digests)):
+            outstanding_items.update(digest.item_ids)
+
+        for item in queued:
+            if item.id not in outstanding_items:
+                item.delivery_status = "SENT"
+                advance(item, ItemStage.DELIVERED)
+
+    def build_messages(self, items):
+        """
+        Renders items into WhatsApp-sized digest messages.
+        """
+        messages_to_send = []
+        current_msg = "*AI Signal Digest*\n\n"
+        
+        for item in items:
+            entry = f"*{item.summary_headline}*\n{item.summary_tldr}\n_{item.url}_\n\n"
+            if len(current_msg) + len(entry) > 1500: # Safety margin for Twilio
+                 messages_to_send.append(current_msg)
+                 current_msg = "*AI Signal Digest (Cont.)*\n\n" + entry
+            else:
+                current_msg += entry
+        
+        if current_msg:
+            messages_to_send.append(current_msg)
+        return messages_to_send
+
     def send_whatsapp(self, body, to):
+        """
+        Sends one message. Returns the message SID (None in dry-run/mock mode).
+        """
         if Config.DRY_RUN:
             self.logger.info(f"[DRY RUN] Would send to {to}:\n{body}")
-            return
+            return None
             
-        if not twilio_client:
+        if not twilio_client():
             self.logger.warning(f"[MOCK] No Twilio Client. Sending to {to}:\n{body}")
-            return
+            return None
 
         try:
-            message = twilio_client.messages.create(
-                from_=Config.TWILIO_FROM_NUMBER,
-                body=body,
-                to=f"whatsapp:{to}"
-            )
-            self.logger.info(f"Sent message SID: {message.sid}")
+            params = {"status_callback": Config.TWILIO_STATUS_CALLBACK_URL} if Config.TWILIO_STATUS_CALLBACK_URL else {}
+            with metrics.track_call("twilio", "send"):
+                message = twilio_client().messages.create(
+                    from_=Config.TWILIO_FROM_NUMBER,
+                    body=body,
+                    to=f"whatsapp:{to}",
+                    **params
+                )
+            self.logger.debug(f"Sent message SID: {message.sid} to {to}")
+            return message.sid
         except Exception as e:
             self.logger.error(f"Twilio Send Failed: {e}")
             raise e
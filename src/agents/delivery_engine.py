@@ -0,0 +1,133 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+from src.core import metrics
+
+try:
+    from twilio.base.exceptions import TwilioRestException
+except ImportError:
+    TwilioRestException = None
+
+try:
+    from requests import ConnectionError as RequestsConnectionError, Timeout as RequestsTimeout
+    TRANSPORT_ERRORS = (ConnectionError, TimeoutError, RequestsConnectionError, RequestsTimeout)
+except ImportError:
+    TRANSPORT_ERRORS = (ConnectionError, TimeoutError)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `rate` tokens per second, bursts up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Twilio throttling (429) and server errors (5xx), and transport failures
+    (connection errors, timeouts), are worth retrying. Anything else fails
+    the same way again: other 4xx (e.g. an invalid number), or a bug in `send`.
+    """
+    if isinstance(error, TRANSPORT_ERRORS):
+        return True
+    if TwilioRestException is None or not isinstance(error, TwilioRestException):
+        return False
+    return error.status == 429 or error.status >= 500
+
+class DeliveryReport:
+    def __init__(self):
+        self.sent = 0
+        self.retries = 0
+        self.failed = {} # phone -> error message
+        self.latencies: List[float] = [] # seconds per successful send, retries included
+        self.results = [] # (job_index, message_index, sid, attempts, error) per attempted message
+        self.lock = threading.Lock()
+
+class DeliveryEngine:
+    """
+    Concurrent WhatsApp fan-out.
+
+    Every send attempt (retries included) takes a token from a shared bucket
+    sized to the account's throughput. Each recipient's messages are sent in
+    order by one worker; a failure stops that recipient only and is recorded
+    in the report instead of aborting the broadcast.
+    """
+
+    def __init__(self, send: Callable[[str, str], Optional[str]], rate: float, concurrency: int,
+                 max_attempts: int, logger=None):
+        self.send = send
+        self.bucket = TokenBucket(rate)
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.logger = logger
+
+    def broadcast(self, jobs: List[Tuple[str, List[str]]]) -> DeliveryReport:
+        """
+        `jobs` is a list of (phone_number, messages).
+        """
+        report = DeliveryReport()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for job_index, (phone, messages) in enumerate(jobs):
+                pool.submit(self.deliver, job_index, phone, messages, report)
+        return report
+
+    def deliver(self, job_index: int, phone: str, messages: List[str], report: DeliveryReport):
+        # Later parts are left unattempted (no result) once one part fails.
+        for message_index, body in enumerate(messages):
+            attempts = [0]
+            try:
+                sid = self.send_with_retry(body, phone, report, attempts)
+                with report.lock:
+                    report.results.append((job_index, message_index, sid, attempts[0], None))
+            except Exception as e:
+                with report.lock:
+                    report.failed[phone] = str(e)
+                    report.results.append((job_index, message_index, None, attempts[0], e))
+                if self.logger:
+                    self.logger.error(f"Delivery to {phone} failed: {e}")
+                return
+
+    def send_with_retry(self, body: str, to: str, report: DeliveryReport, attempts: List[int] = None) -> Optional[str]:
+        """
+        `attempts`, if given, is a one-element counter updated with the number of tries made.
+        """
+        retrying = Retrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_random_exponential(multiplier=0.5, max=10), # Full jitter
+            retry=retry_if_exception(is_retryable),
+            reraise=True
+        )
+        start = time.monotonic()
+        for attempt in retrying:
+            with attempt:
+                if attempts is not None:
+                    attempts[0] = attempt.retry_state.attempt_number
+                if attempt.retry_state.attempt_number > 1:
+                    with report.lock:
+                        report.retries += 1
+                    metrics.RETRIES.inc("twilio")
+                self.bucket.acquire()
+                sid = self.send(body, to)
+
+        with report.lock:
+            report.sent += 1
+            report.latencies.append(time.monotonic() - start)
+        return sid
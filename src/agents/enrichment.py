@@ -4,17 +4,18 @@ from typing import List
 from tenacity import retry, stop_after_attempt, wait_exponential
 from sqlalchemy import desc
 
+from sqlalchemy.orm import undefer_group
 from src.core.database import SessionLocal
 from src.core.models import Content
+from src.core.lifecycle import ItemStage, advance
 from src.agents.base import BaseAgent
 from src.core.config import Config
+from src.core import metrics
+from src.core.clients import openai_client
+from src.core.run_lock import RunLockHeld, run_lock
 
-# --- Embeddings Client Setup ---
-try:
-    from openai import OpenAI
-    openai_client = OpenAI(api_key=Config.OPENAI_API_KEY) if Config.OPENAI_API_KEY else None
-except ImportError:
-    openai_client = None
+# Held while items are clustered and committed: assign_cluster compares against the items clustered before it
+CLUSTERING_LOCK = "clustering"
 
 class ContextEnrichmentAgent(BaseAgent):
     """
@@ -24,20 +25,30 @@ class ContextEnrichmentAgent(BaseAgent):
     3. Semantic Clustering (deduplication)
     """
 
+    STAGE = "enrichment"
+
     def _execute(self):
         self.logger.info("Starting Context Enrichment...")
+        try:
+            with run_lock(CLUSTERING_LOCK, wait=Config.WORKER_LEASE_SECONDS / 2):
+                processed_count = self.enrich_pending()
+        except RunLockHeld as e:
+            self.logger.warning(f"Skipping enrichment: {e}")
+            return 0
+
+        self.logger.info(f"Enrichment processing complete. Processed {processed_count} items.")
+        return processed_count
+
+    def enrich_pending(self) -> int:
         processed_count = 0
-        
         with SessionLocal() as db:
-            # Select items (Relevant) that are not enriched OR not clustered
-            # For MVP simplicity, we process items where embedding is None (new items).
-            # We assume if embedding is None, clustering is also needed.
-            
-            pending_items = db.query(Content).filter(
-                Content.relevance_label.isnot(None), 
-                Content.relevance_label != 'IRRELEVANT',
-                Content.embedding_vector == None
-            ).limit(20).all()
+            # Relevant items get an embedding, topics and a cluster in one step
+            item_ids = self.claim_items(db, (Content.stage == ItemStage.RELEVANT,), limit=20)
+            pending_items = db.query(Content).options(undefer_group("body")).filter(
+                Content.id.in_(item_ids)
+            ).order_by(Content.id).all()
+            self.items_in = len(pending_items)
+            done = []
 
             for item in pending_items:
                 try:
@@ -49,32 +60,34 @@ class ContextEnrichmentAgent(BaseAgent):
 
                     # 3. Assign Cluster
                     self.assign_cluster(db, item)
+                    advance(item, ItemStage.ENRICHED)
                     
                     self.logger.info(f"Enriched {item.id} (Cluster: {item.cluster_id})")
-                    processed_count += 1
+                    done.append(item.id)
                 except Exception as e:
                     self.logger.error(f"Failed to enrich {item.id}: {e}")
             
-            db.commit()
-            
-        self.logger.info(f"Enrichment processing complete. Processed {processed_count} items.")
+            if self.release_items(db, done):
+                processed_count = len(done)
         return processed_count
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), before_sleep=metrics.count_retry("embedding"))
     def generate_embedding(self, text: str) -> List[float]:
         """
         Generate embedding vector.
         """
         # Mock if no key
-        if not openai_client:
+        if not openai_client():
             # return deterministic mock vector of dim 1536 (OpenAI standard)
             return [0.1] * 10 
             
         text = text[:8000] # Truncate to avoid token limits
-        response = openai_client.embeddings.create(
-            input=text,
-            model="text-embedding-3-small"
-        )
+        with metrics.track_call("embedding", "enrichment"):
+            response = openai_client().embeddings.create(
+                input=text,
+                model="text-embedding-3-small"
+            )
+        metrics.count_tokens("embedding", response.usage)
         return response.data[0].embedding
 
     def extract_topics(self, text: str) -> List[str]:
@@ -1,122 +1,208 @@
 import json
+import hashlib
+from typing import Dict, List
 from tenacity import retry, stop_after_attempt, wait_exponential
+from sqlalchemy.orm import undefer_group
 from src.core.database import SessionLocal
 from src.core.models import Content
+from src.core.lifecycle import ItemStage, advance
 from src.agents.base import BaseAgent
+from src.agents.guardrail_rules import GuardrailRules, RuleVerdict, PASS, UNCERTAIN
 from src.core.config import Config
-
-# --- LLM Client ---
-try:
-    from openai import OpenAI
-    openai_client = OpenAI(api_key=Config.OPENAI_API_KEY) if Config.OPENAI_API_KEY else None
-except ImportError:
-    openai_client = None
+from src.core import metrics
+from src.core.clients import openai_client
 
 CRITIC_SYSTEM_PROMPT = """
 You are a strict, cynical AI Editor and Fact-Checker. 
-Your job is to validate a synthesized summary against the original content (or common knowledge if original is truncated).
+Your job is to validate synthesized summaries against their original content (or common knowledge if original is truncated).
 
 Criteria:
 1. Hallucination: Does the summary claim things not in the text?
 2. Hype: Does the summary use excessive "game-changing", "revolutionary" language not supported by facts?
 3. Safety: Is the content spam, scam, or irrelevant?
 
-Input: Original Text (snippet), Summary Headline, Summary TLDR.
-Output: JSON with:
+Input: A list of items, each with an `id`, Original Text (snippet), Summary Headline, Summary TLDR.
+Output: JSON with `results`: an array with exactly one object per input item, each with:
+- `id`: The item id from the input.
 - `score` (0-10): 10 is perfect, <7 is reject.
 - `reason`: Short explanation.
 - `flag`: One of ["OK", "HALLUCINATION", "HYPE", "SPAM"].
 """
 
+CRITIC_PASS_SCORE = 7
+
+# Rules and critic read the source body, the summary and the cached critic verdict
+LOAD_FOR_VALIDATION = (undefer_group("body"), undefer_group("summary"), undefer_group("reasons"))
+
+def summary_hash(item: Content) -> str:
+    """Fingerprint of the summary fields the critic judged."""
+    payload = json.dumps([item.summary_headline, item.summary_tldr, item.summary_highlights, item.summary_why_matters])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 class QualityGuardrailAgent(BaseAgent):
     """
     Validates synthesized insights before delivery.
-    Now includes an LLM-based 'Critic' step.
+    Local rules decide clear cases; only uncertain items reach the LLM 'Critic',
+    which judges them in batches. Critic results are persisted and reused
+    until the summary changes.
     """
 
+    STAGE = "guardrail"
+
+    def __init__(self, agent_name: str):
+        super().__init__(agent_name)
+        self.rules = GuardrailRules()
+
     def _execute(self):
         self.logger.info("Starting Quality Guardrail (Critic)...")
         processed_count = 0
         
         with SessionLocal() as db:
-            # Select items that are Synthesized but Pending Validation
-            items = db.query(Content).filter(
-                Content.summary_headline.isnot(None),
-                Content.validation_status == "PENDING"
-            ).all()
-
-            for item in items:
-                try:
-                    is_valid, reason = self.validate_content(item)
-                    
-                    if is_valid:
-                        item.validation_status = "PASS"
-                    else:
-                        item.validation_status = "FAIL"
-                        # Append critic reason to internal notes/logs if we had a field
-                        # For now, just log and store in reason (if we had a validation_reason field)
-                        self.logger.warning(f"Critic REJECTED {item.id}: {reason}")
-                    
-                    self.logger.info(f"Validated {item.id}: {item.validation_status}")
-                    processed_count += 1
-                except Exception as e:
-                    self.logger.error(f"Failed to validate {item.id}: {e}")
-            
-            db.commit()
+            # Lease items that are Synthesized but Pending Validation
+            item_ids = self.claim_items(db, (Content.stage == ItemStage.SYNTHESIZED,))
+            items = db.query(Content).options(*LOAD_FOR_VALIDATION).filter(
+                Content.id.in_(item_ids)
+            ).order_by(Content.id).all()
+            self.items_in = len(items)
+
+            processed_count = self.validate(db, items)
+            if not self.release_items(db, [item.id for item in items if item.stage != ItemStage.SYNTHESIZED]):
+                processed_count = 0
             
         self.logger.info(f"Guardrail complete. Processed {processed_count} items.")
         return processed_count
 
-    def validate_content(self, item: Content) -> (bool, str):
+    def validate(self, db, items: List[Content]) -> int:
         """
-        Validation rules:
-        1. Base checks (length, source)
-        2. LLM Critic Check
+        Rules first, then one batched critic pass over whatever they left UNCERTAIN.
+        Does not commit.
         """
-        # 1. Base Checks
-        if len(item.summary_headline or "") > 120:
-            return False, "Headline too long"
-            
-        if not item.url:
-            return False, "Missing source URL"
-            
-        # 2. LLM Critic
-        if openai_client:
+        processed_count = 0
+
+        # Cluster leads are grounded against every member they summarize
+        members = {}
+        if items:
+            for member in db.query(Content).options(undefer_group("body")).filter(Content.summary_parent_id.in_([i.id for i in items])):
+                members.setdefault(member.summary_parent_id, []).append(member)
+
+        uncertain = []
+        for item in items:
             try:
-                score, reason = self.call_critic(item)
-                if score < 7:
-                    return False, f"Critic Score {score}/10: {reason}"
+                verdict = self.check_rules(item, members.get(item.id, []))
+                if verdict.decision != UNCERTAIN:
+                    self.record(item, verdict.decision == PASS, verdict.flag, None, verdict.reason, "RULES")
+                elif item.validation_path == "CRITIC" and item.validation_hash == summary_hash(item):
+                    # Summary unchanged since the critic last judged it
+                    metrics.CACHE_LOOKUPS.inc("critic", "hit")
+                    self.record(item, item.validation_score >= CRITIC_PASS_SCORE, item.validation_flag,
+                                item.validation_score, item.validation_reason, "CRITIC")
+                else:
+                    metrics.CACHE_LOOKUPS.inc("critic", "miss")
+                    uncertain.append((item, verdict))
+                    continue
+                processed_count += 1
             except Exception as e:
-                self.logger.error(f"Critic LLM failed: {e}")
-                # Fallback: Pass if LLM fails? Or Fail? 
-                # For safety, let's Fail if we heavily rely on it, or Pass if we treat it as optional.
-                # Let's Pass but warn for MVP stability.
-                self.logger.warning("Skipping Critic due to error.")
-                
-        return True, "OK"
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-    def call_critic(self, item: Content):
+                self.logger.error(f"Failed to validate {item.id}: {e}")
+
+        return processed_count + self.run_critic(uncertain)
+
+    def check_rules(self, item: Content, members: list = ()) -> RuleVerdict:
+        """
+        Local rule engine (structure, hype, unsupported claims, banned sources).
         """
-        Calls LLM to critique the content.
+        source_text = "\n".join(
+            f"{c.source or ''}\n{c.title or ''}\n{c.abstract_or_body or ''}" for c in [item, *members]
+        )
+        return self.rules.evaluate(item, source_text)
+
+    def run_critic(self, uncertain: list) -> int:
+        """
+        Sends items the rules couldn't decide to the critic, CRITIC_BATCH_SIZE per request.
+        Ids missing from a response are asked about once more on their own; items still
+        without a verdict stay SYNTHESIZED, keeping their lease, and are retried once it
+        expires. Without a critic configured at all, uncertain items pass as CRITIC_SKIPPED.
+        """
+        if not openai_client():
+            for item, verdict in uncertain:
+                self.record(item, True, verdict.flag, None, verdict.reason, "CRITIC_SKIPPED")
+            return len(uncertain)
+
+        processed_count = 0
+        for start in range(0, len(uncertain), Config.CRITIC_BATCH_SIZE):
+            batch = [item for item, _ in uncertain[start:start + Config.CRITIC_BATCH_SIZE]]
+            results = self.ask_critic(batch)
+            missing = [item for item in batch if item.id not in results]
+            if results and missing:
+                results.update(self.ask_critic(missing))
+
+            for item in batch:
+                if item.id not in results:
+                    self.logger.warning(f"No critic verdict for {item.id}; left for retry.")
+                    continue
+                score, flag, reason = results[item.id]
+                self.record(item, score >= CRITIC_PASS_SCORE, flag, score, reason, "CRITIC")
+                processed_count += 1
+
+        return processed_count
+
+    def ask_critic(self, items: List[Content]) -> Dict[int, tuple]:
+        try:
+            return self.call_critic(items)
+        except Exception as e:
+            self.logger.error(f"Critic LLM failed: {e}")
+            return {}
+
+    def record(self, item: Content, is_valid: bool, flag: str, score, reason: str, path: str):
+        item.validation_status = "PASS" if is_valid else "FAIL"
+        item.validation_path = path
+        item.validation_flag = flag
+        item.validation_score = score
+        item.validation_reason = reason
+        item.validation_hash = summary_hash(item)
+        advance(item, ItemStage.PASSED if is_valid else ItemStage.REJECTED)
+
+        if not is_valid:
+            self.logger.warning(f"{item.validation_path} REJECTED {item.id}: {reason}")
+        self.logger.info(f"Validated {item.id}: {item.validation_status} via {path}")
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), before_sleep=metrics.count_retry("critic"))
+    def call_critic(self, items: List[Content]) -> Dict[int, tuple]:
+        """
+        Calls LLM to critique several summaries in one request.
+        Returns {item_id: (score, flag, reason)}; ids missing from the response are left out.
         """
-        original_text = (item.abstract_or_body or "")[:3000]
-        summary_text = f"Headline: {item.summary_headline}\nTLDR: {item.summary_tldr}\nHighlights: {item.summary_highlights}"
+        entries = []
+        for item in items:
+            original_text = (item.abstract_or_body or "")[:3000]
+            summary_text = f"Headline: {item.summary_headline}\nTLDR: {item.summary_tldr}\nHighlights: {item.summary_highlights}"
+            entries.append(f"### Item id={item.id}\nOriginal Text:\n{original_text}\n\nproposed Summary:\n{summary_text}")
         
-        prompt = f"Original Text:\n{original_text}\n\nproposed Summary:\n{summary_text}"
+        prompt = "\n\n".join(entries)
         
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": CRITIC_SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.0
-        )
+        with metrics.track_call("llm", "critic"):
+            response = openai_client().chat.completions.create(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": CRITIC_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.0
+            )
+        metrics.count_tokens("critic", response.usage)
         
         data = json.loads(response.choices[0].message.content)
-        return data.get("score", 5), data.get("reason", "No reason provided")
+        results = {}
+        for result in data.get("results", []):
+            try:
+                results[int(result["id"])] = (
+                    float(result.get("score", 5)),
+                    result.get("flag", "OK"),
+                    result.get("reason", "No reason provided")
+                )
+            except (KeyError, TypeError, ValueError):
+                self.logger.warning(f"Ignoring malformed critic result: {result}")
+        return results
 
 if __name__ == "__main__":
     agent = QualityGuardrailAgent("test_guardrail")
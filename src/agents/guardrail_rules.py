@@ -0,0 +1,165 @@
+import re
+from typing import List, Tuple
+from urllib.parse import urlparse
+from src.core.config import Config
+from src.core.models import Content
+
+# Decisions
+PASS = "PASS"
+FAIL = "FAIL"
+UNCERTAIN = "UNCERTAIN"
+
+HYPE_LEXICON = [
+    "game-changing", "game changer", "revolutionary", "revolutionize", "groundbreaking",
+    "unprecedented", "mind-blowing", "jaw-dropping", "paradigm shift", "disruptive",
+    "insane", "incredible", "unbelievable", "world-changing", "earth-shattering",
+    "the future of", "changes everything", "blows away", "crushes", "magic",
+]
+
+# Capitalised words that are ordinary vocabulary rather than names: roles, fields and
+# architecture terms summaries capitalise for emphasis. Compared lowercased, plurals included.
+COMMON_TERMS = frozenset({
+    "agent", "agentic", "application", "architecture", "assistant", "attention", "benchmark",
+    "chatbot", "cloud", "compute", "data", "dataset", "decoder", "deep", "developer", "diffusion",
+    "embedding", "encoder", "engineer", "engineering", "enterprise", "evaluation", "fine-tuning",
+    "foundation", "framework", "generative", "inference", "intelligence", "language", "learning",
+    "machine", "model", "multimodal", "network", "neural", "open-source", "pipeline", "platform",
+    "product", "reasoning", "reinforcement", "research", "researcher", "retrieval", "robotics",
+    "safety", "scientist", "search", "security", "startup", "team", "training", "transformer",
+    "user", "vision",
+})
+
+# Compiled once at import; evaluated per item without any network call.
+HYPE_RE = re.compile(r"\b(" + "|".join(re.escape(w) for w in HYPE_LEXICON) + r")\b", re.IGNORECASE)
+NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*%?")
+NAME_RE = re.compile(r"\b[A-Z][\w-]*(?:\s+[A-Z][\w-]*)*")
+# Mixed-case or alphanumeric tokens (OpenAI, GPT-4o, LLaMA) are names even in title-case headlines.
+PRODUCT_RE = re.compile(r"\b(?:[A-Za-z]+[A-Z][\w-]*|[A-Za-z]+-?\d[\w-]*(?:\.\d+)*)")
+# All-caps abbreviations (AI, GPU, RAG, LLMs) are vocabulary, not claims
+ACRONYM_RE = re.compile(r"[A-Z]{2,6}s?")
+
+MAX_HEADLINE_CHARS = 120
+MIN_HIGHLIGHTS = 3
+MAX_HIGHLIGHTS = 5
+MAX_HIGHLIGHT_CHARS = 200
+
+class RuleVerdict:
+    def __init__(self, decision: str, findings: List[str], flag: str = "OK"):
+        self.decision = decision
+        self.findings = findings
+        self.flag = flag # Same vocabulary as the critic: OK, HALLUCINATION, HYPE, SPAM (+ FORMAT)
+
+    @property
+    def reason(self) -> str:
+        return "; ".join(self.findings) or "OK"
+
+class GuardrailRules:
+    """
+    Local fast-path checks run before the LLM critic.
+    Hard findings fail the item outright; soft findings make it UNCERTAIN
+    (critic decides); no findings at all is a clear PASS.
+    """
+
+    def __init__(self, banned_sources: List[str] = None):
+        banned = Config.GUARDRAIL_BANNED_SOURCES if banned_sources is None else banned_sources
+        self.banned_sources = {s.strip().lower() for s in banned if s.strip()}
+
+    def evaluate(self, item: Content, source_text: str = None) -> RuleVerdict:
+        """
+        `source_text` defaults to the item's own title and body; cluster leads
+        pass the text of every linked member so multi-source claims are grounded.
+        """
+        hard, soft, flags = [], [], []
+
+        # 1. Structure
+        headline = item.summary_headline or ""
+        highlights = item.summary_highlights or []
+        if len(headline) > MAX_HEADLINE_CHARS:
+            hard.append("Headline too long")
+            flags.append("FORMAT")
+        if not item.url:
+            hard.append("Missing source URL")
+            flags.append("FORMAT")
+        if not highlights:
+            hard.append("No highlights")
+            flags.append("FORMAT")
+        elif not MIN_HIGHLIGHTS <= len(highlights) <= MAX_HIGHLIGHTS:
+            soft.append(f"{len(highlights)} highlights (expected {MIN_HIGHLIGHTS}-{MAX_HIGHLIGHTS})")
+        long_highlights = [h for h in highlights if len(h) > MAX_HIGHLIGHT_CHARS]
+        if long_highlights:
+            soft.append(f"{len(long_highlights)} highlight(s) over {MAX_HIGHLIGHT_CHARS} chars")
+
+        # 2. Banned sources
+        host = urlparse(item.url or "").netloc.lower()
+        if (item.source or "").lower() in self.banned_sources or any(
+            host == b or host.endswith("." + b) for b in self.banned_sources
+        ):
+            hard.append(f"Banned source: {item.source or host}")
+            flags.append("SPAM")
+
+        # 3. Hype
+        fields = [headline, item.summary_tldr or "", *highlights, item.summary_why_matters or ""]
+        hype = {m.group(0).lower() for f in fields for m in HYPE_RE.finditer(f)}
+        if len(hype) >= 2:
+            hard.append(f"Hype language: {', '.join(sorted(hype))}")
+            flags.append("HYPE")
+        elif hype:
+            soft.append(f"Hype language: {', '.join(hype)}")
+
+        # 4. Claims not grounded in the source text. Why-it-matters is commentary by design, so
+        # only the headline, TL;DR and highlights are checked; unknown names alone go to the critic.
+        if source_text is None:
+            source_text = f"{item.source or ''}\n{item.title or ''}\n{item.abstract_or_body or ''}"
+        numbers, names = self.unsupported_claims(headline, [item.summary_tldr or "", *highlights], source_text)
+        unsupported = numbers + names
+        if numbers and len(unsupported) >= 3:
+            hard.append(f"Unsupported claims: {', '.join(unsupported)}")
+            flags.append("HALLUCINATION")
+        elif unsupported:
+            soft.append(f"Unsupported claims: {', '.join(unsupported)}")
+
+        if hard:
+            return RuleVerdict(FAIL, hard + soft, flags[0])
+        if soft:
+            return RuleVerdict(UNCERTAIN, soft)
+        return RuleVerdict(PASS, [])
+
+    def unsupported_claims(self, headline: str, prose: List[str], source_text: str) -> Tuple[List[str], List[str]]:
+        """
+        Numbers and names in the summary that never appear in the source, as
+        (numbers, names). Single-digit integers are ignored (counts like "3 key
+        findings"), as are acronyms and COMMON_TERMS, and the title-case
+        headline is only checked for product-style names.
+        """
+        source_lower = source_text.lower()
+        source_numbers = {n.replace(",", "").rstrip("%") for n in NUMBER_RE.findall(source_text)}
+
+        numbers, claims = [], []
+        for i, field in enumerate([headline, *prose]):
+            for number in NUMBER_RE.findall(field):
+                value = number.replace(",", "").rstrip("%")
+                if len(value) == 1 and not number.endswith("%"):
+                    continue
+                if value not in source_numbers:
+                    numbers.append(number)
+
+            names = PRODUCT_RE.findall(field)
+            for match in NAME_RE.finditer(field) if i > 0 else []:
+                # Skip sentence-initial capitals, they are not names.
+                prefix = field[:match.start()].rstrip()
+                words = match.group(0).split()
+                if not prefix or prefix[-1] in ".!?:;":
+                    words = words[1:]
+                names.extend(words)
+
+            for name in names:
+                if ACRONYM_RE.fullmatch(name) or self.is_common(name) or name.lower() in source_lower:
+                    continue
+                claims.append(name)
+
+        return list(dict.fromkeys(numbers)), list(dict.fromkeys(claims))
+
+    @staticmethod
+    def is_common(word: str) -> bool:
+        word = word.lower()
+        return word in COMMON_TERMS or (word.endswith("s") and word[:-1] in COMMON_TERMS)
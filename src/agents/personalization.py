@@ -0,0 +1,101 @@
+from typing import Dict, Iterable, List
+from src.core.models import Content, User
+
+class DigestIndex:
+    """
+    Bitmap index for per-user digests.
+
+    Every distinct tag (relevance label or topic) gets a bit. Each tag maps to
+    an int bitmap of the items carrying it, so a user's digest is the OR of the
+    bitmaps for their preferred tags. Users are grouped by preference mask and
+    then by resulting item set, so each distinct digest is built once no matter
+    how many subscribers share it.
+
+    Users whose preferences match none of the items get the full digest, as
+    they did before personalization, rather than silently nothing; the count
+    is kept in `unmatched_users` for the caller to log.
+    """
+
+    def __init__(self, items: List[Content]):
+        self.items = items
+        self.tag_bits: Dict[str, int] = {}
+        self.tag_items: List[int] = []
+        self.all_items = (1 << len(items)) - 1
+        self.unmatched_users = 0
+
+        for position, item in enumerate(items):
+            for tag in self.item_tags(item):
+                bit = self.tag_bits.setdefault(tag, len(self.tag_bits))
+                if bit == len(self.tag_items):
+                    self.tag_items.append(0)
+                self.tag_items[bit] |= 1 << position
+
+    @staticmethod
+    def normalize(tag: str) -> str:
+        return tag.strip().lower()
+
+    def item_tags(self, item: Content) -> set:
+        tags = {self.normalize(t) for t in (item.topics or []) if t}
+        if item.relevance_label:
+            tags.add(self.normalize(item.relevance_label))
+        return tags
+
+    def user_mask(self, preferences: Iterable[str]) -> int:
+        """
+        Tag mask for a user. Preferences that no current item carries are dropped.
+        -1 means "no preferences": the user gets every item.
+        """
+        preferences = [p for p in (preferences or []) if p]
+        if not preferences:
+            return -1
+        mask = 0
+        for preference in preferences:
+            bit = self.tag_bits.get(self.normalize(preference))
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def item_set(self, mask: int) -> int:
+        """Bitmap of item positions matching a user mask."""
+        if mask == -1:
+            return self.all_items
+        selected = 0
+        while mask:
+            low = mask & -mask
+            selected |= self.tag_items[low.bit_length() - 1]
+            mask ^= low
+        return selected
+
+    def group_users(self, users: List[User]) -> Dict[int, List[User]]:
+        """
+        Returns {item_set_bitmap: users}. Users whose preferences match no
+        item fall back to every item, and are counted in `unmatched_users`.
+        """
+        # Keyed on the stored list first (cheap), then on the normalized set, so
+        # preferences differing only in order or case share one mask
+        masks: Dict[tuple, int] = {}
+        normalized: Dict[frozenset, int] = {}
+        by_mask: Dict[int, List[User]] = {}
+        for user in users:
+            raw = tuple(user.topic_preferences or ())
+            mask = masks.get(raw)
+            if mask is None:
+                key = frozenset(self.normalize(p) for p in raw if p)
+                if key not in normalized:
+                    normalized[key] = self.user_mask(key)
+                mask = masks[raw] = normalized[key]
+            by_mask.setdefault(mask, []).append(user)
+
+        groups: Dict[int, List[User]] = {}
+        self.unmatched_users = 0
+        for mask, mask_users in by_mask.items():
+            selected = self.item_set(mask)
+            if not selected:
+                self.unmatched_users += len(mask_users)
+                selected = self.all_items
+            if selected:
+                groups.setdefault(selected, []).extend(mask_users)
+        return groups
+
+    def items_for(self, selected: int) -> List[Content]:
+        return [item for position, item in enumerate(self.items) if (selected >> position) & 1]
@@ -1,7 +1,9 @@
 from datetime import datetime
 from sqlalchemy import desc
+from sqlalchemy.orm import load_only
 from src.core.database import SessionLocal
 from src.core.models import Content
+from src.core.lifecycle import ItemStage, advance
 from src.agents.base import BaseAgent
 
 class PrioritizationAgent(BaseAgent):
@@ -10,32 +12,37 @@ class PrioritizationAgent(BaseAgent):
     Simple heuristic ranking for MVP.
     """
 
+    STAGE = "prioritization"
+
     def _execute(self):
         self.logger.info("Starting Prioritization...")
         processed_count = 0
         
         with SessionLocal() as db:
-            # Select enriched items that haven't been prioritized/synthesized yet (or re-prioritize pending)
-            # We want items causing 'PENDING' synthesis
-            # Let's say we prioritize items that are RELEVANT and have topics/embeddings
-            
-            items = db.query(Content).filter(
-                Content.relevance_label.isnot(None),
-                Content.relevance_label != 'IRRELEVANT',
-                Content.priority_score == 0.0 # Not yet ranked
-            ).all()
+            # Enriched items (embedding, topics, cluster) that haven't been ranked yet; only the scoring inputs are loaded
+            item_ids = self.claim_items(db, (Content.stage == ItemStage.ENRICHED,))
+            items = db.query(Content).options(load_only(
+                Content.relevance_label, Content.relevance_confidence, Content.published_at,
+                Content.priority_score, Content.stage
+            )).filter(
+                Content.id.in_(item_ids)
+            ).order_by(Content.id).all()
+            self.items_in = len(items)
+            done = []
 
             for item in items:
                 try:
                     score = self.calculate_priority(item)
                     item.priority_score = score
+                    advance(item, ItemStage.PRIORITIZED)
                     
                     self.logger.info(f"Prioritized {item.id}: Score {score}")
-                    processed_count += 1
+                    done.append(item.id)
                 except Exception as e:
                     self.logger.error(f"Failed to prioritize {item.id}: {e}")
             
-            db.commit()
+            if self.release_items(db, done):
+                processed_count = len(done)
             
         self.logger.info(f"Prioritization complete. Ranked {processed_count} items.")
         return processed_count
@@ -3,26 +3,14 @@ from typing import Optional, List
 from pydantic import BaseModel, Field
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from sqlalchemy.orm import undefer_group
 from src.core.database import SessionLocal
 from src.core.models import Content
+from src.core.lifecycle import ItemStage, advance
 from src.agents.base import BaseAgent
 from src.core.config import Config
-
-# --- LLM Client Setup ---
-# Use LiteLLM or direct clients. For simplicity, let's use OpenAI/Gemini directly based on config.
-# We'll prioritize OpenAI for now, falling back to Gemini if configured.
-try:
-    from openai import OpenAI
-    openai_client = OpenAI(api_key=Config.OPENAI_API_KEY) if Config.OPENAI_API_KEY else None
-except ImportError:
-    openai_client = None
-
-try:
-    import google.generativeai as genai
-    if Config.GEMINI_API_KEY:
-        genai.configure(api_key=Config.GEMINI_API_KEY)
-except ImportError:
-    pass
+from src.core import metrics
+from src.core.clients import gemini, openai_client
 
 # --- Prompts ---
 RELEVANCE_SYSTEM_PROMPT = """
@@ -54,17 +42,24 @@ class RelevanceResult(BaseModel):
 
 class RelevanceDecisionAgent(BaseAgent):
     """
-    Scans DB for content with NULL relevance_label.
+    Scans DB for NEW content.
     Uses LLM to classify and score.
     """
+
+    STAGE = "relevance"
     
     def _execute(self):
         self.logger.info("Starting Relevance Decision...")
         processed_count = 0
         
         with SessionLocal() as db:
-            # 1. Select pending items
-            pending_items = db.query(Content).filter(Content.relevance_label == None).limit(10).all() # Process in batches
+            # 1. Lease pending items
+            item_ids = self.claim_items(db, (Content.stage == ItemStage.NEW,), limit=10) # Process in batches
+            pending_items = db.query(Content).options(undefer_group("body")).filter(
+                Content.id.in_(item_ids)
+            ).order_by(Content.id).all()
+            self.items_in = len(pending_items)
+            done = []
             
             for item in pending_items:
                 try:
@@ -73,19 +68,21 @@ class RelevanceDecisionAgent(BaseAgent):
                     item.relevance_label = decision.label
                     item.relevance_confidence = decision.confidence_score
                     item.relevance_reason = decision.reason
+                    advance(item, ItemStage.IRRELEVANT if decision.label == "IRRELEVANT" else ItemStage.RELEVANT)
                     
                     self.logger.info(f"Classified {item.id} as {decision.label} ({decision.confidence_score})")
-                    processed_count += 1
+                    done.append(item.id)
                     
                 except Exception as e:
                     self.logger.error(f"Failed to classify {item.id}: {e}")
             
-            db.commit()
+            if self.release_items(db, done):
+                processed_count = len(done)
             
         self.logger.info(f"Relevance processing complete. Processed {processed_count} items.")
         return processed_count
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), before_sleep=metrics.count_retry("relevance"))
     def evaluate_relevance(self, item: Content) -> RelevanceResult:
         """
         Calls LLM to evaluate relevance.
@@ -97,21 +94,33 @@ class RelevanceDecisionAgent(BaseAgent):
             self.logger.warning("No LLM API Key found. Using mock decision.")
             return RelevanceResult(label="FOUNDATION_MODELS", confidence_score=0.9, reason="Mock decision (No API Key)")
 
-        if openai_client:
-            response = openai_client.chat.completions.create(
-                model="gpt-4o" if Config.OPENAI_API_KEY else "gpt-3.5-turbo", # fallback or config
-                messages=[
-                    {"role": "system", "content": RELEVANCE_SYSTEM_PROMPT},
-                    {"role": "user", "content": content_text}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.0
-            )
+        if openai_client():
+            with metrics.track_call("llm", "relevance"):
+                response = openai_client().chat.completions.create(
+                    model="gpt-4o" if Config.OPENAI_API_KEY else "gpt-3.5-turbo", # fallback or config
+                    messages=[
+                        {"role": "system", "content": RELEVANCE_SYSTEM_PROMPT},
+                        {"role": "user", "content": content_text}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=0.0
+                )
+            metrics.count_tokens("relevance", response.usage)
             data = json.loads(response.choices[0].message.content)
             return RelevanceResult(**data)
         
-        # Fallback to Gemini (omitted for brevity, assume OpenAI first for Plan)
-        # In real impl, would have robust switcher.
+        if gemini():
+            model = gemini().GenerativeModel(
+                Config.GEMINI_MODEL,
+                system_instruction=RELEVANCE_SYSTEM_PROMPT,
+                generation_config={"response_mime_type": "application/json", "temperature": 0.0}
+            )
+            with metrics.track_call("llm", "relevance_gemini"):
+                response = model.generate_content(content_text)
+            metrics.count_tokens("relevance", response.usage_metadata)
+            return RelevanceResult(**json.loads(response.text))
+
+        # Key set but SDK missing
         return RelevanceResult(label="IRRELEVANT", confidence_score=0.0, reason="No available LLM provider")
 
 if __name__ == "__main__":
@@ -1,18 +1,18 @@
 import json
-from typing import List, Optional
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import undefer_group
 from src.core.database import SessionLocal
-from src.core.models import Content
+from src.core.models import Content, InsightSummary
+from src.core.lifecycle import ItemStage, advance
 from src.agents.base import BaseAgent
 from src.core.config import Config
-
-# --- LLM Client ---
-try:
-    from openai import OpenAI
-    openai_client = OpenAI(api_key=Config.OPENAI_API_KEY) if Config.OPENAI_API_KEY else None
-except ImportError:
-    openai_client = None
+from src.core import metrics
+from src.core.clients import openai_client
 
 SYNTHESIS_SYSTEM_PROMPT = """
 You are an expert AI editor.
@@ -31,82 +31,309 @@ Style:
 - No emojis through this prompt (added later).
 """
 
+CLUSTER_SYNTHESIS_SYSTEM_PROMPT = """
+You are an expert AI editor.
+Several sources below cover the SAME story. Synthesize them into ONE concise insight digest for WhatsApp.
+
+Input: Numbered sources, each with Title, Source, Body
+Output Format: JSON with:
+- `headline` (max 120 chars, catchy but factual)
+- `tldr` (max 3 sentences, combining what the sources agree on)
+- `highlights` (list of 3-5 strings, prefer details only some sources mention)
+- `why_it_matters` (1 sentence)
+
+Style:
+- Neutral, factual, high-signal.
+- Only state facts present in at least one source.
+- No emojis through this prompt (added later).
+"""
+
+class SummaryResult:
+    def __init__(self, headline, tldr, highlights, why_it_matters):
+        self.headline = headline
+        self.tldr = tldr
+        self.highlights = highlights
+        self.why_it_matters = why_it_matters
+
+def digest_slots(db) -> int:
+    """
+    Stories the next digest can still take: DIGEST_SIZE minus those already
+    synthesized or validated and waiting for delivery, and minus items leased
+    for synthesis right now (by any process). Negative when overfilled.
+    """
+    waiting = db.query(Content.id).filter(or_(
+        Content.stage.in_([ItemStage.SYNTHESIZED, ItemStage.PASSED]),
+        and_(Content.lease_stage == "synthesis", Content.lease_expires_at >= datetime.utcnow())
+    )).count()
+    return Config.DIGEST_SIZE - waiting
+
 class InsightSynthesisAgent(BaseAgent):
     """
-    Takes Top N prioritized items and synthesizes them.
+    Takes Top N prioritized items and synthesizes them, N being the digest's
+    open slots unless `limit` is given.
+    In cluster mode, writes one summary per story cluster onto its lead item.
+    In streaming mode, runs completions concurrently and commits each summary as it arrives.
     """
 
-    def _execute(self, limit=5):
-        self.logger.info("Starting Insight Synthesis...")
-        processed_count = 0
-        
+    STAGE = "synthesis"
+
+    def _execute(self, limit=None, mode=None, streaming=None, on_ready=None, min_priority=0.0):
+        mode = mode or Config.SYNTHESIS_MODE
+        streaming = Config.SYNTHESIS_STREAMING if streaming is None else streaming
+        self.logger.info(f"Starting Insight Synthesis ({mode} mode{', streaming' if streaming else ''})...")
+
         with SessionLocal() as db:
-            # Select top prioritized items that haven't been synthesized
-            # i.e., priority_score > 0 and summary_headline is NULL
-            
-            items = db.query(Content).filter(
-                Content.priority_score > 0,
-                Content.summary_headline == None
-            ).order_by(Content.priority_score.desc()).limit(limit).all()
-
-            for item in items:
+            if limit is None:
+                limit = digest_slots(db)
+                if limit <= 0:
+                    self.logger.info(f"Digest already has {Config.DIGEST_SIZE} stories waiting; nothing to synthesize.")
+                    self.items_in = 0
+                    return 0
+            if mode == "cluster":
+                jobs = self.claim_jobs(db, self.select_cluster_jobs(db, limit, min_priority))
+            else:
+                # Lease top prioritized items that haven't been synthesized
+                item_ids = self.claim_items(db, (
+                    Content.stage == ItemStage.PRIORITIZED,
+                    Content.priority_score > 0,
+                    Content.priority_score >= min_priority
+                ), limit, order_by=(Content.priority_score.desc(), Content.id))
+                items = db.query(Content).options(undefer_group("body")).filter(
+                    Content.id.in_(item_ids)
+                ).order_by(Content.priority_score.desc(), Content.id).all()
+                jobs = [[item] for item in items]
+            self.items_in = len(jobs)
+
+            if streaming:
+                processed_count = self.synthesize_streaming(db, jobs, on_ready)
+            else:
+                done = []
+                processed_count = 0
+                for members in jobs:
+                    try:
+                        self.apply_summary(members, self.generate_for(members))
+                        done.extend(member.id for member in members)
+                        processed_count += 1
+                    except Exception as e:
+                        self.logger.error(f"Failed to synthesize {members[0].id}: {e}")
+
+                if not self.release_items(db, done):
+                    processed_count = 0
+
+        self.logger.info(f"Synthesis complete. Generated {processed_count} summaries.")
+        return processed_count
+
+    def select_cluster_jobs(self, db, limit: int, min_priority: float = 0.0) -> List[List[Content]]:
+        """
+        Picks the top `limit` stories (distinct clusters), each as a list of
+        pending members ordered by priority. The first member is the lead.
+        Only leads need to reach `min_priority`.
+        """
+        candidates = db.query(Content).options(undefer_group("body")).filter(
+            Content.stage == ItemStage.PRIORITIZED,
+            Content.priority_score > 0,
+            Content.priority_score >= min_priority
+        ).order_by(Content.priority_score.desc()).limit(limit * Config.CLUSTER_SYNTHESIS_MAX_SOURCES).all()
+
+        # Group into stories, keeping priority order. Unclustered items stand alone.
+        leads = {}
+        for item in candidates:
+            key = item.cluster_id or f"item-{item.id}"
+            if key not in leads:
+                if len(leads) >= limit:
+                    break
+                leads[key] = item
+
+        jobs = []
+        for key, top_item in leads.items():
+            members = [top_item]
+            if top_item.cluster_id:
+                members = db.query(Content).options(undefer_group("body")).filter(
+                    Content.stage == ItemStage.PRIORITIZED,
+                    Content.cluster_id == key,
+                    Content.priority_score > 0
+                ).order_by(Content.priority_score.desc(), Content.id).all()
+            jobs.append(members)
+
+        return jobs
+
+    def claim_jobs(self, db, jobs: List[List[Content]]) -> List[List[Content]]:
+        """
+        Leases the members of `jobs`. Stories whose lead is leased elsewhere
+        are dropped (their other members released again), as are members
+        leased elsewhere.
+        """
+        job_ids = [[member.id for member in members] for members in jobs]
+        claimed = set(self.claim_items(db, (
+            Content.id.in_([item_id for ids in job_ids for item_id in ids]),
+            Content.stage == ItemStage.PRIORITIZED
+        )))
+        job_ids = [[item_id for item_id in ids if item_id in claimed] for ids in job_ids if ids[0] in claimed]
+        kept = {item_id for ids in job_ids for item_id in ids}
+        if claimed - kept:
+            self.release_items(db, claimed - kept)
+
+        items = {item.id: item for item in db.query(Content).options(undefer_group("body")).filter(Content.id.in_(kept))}
+        return [[items[item_id] for item_id in ids] for ids in job_ids]
+
+    def synthesize_streaming(self, db, jobs: List[List[Content]], on_ready: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Fans completions out over a thread pool. Prompts are built up front so
+        workers never touch the session; each validated summary is committed
+        with its leases released immediately and handed to `on_ready` (e.g.
+        the guardrail stage).
+        """
+        processed_count = 0
+        # Before any commit expires the members
+        member_ids = {id(members): [member.id for member in members] for members in jobs}
+        with ThreadPoolExecutor(max_workers=Config.SYNTHESIS_CONCURRENCY) as pool:
+            futures = {}
+            for members in jobs:
+                sources = members[:Config.CLUSTER_SYNTHESIS_MAX_SOURCES]
+                if openai_client():
+                    system_prompt, content_text = self.build_prompt(sources)
+                    futures[pool.submit(self.stream_summary, system_prompt, content_text, sources[0].url)] = members
+                else:
+                    # Built here, before any commit expires the ORM objects the mock reads
+                    futures[pool.submit(lambda summary=self.mock_summary(sources): summary)] = members
+
+            for future in as_completed(futures):
+                members = futures[future]
+                lead_id = member_ids[id(members)][0]
                 try:
-                    summary = self.generate_summary(item)
-                    
-                    item.summary_headline = summary.headline
-                    item.summary_tldr = summary.tldr
-                    item.summary_highlights = summary.highlights
-                    item.summary_why_matters = summary.why_it_matters
-                    item.validation_status = "PENDING"
-                    
-                    self.logger.info(f"Synthesized {item.id}: {item.summary_headline}")
-                    processed_count += 1
+                    self.apply_summary(members, future.result())
                 except Exception as e:
-                    self.logger.error(f"Failed to synthesize {item.id}: {e}")
-            
-            db.commit()
-            
-        self.logger.info(f"Synthesis complete. Generated {processed_count} summaries.")
+                    db.rollback()
+                    self.logger.error(f"Failed to synthesize {lead_id}: {e}")
+                    continue
+                if not self.release_items(db, member_ids[id(members)]):
+                    continue
+
+                processed_count += 1
+                if on_ready:
+                    on_ready(lead_id)
+
         return processed_count
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def generate_summary(self, item: Content):
-        content_text = f"Title: {item.title}\nBody: {item.abstract_or_body[:4000]}"
-        
-        class SummaryResult:
-            def __init__(self, headline, tldr, highlights, why_it_matters):
-                self.headline = headline
-                self.tldr = tldr
-                self.highlights = highlights
-                self.why_it_matters = why_it_matters
+    def apply_summary(self, members: List[Content], summary):
+        lead = members[0]
+        lead.summary_headline = summary.headline
+        lead.summary_tldr = summary.tldr
+        lead.summary_highlights = summary.highlights
+        lead.summary_why_matters = summary.why_it_matters
+        lead.validation_status = "PENDING"
+        advance(lead, ItemStage.SYNTHESIZED)
 
-        # Mock if no key
-        if not openai_client:
+        for member in members[1:]:
+            member.summary_parent_id = lead.id
+            advance(member, ItemStage.MERGED)
+
+        self.logger.info(f"Synthesized {lead.id} ({len(members)} members): {lead.summary_headline}")
+
+    def generate_for(self, members: List[Content]):
+        sources = members[:Config.CLUSTER_SYNTHESIS_MAX_SOURCES]
+        if len(sources) == 1:
+            return self.generate_summary(sources[0])
+        return self.generate_cluster_summary(sources)
+
+    def build_prompt(self, sources: List[Content]):
+        """
+        Returns (system_prompt, content_text). Multi-source prompts share the
+        4000-char body budget of a single item across sources.
+        """
+        if len(sources) == 1:
+            item = sources[0]
+            return SYNTHESIS_SYSTEM_PROMPT, f"Title: {item.title}\nBody: {item.abstract_or_body[:4000]}"
+
+        budget = 4000 // len(sources)
+        content_text = "\n\n".join(
+            f"Source {i}: {item.source}\nTitle: {item.title}\nBody: {(item.abstract_or_body or '')[:budget]}"
+            for i, item in enumerate(sources, start=1)
+        )
+        return CLUSTER_SYNTHESIS_SYSTEM_PROMPT, content_text
+
+    def mock_summary(self, sources: List[Content]) -> SummaryResult:
+        if len(sources) == 1:
             return SummaryResult(
-                headline=f"Summary of {item.title[:20]}...",
+                headline=f"Summary of {sources[0].title[:20]}...",
                 tldr="This is a mock summary because no API key is present.",
                 highlights=["Point 1", "Point 2"],
                 why_it_matters="It matters because we need to test."
             )
-
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": SYNTHESIS_SYSTEM_PROMPT},
-                {"role": "user", "content": content_text}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.3
-        )
-        
-        data = json.loads(response.choices[0].message.content)
         return SummaryResult(
-            headline=data.get("headline", ""),
-            tldr=data.get("tldr", ""),
-            highlights=data.get("highlights", []),
-            why_it_matters=data.get("why_it_matters", "")
+            headline=f"Summary of {sources[0].title[:20]}...",
+            tldr=f"This is a mock summary of {len(sources)} sources because no API key is present.",
+            highlights=[f"Source {i}: {item.source}" for i, item in enumerate(sources, start=1)],
+            why_it_matters="It matters because we need to test."
         )
 
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), before_sleep=metrics.count_retry("synthesis"))
+    def generate_summary(self, item: Content):
+        # Mock if no key
+        if not openai_client():
+            return self.mock_summary([item])
+
+        return self.complete_summary(*self.build_prompt([item]), item.url)
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), before_sleep=metrics.count_retry("synthesis"))
+    def generate_cluster_summary(self, items: List[Content]):
+        """
+        Builds one multi-source prompt from the cluster's top members.
+        """
+        # Mock if no key
+        if not openai_client():
+            return self.mock_summary(items)
+
+        return self.complete_summary(*self.build_prompt(items), items[0].url)
+
+    def complete_summary(self, system_prompt: str, content_text: str, source_url: str) -> InsightSummary:
+        """
+        Validates the JSON against `InsightSummary`, like `stream_summary`.
+        Schema violations raise and are retried by the caller.
+        """
+        with metrics.track_call("llm", "synthesis"):
+            response = openai_client().chat.completions.create(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": content_text}
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.3
+            )
+        metrics.count_tokens("synthesis", response.usage)
+
+        data = json.loads(response.choices[0].message.content)
+        return InsightSummary(**{**data, "source_url": source_url})
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), before_sleep=metrics.count_retry("synthesis"))
+    def stream_summary(self, system_prompt: str, content_text: str, source_url: str) -> InsightSummary:
+        """
+        Streams the completion and validates the assembled JSON against
+        `InsightSummary`. Schema violations raise and are retried.
+        """
+        chunks = []
+        with metrics.track_call("llm", "synthesis_stream"):
+            stream = openai_client().chat.completions.create(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": content_text}
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.3,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    chunks.append(chunk.choices[0].delta.content)
+                if getattr(chunk, "usage", None):
+                    metrics.count_tokens("synthesis", chunk.usage)
+
+        data = json.loads("".join(chunks))
+        return InsightSummary(**{**data, "source_url": source_url})
+
 if __name__ == "__main__":
     agent = InsightSynthesisAgent("test_synthesis")
     agent.run()
@@ -0,0 +1,62 @@
+"""
+SDK clients, built on first use.
+
+The provider SDKs (openai, google.generativeai, twilio) take seconds to
+import, so agents ask for a client here when they need one instead of
+building it at module import. Each getter returns None when the SDK is
+missing or the API key isn't configured, matching the agents' mock paths.
+"""
+import threading
+from .config import Config
+
+_lock = threading.Lock()
+_clients = {}
+
+def _cached(name, build):
+    if name not in _clients:
+        with _lock:
+            if name not in _clients:
+                try:
+                    _clients[name] = build()
+                except ImportError:
+                    _clients[name] = None
+    return _clients[name]
+
+def _build_openai():
+    if not Config.OPENAI_API_KEY:
+        return None
+    from openai import OpenAI
+    return OpenAI(api_key=Config.OPENAI_API_KEY)
+
+def _build_gemini():
+    if not Config.GEMINI_API_KEY:
+        return None
+    import google.generativeai as genai
+    genai.configure(api_key=Config.GEMINI_API_KEY)
+    return genai
+
+def _build_twilio():
+    if not Config.TWILIO_ACCOUNT_SID:
+        return None
+    # One pooled HTTP session shared by all delivery workers (keep-alive, pool sized to concurrency).
+    from requests.adapters import HTTPAdapter
+    from twilio.rest import Client
+    from twilio.http.http_client import TwilioHttpClient
+    http_client = TwilioHttpClient(pool_connections=True, timeout=10)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=Config.DELIVERY_CONCURRENCY)
+    http_client.session.mount("https://", adapter)
+    http_client.session.mount("http://", adapter)
+    client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN, http_client=http_client)
+    if Config.TWILIO_API_BASE_URL:
+        client.api.base_url = Config.TWILIO_API_BASE_URL
+    return client
+
+def openai_client():
+    return _cached("openai", _build_openai)
+
+def gemini():
+    """The configured google.generativeai module."""
+    return _cached("gemini", _build_gemini)
+
+def twilio_client():
+    return _cached("twilio", _build_twilio)
@@ -13,20 +13,82 @@ class Config:
 
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATA_DIR}/signal_digest.db")
+    DB_PROFILE = os.getenv("DB_PROFILE", "tuned").lower() # tuned, plain (src/core/db_profile.py)
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL") # Readers don't block the writer (and vice versa)
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL") # Durable in WAL except for the last commits on power loss
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)) # Wait this long for the write lock before "database is locked"
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 64 * 1024)) # Page cache per connection
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10)) # Postgres: persistent connections per process
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10)) # Postgres: extra connections under burst
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30)) # Seconds to wait for a free pooled connection
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800)) # Reconnect connections older than this (idle server timeouts)
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000)) # Postgres: abort statements running longer. 0 = off
 
     # API Keys
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash") # Relevance fallback when OpenAI isn't configured
     TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
     TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
     TWILIO_FROM_NUMBER = os.getenv("TWILIO_FROM_NUMBER")
+    TWILIO_API_BASE_URL = os.getenv("TWILIO_API_BASE_URL") # Override for a local stand-in (scripts/twilio_standin.py)
+    TWILIO_STATUS_CALLBACK_URL = os.getenv("TWILIO_STATUS_CALLBACK_URL") # Public URL of /twilio/status
 
     # App Settings
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     DRY_RUN = os.getenv("DRY_RUN", "False").lower() == "true"
+    METRICS_PORT = int(os.getenv("METRICS_PORT", 0)) # Prometheus endpoint for the scheduler/worker process. 0 = off
+    PROFILE_MODE = os.getenv("PROFILE_MODE", "off").lower() # off, cprofile, tracemalloc, sample (artifacts in LOGS_DIR/profiles)
+    PROFILE_AGENTS = os.getenv("PROFILE_AGENTS", "").split(",") # Agent names to profile; empty = all
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", 0.005)) # Seconds between stack samples
+    PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", 1)) # Stack depth kept per allocation
+
+    # Pipeline Settings
+    PIPELINE_MODE = os.getenv("PIPELINE_MODE", "batch").lower() # batch, streaming
+    STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 32)) # Per-stage buffer (backpressure bound)
+    STREAM_LLM_WORKERS = int(os.getenv("STREAM_LLM_WORKERS", 4)) # Workers per LLM stage
+    STREAM_SYNTHESIS_MIN_PRIORITY = float(os.getenv("STREAM_SYNTHESIS_MIN_PRIORITY", 0.9)) # Also gates scheduled continuous synthesis
+    DIGEST_SIZE = int(os.getenv("DIGEST_SIZE", 5)) # Stories per digest; delivery tops up with the best remaining items
+    WORKER_LEASE_SECONDS = int(os.getenv("WORKER_LEASE_SECONDS", 300)) # Unfinished claims are re-claimable after this
+    WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", 5)) # Items claimed per round trip
+    WORKER_IDLE_SECONDS = float(os.getenv("WORKER_IDLE_SECONDS", 10)) # Sleep when a worker finds nothing to claim
+    WORKER_MAX_ATTEMPTS = int(os.getenv("WORKER_MAX_ATTEMPTS", 3)) # Failed claims before an item is parked; reset content.lease_attempts to retry
+
+    # Scheduler Settings (python -m src.main)
+    ACQUISITION_INTERVAL_MINUTES = float(os.getenv("ACQUISITION_INTERVAL_MINUTES", 30))
+    PROCESSING_INTERVAL_SECONDS = float(os.getenv("PROCESSING_INTERVAL_SECONDS", 60)) # Pause between LLM-stage passes over pending items
+    DELIVERY_CRON = os.getenv("DELIVERY_CRON", "0 9 * * *") # Digest send time (crontab, scheduler's local time)
+    RUN_LOCK_HEARTBEAT_SECONDS = float(os.getenv("RUN_LOCK_HEARTBEAT_SECONDS", 15))
+    RUN_LOCK_STALE_SECONDS = float(os.getenv("RUN_LOCK_STALE_SECONDS", 120)) # A lock without a heartbeat this long can be taken over
+    DELIVERY_LOCK_WAIT_SECONDS = float(os.getenv("DELIVERY_LOCK_WAIT_SECONDS", 1800)) # Scheduled delivery waits this long for a running pass
+    MAINTENANCE_CRON = os.getenv("MAINTENANCE_CRON", "30 3 * * *") # Archival + VACUUM/ANALYZE
+
+    # Retention (src/core/retention.py)
+    RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", 90)) # Finished items older than this leave the hot database. 0 = keep forever
+    RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", 500))
+    ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", DATA_DIR / "archive")) # content-YYYY-MM.jsonl.gz per fetch month
+    STATIC_SITE_DIR = Path(os.getenv("STATIC_SITE_DIR", BASE_DIR / "docs")) # Static export; archived items' item/<id> pages are removed
+    VACUUM_MIN_FREE_RATIO = float(os.getenv("VACUUM_MIN_FREE_RATIO", 0.2)) # SQLite: VACUUM once this share of pages is free
+
+    # Related items (src/core/similarity.py)
+    RELATED_ITEMS_K = int(os.getenv("RELATED_ITEMS_K", 5))
+    SIMILARITY_REFRESH_SECONDS = float(os.getenv("SIMILARITY_REFRESH_SECONDS", 30)) # How stale the in-memory index may get before a request reloads changed embeddings
 
     # Agent Settings
     MAX_RETRIES = int(os.getenv("MAX_RETRIES", 3))
+    SYNTHESIS_MODE = os.getenv("SYNTHESIS_MODE", "item").lower() # item, cluster
+    CLUSTER_SYNTHESIS_MAX_SOURCES = int(os.getenv("CLUSTER_SYNTHESIS_MAX_SOURCES", 3))
+    SYNTHESIS_STREAMING = os.getenv("SYNTHESIS_STREAMING", "False").lower() == "true"
+    SYNTHESIS_CONCURRENCY = int(os.getenv("SYNTHESIS_CONCURRENCY", 4))
+    CRITIC_BATCH_SIZE = int(os.getenv("CRITIC_BATCH_SIZE", 5))
+    TWILIO_MPS = float(os.getenv("TWILIO_MPS", 10)) # Account messages-per-second limit
+    DELIVERY_CONCURRENCY = int(os.getenv("DELIVERY_CONCURRENCY", 16))
+    DELIVERY_CHUNK_SIZE = int(os.getenv("DELIVERY_CHUNK_SIZE", 500)) # Ledger rows claimed per commit
+    DELIVERY_MAX_ATTEMPTS = int(os.getenv("DELIVERY_MAX_ATTEMPTS", 9)) # Across runs, per ledger row
+    STATUS_FLUSH_INTERVAL = float(os.getenv("STATUS_FLUSH_INTERVAL", 1.0)) # Seconds between callback flushes
+    STATUS_FLUSH_BATCH = int(os.getenv("STATUS_FLUSH_BATCH", 2000))
+    GUARDRAIL_BANNED_SOURCES = os.getenv("GUARDRAIL_BANNED_SOURCES", "").split(",") # Source names or domains
 
     @classmethod
     def validate(cls):
@@ -1,12 +1,13 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .config import Config
+from .metrics import instrument_engine
+from . import db_profile
 
 # Create the database engine
-engine = create_engine(
-    Config.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in Config.DATABASE_URL else {}
-)
+engine = create_engine(Config.DATABASE_URL, **db_profile.engine_options(Config.DATABASE_URL))
+db_profile.apply(engine)
+instrument_engine(engine)
 
 # Create a configurable session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -24,4 +25,50 @@ def get_db():
 
 def init_db():
     """Initialize the database tables."""
+    from .search import ensure_search_index
+    from .stats import ensure_stage_counts
     Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    ensure_stage_counts(engine)
+    ensure_statistics(engine)
+
+# Planner statistics seeded for an empty content table (ANALYZE writes none for it):
+# a large table with a small backlog at each pending stage
+SEED_ROWS = 100000
+SEED_PENDING_ROWS = 1000
+
+def ensure_statistics(engine, refresh: bool = False):
+    """
+    SQLite: ANALYZE content if it has no statistics yet (or on refresh, e.g.
+    after adding indexes). Without them the planner prefers
+    ix_content_stage_fetched to the partial pending indexes for the agents'
+    claims; retention.compact keeps them current from then on. An empty
+    table gets seeded statistics instead, which the first ANALYZE over real
+    rows replaces.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        if not refresh and _has_statistics(conn):
+            return
+        conn.exec_driver_sql("ANALYZE content")
+        if _has_statistics(conn):
+            return
+        for name, stat in _seed_statistics():
+            conn.exec_driver_sql("INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES ('content', ?, ?)", (name, stat))
+    engine.dispose() # Pooled connections loaded the schema without them
+
+def _has_statistics(conn) -> bool:
+    if not conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").first():
+        return False
+    return conn.exec_driver_sql("SELECT 1 FROM sqlite_stat1 WHERE tbl = 'content'").first() is not None
+
+def _seed_statistics():
+    """(index, stat) rows: the index's row count, then the rows per distinct prefix of its columns."""
+    from .models import Content
+    for index in Content.__table__.indexes:
+        columns = len(index.columns)
+        if index.dialect_options["sqlite"]["where"] is not None:
+            yield index.name, " ".join(map(str, [SEED_PENDING_ROWS] + [1] * columns))
+        elif index.columns[0].name == "stage":
+            yield index.name, " ".join(map(str, [SEED_ROWS, SEED_ROWS // 10] + [1] * (columns - 1)))
@@ -0,0 +1,77 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from sqlalchemy import or_, select, update
+from .config import Config
+from .models import Content
+
+class LeaseLost(Exception):
+    """The lease expired and another worker re-claimed the item before its results were committed."""
+
+def lease_is_free(now: datetime):
+    """Unleased items, or items whose holder let the lease run out."""
+    return or_(Content.lease_owner == None, Content.lease_expires_at < now)
+
+def claimable(now: datetime) -> tuple:
+    """What `claim` requires besides the stage's own criteria: a free lease and attempts left."""
+    return lease_is_free(now), Content.lease_attempts < Config.WORKER_MAX_ATTEMPTS
+
+def is_parked(db, item_id: int) -> bool:
+    """True once the item failed WORKER_MAX_ATTEMPTS claims in a row; `claim` skips it from then on."""
+    attempts = db.scalar(select(Content.lease_attempts).where(Content.id == item_id))
+    return (attempts or 0) >= Config.WORKER_MAX_ATTEMPTS
+
+def claim(db, stage: str, criteria: tuple, owner: str, limit: int, lease_seconds: int,
+          order_by: tuple = (Content.id,)) -> Tuple[str, List[int]]:
+    """
+    Lease up to `limit` items (None for all) matching `criteria` for `stage`,
+    first by `order_by`, and commit.
+
+    Returns (token, ids). The token ("<owner>/<random>") identifies this claim;
+    pass it to `release` once an item is done. Every claim counts as an
+    attempt until `release` resets it, so an item that keeps failing (or
+    crashing its worker) is parked after WORKER_MAX_ATTEMPTS.
+
+    Postgres locks candidate rows with FOR UPDATE SKIP LOCKED so concurrent
+    workers pick disjoint rows; SQLite serializes writers, so a single
+    UPDATE ... WHERE id IN (SELECT ... LIMIT n) RETURNING id is already atomic.
+    """
+    now = datetime.utcnow()
+    token = f"{owner}/{uuid.uuid4().hex[:8]}"
+    values = dict(
+        lease_owner=token, lease_stage=stage, lease_expires_at=now + timedelta(seconds=lease_seconds),
+        lease_attempts=Content.lease_attempts + 1
+    )
+    candidates = select(Content.id).where(*criteria, *claimable(now)).order_by(*order_by).limit(limit)
+
+    if db.get_bind().dialect.name == "postgresql":
+        ids = list(db.execute(candidates.with_for_update(skip_locked=True)).scalars())
+        if ids:
+            db.execute(
+                update(Content).where(Content.id.in_(ids)).values(**values),
+                execution_options={"synchronize_session": False}
+            )
+    else:
+        # RETURNING (SQLite 3.35+) saves reading the claimed ids back, which lease_owner has no index for
+        statement = update(Content).where(Content.id.in_(candidates.scalar_subquery())).values(**values)
+        options = {"synchronize_session": False}
+        if db.get_bind().dialect.update_returning:
+            ids = sorted(db.execute(statement.returning(Content.id), execution_options=options).scalars())
+        else:
+            db.execute(statement, execution_options=options)
+            ids = list(db.execute(select(Content.id).where(Content.lease_owner == token).order_by(Content.id)).scalars())
+    db.commit()
+    return token, ids
+
+def release(db, item_id: int, token: str) -> bool:
+    """
+    Clear the lease inside the caller's transaction. False means the lease
+    expired and was re-claimed by someone else; the caller should roll back.
+    """
+    result = db.execute(
+        update(Content).where(Content.id == item_id, Content.lease_owner == token).values(
+            lease_owner=None, lease_stage=None, lease_expires_at=None, lease_attempts=0
+        ),
+        execution_options={"synchronize_session": False}
+    )
+    return result.rowcount == 1
@@ -0,0 +1,69 @@
+"""
+Content lifecycle. Each item carries an explicit `stage`, and every agent
+selects its work with `Content.stage == <stage>` (plus its own ordering),
+which hits a partial index over just the rows waiting at that stage.
+
+    NEW -> RELEVANT -> ENRICHED -> PRIORITIZED -> SYNTHESIZED -> PASSED -> QUEUED -> DELIVERED
+       \\-> IRRELEVANT               \\-> MERGED           \\-> REJECTED
+
+MERGED items are cluster members covered by their lead's summary.
+"""
+import enum
+
+class ItemStage(enum.Enum):
+    NEW = "NEW"                 # awaiting relevance
+    IRRELEVANT = "IRRELEVANT"
+    RELEVANT = "RELEVANT"       # awaiting enrichment
+    ENRICHED = "ENRICHED"       # awaiting prioritization
+    PRIORITIZED = "PRIORITIZED" # awaiting synthesis (top-N or above the streaming threshold)
+    MERGED = "MERGED"
+    SYNTHESIZED = "SYNTHESIZED" # awaiting validation
+    PASSED = "PASSED"           # awaiting delivery
+    REJECTED = "REJECTED"
+    QUEUED = "QUEUED"           # planned into the delivery ledger
+    DELIVERED = "DELIVERED"
+
+TRANSITIONS = {
+    ItemStage.NEW: {ItemStage.RELEVANT, ItemStage.IRRELEVANT},
+    ItemStage.RELEVANT: {ItemStage.ENRICHED},
+    ItemStage.ENRICHED: {ItemStage.PRIORITIZED},
+    ItemStage.PRIORITIZED: {ItemStage.SYNTHESIZED, ItemStage.MERGED},
+    ItemStage.SYNTHESIZED: {ItemStage.PASSED, ItemStage.REJECTED},
+    ItemStage.PASSED: {ItemStage.QUEUED},
+    ItemStage.QUEUED: {ItemStage.DELIVERED},
+}
+
+class InvalidTransition(ValueError):
+    pass
+
+def advance(item, stage: ItemStage):
+    """Moves `item` to `stage`. Re-entering the current stage is a no-op."""
+    current = item.stage or ItemStage.NEW
+    if stage == current:
+        return
+    if stage not in TRANSITIONS.get(current, ()):
+        raise InvalidTransition(f"Item {item.id} cannot move from {current.name} to {stage.name}")
+    item.stage = stage
+
+def infer_stage(item) -> ItemStage:
+    """
+    The stage implied by an item's pipeline fields, for rows written before
+    the stage column existed (scripts/backfill_stages.py).
+    """
+    if item.delivery_status == "SENT":
+        return ItemStage.DELIVERED
+    if item.delivery_status == "QUEUED":
+        return ItemStage.QUEUED
+    if item.summary_parent_id is not None:
+        return ItemStage.MERGED
+    if item.summary_headline is not None:
+        return {"PASS": ItemStage.PASSED, "FAIL": ItemStage.REJECTED}.get(item.validation_status, ItemStage.SYNTHESIZED)
+    if item.relevance_label is None:
+        return ItemStage.NEW
+    if item.relevance_label == "IRRELEVANT":
+        return ItemStage.IRRELEVANT
+    if item.embedding_vector is None:
+        return ItemStage.RELEVANT
+    if not item.priority_score:
+        return ItemStage.ENRICHED
+    return ItemStage.PRIORITIZED
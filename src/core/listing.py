@@ -0,0 +1,88 @@
+"""
+Content list views: newest first, filtered in SQL and keyset-paginated on
+(fetched_at, id). Each filter has an index that leads with its column and
+ends in (fetched_at, id), so the next page is one range scan from the
+cursor, whether it is page 2 or page 20,000.
+"""
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import tuple_
+from .lifecycle import ItemStage
+from .models import Content
+from .stats import RELEVANT_STAGES, SYNTHESIZED_STAGES
+
+PAGE_SIZE = 50
+
+# The dashboard's status views, as stage sets
+STATUS_STAGES = {
+    "pending": frozenset({ItemStage.NEW}),
+    "relevant": RELEVANT_STAGES,
+    "synthesized": SYNTHESIZED_STAGES,
+}
+
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d") if value else None
+    except ValueError:
+        return None
+
+def parse_cursor(after: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """'<fetched_at ISO>:<id>' as written by `page`; None if absent or malformed."""
+    if not after:
+        return None
+    try:
+        fetched_at, item_id = after.rsplit(":", 1)
+        return datetime.fromisoformat(fetched_at), int(item_id)
+    except ValueError:
+        return None
+
+@dataclass
+class ContentFilter:
+    """List filters from the query string; values that don't parse are ignored."""
+    status: str = "all"
+    source: Optional[str] = None
+    label: Optional[str] = None
+    stage: Optional[str] = None
+    since: Optional[str] = None # YYYY-MM-DD, fetched on or after
+    until: Optional[str] = None # YYYY-MM-DD, fetched on or before
+
+    @classmethod
+    def from_args(cls, args, status: str = None) -> "ContentFilter":
+        values = {f.name: (args.get(f.name) or "").strip() or None for f in fields(cls)}
+        values["status"] = status or values["status"] or "all"
+        if values["stage"] and values["stage"].upper() not in ItemStage.__members__:
+            values["stage"] = None
+        return cls(**values)
+
+    def args(self) -> Dict[str, str]:
+        """Non-empty filters, for building page links."""
+        return {f.name: getattr(self, f.name) for f in fields(self) if getattr(self, f.name) and f.name != "status"}
+
+    def apply(self, query):
+        if self.status in STATUS_STAGES:
+            query = query.filter(Content.stage.in_(STATUS_STAGES[self.status]))
+        if self.source:
+            query = query.filter(Content.source == self.source)
+        if self.label:
+            query = query.filter(Content.relevance_label == self.label.upper())
+        if self.stage:
+            query = query.filter(Content.stage == ItemStage[self.stage.upper()])
+        since, until = parse_date(self.since), parse_date(self.until)
+        if since:
+            query = query.filter(Content.fetched_at >= since)
+        if until:
+            query = query.filter(Content.fetched_at < until + timedelta(days=1))
+        return query
+
+def page(query, content_filter: ContentFilter, after: Optional[str] = None,
+         limit: int = PAGE_SIZE) -> Tuple[List[Content], Optional[str]]:
+    """One page of `query` (a Content query) newest first, and the cursor for the next page (None on the last)."""
+    query = content_filter.apply(query)
+    cursor = parse_cursor(after)
+    if cursor:
+        query = query.filter(tuple_(Content.fetched_at, Content.id) < cursor)
+    rows = query.order_by(Content.fetched_at.desc(), Content.id.desc()).limit(limit + 1).all()
+    items, has_more = rows[:limit], len(rows) > limit
+    next_cursor = f"{items[-1].fetched_at.isoformat()}:{items[-1].id}" if has_more else None
+    return items, next_cursor
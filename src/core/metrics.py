@@ -0,0 +1,215 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Instruments are plain dicts keyed by label values behind a lock, so recording
+costs a dict update. `render()` produces the text format served at /metrics
+by the dashboard, and by `serve(port)` for processes without Flask
+(scheduler, workers).
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans a cached DB read up to a slow LLM completion
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names: Tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self.lock:
+            self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            values = list(self.values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in values]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labelvalues, value: float):
+        with self.lock:
+            self.values[labelvalues] = value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self.values: Dict[tuple, list] = {} # labels -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(labelvalues)
+            if counts is None:
+                counts = self.values[labelvalues] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, *labelvalues):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def samples(self):
+        with self.lock:
+            values = [(key, list(counts)) for key, counts in self.values.items()]
+        lines = []
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+REGISTRY = Registry()
+
+AGENT_RUNS = REGISTRY.register(Counter(
+    "signal_digest_agent_runs_total", "Agent runs by outcome.", ("agent", "outcome")))
+AGENT_DURATION = REGISTRY.register(Histogram(
+    "signal_digest_agent_duration_seconds", "Wall time of BaseAgent.run.", ("agent",)))
+ITEMS_PROCESSED = REGISTRY.register(Counter(
+    "signal_digest_items_processed_total", "Items processed, as returned by each agent run.", ("agent",)))
+CALL_LATENCY = REGISTRY.register(Histogram(
+    "signal_digest_call_duration_seconds", "External call latency (LLM, embeddings, Twilio).", ("kind", "operation")))
+CALL_ERRORS = REGISTRY.register(Counter(
+    "signal_digest_call_errors_total", "External calls that raised.", ("kind", "operation")))
+RETRIES = REGISTRY.register(Counter(
+    "signal_digest_retries_total", "Retry attempts scheduled after a failed call.", ("operation",)))
+TOKENS = REGISTRY.register(Counter(
+    "signal_digest_llm_tokens_total", "LLM tokens reported by the provider.", ("operation", "direction")))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "signal_digest_cache_lookups_total", "Cache lookups by result (hit, miss).", ("cache", "result")))
+DB_LATENCY = REGISTRY.register(Histogram(
+    "signal_digest_db_query_duration_seconds", "Database statement latency.", ("statement",)))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "signal_digest_stream_queue_depth", "Items waiting in a streaming stage's inbox.", ("stage",)))
+
+@contextmanager
+def track_call(kind: str, operation: str):
+    """Times an external call; counts it as an error if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        CALL_ERRORS.inc(kind, operation)
+        raise
+    finally:
+        CALL_LATENCY.observe(time.perf_counter() - start, kind, operation)
+
+def count_tokens(operation: str, usage):
+    """Records an OpenAI `usage` object (chat or embeddings) or a Gemini `usage_metadata`."""
+    if usage is None:
+        return
+    TOKENS.inc(operation, "in", amount=getattr(usage, "prompt_tokens", None) or getattr(usage, "prompt_token_count", 0) or 0)
+    TOKENS.inc(operation, "out", amount=getattr(usage, "completion_tokens", None) or getattr(usage, "candidates_token_count", 0) or 0)
+
+def count_retry(operation: str):
+    """tenacity `before_sleep` hook."""
+    return lambda retry_state: RETRIES.inc(operation)
+
+def llm_usage() -> Tuple[int, int, int]:
+    """
+    Process-wide (LLM + embedding calls, tokens in, tokens out) so far.
+    Callers diff two readings to attribute usage to a run.
+    """
+    with CALL_LATENCY.lock:
+        calls = sum(sum(counts[:-1]) for key, counts in CALL_LATENCY.values.items() if key[0] in ("llm", "embedding"))
+    with TOKENS.lock:
+        tokens_in = sum(v for key, v in TOKENS.values.items() if key[1] == "in")
+        tokens_out = sum(v for key, v in TOKENS.values.items() if key[1] == "out")
+    return int(calls), int(tokens_in), int(tokens_out)
+
+def instrument_engine(engine):
+    """Times every statement through SQLAlchemy cursor events."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["metrics_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("metrics_started", None)
+        if started is not None:
+            DB_LATENCY.observe(time.perf_counter() - started, statement.split(None, 1)[0].upper())
+
+def render() -> str:
+    return REGISTRY.render()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(port: int) -> ThreadingHTTPServer:
+    """Serves /metrics from a daemon thread (any path returns the metrics)."""
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
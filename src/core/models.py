@@ -1,14 +1,35 @@
 from datetime import datetime
 from typing import List, Optional, Any
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Float, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Float, Boolean, Enum, ForeignKey, Index, UniqueConstraint, text
+from sqlalchemy.orm import deferred, relationship
 from pydantic import BaseModel, Field, ConfigDict
 from .database import Base
+from .lifecycle import ItemStage
 
 # --- SQLAlchemy Models ---
 
+def pending_index(stage: ItemStage, *columns) -> Index:
+    """Partial index over the rows waiting at `stage`, in the order its agent takes them."""
+    where = text(f"stage = '{stage.name}'")
+    return Index(f"ix_content_pending_{stage.name.lower()}", *columns, sqlite_where=where, postgresql_where=where)
+
 class Content(Base):
     __tablename__ = "content"
+    __table_args__ = (
+        pending_index(ItemStage.NEW, "id"),
+        pending_index(ItemStage.RELEVANT, "id"),
+        pending_index(ItemStage.ENRICHED, "id"),
+        pending_index(ItemStage.PRIORITIZED, "priority_score", "id"),
+        pending_index(ItemStage.SYNTHESIZED, "id"),
+        pending_index(ItemStage.PASSED, "id"),
+        pending_index(ItemStage.QUEUED, "id"),
+        # List views (src/core/listing.py): newest first, per filter. The planner keeps the agents on the
+        # pending_index ones given ANALYZE statistics (retention.compact, and init_db for new databases)
+        Index("ix_content_fetched", "fetched_at", "id"),
+        Index("ix_content_source_fetched", "source", "fetched_at", "id"),
+        Index("ix_content_label_fetched", "relevance_label", "fetched_at", "id"),
+        Index("ix_content_stage_fetched", "stage", "fetched_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     source = Column(String, index=True) # arxiv, techcrunch, etc.
@@ -18,18 +39,18 @@ class Content(Base):
     published_at = Column(DateTime, index=True)
     fetched_at = Column(DateTime, default=datetime.utcnow)
     
-    # Raw Content
-    abstract_or_body = Column(Text)
-    authors = Column(JSON, default=list) # List of strings
+    # Raw Content. Heavy columns are deferred: load them with undefer_group("body") etc. where they're read.
+    abstract_or_body = deferred(Column(Text), group="body")
+    authors = deferred(Column(JSON, default=list), group="body") # List of strings
 
     # Enrichment
     topics = Column(JSON, default=list)
-    embedding_vector = Column(JSON, nullable=True) # Stored as list of floats
+    embedding = relationship("ContentEmbedding", uselist=False, cascade="all, delete-orphan")
     
     # Relevance
     relevance_label = Column(String, nullable=True)
     relevance_confidence = Column(Float, nullable=True)
-    relevance_reason = Column(Text, nullable=True)
+    relevance_reason = deferred(Column(Text, nullable=True), group="reasons")
     
     # Prioritization
     priority_score = Column(Float, default=0.0)
@@ -37,16 +58,77 @@ class Content(Base):
 
     # Synthesis
     summary_headline = Column(String, nullable=True)
-    summary_tldr = Column(Text, nullable=True)
-    summary_highlights = Column(JSON, default=list)
-    summary_why_matters = Column(Text, nullable=True)
+    summary_tldr = deferred(Column(Text, nullable=True), group="summary")
+    summary_highlights = deferred(Column(JSON, default=list), group="summary")
+    summary_why_matters = deferred(Column(Text, nullable=True), group="summary")
+    summary_parent_id = Column(Integer, ForeignKey("content.id"), nullable=True, index=True) # Cluster lead holding the shared summary
     
     # Validation
     validation_status = Column(String, default="PENDING") # PENDING, PASS, FAIL
+    validation_path = Column(String, nullable=True) # RULES, CRITIC, CRITIC_SKIPPED
+    validation_score = Column(Float, nullable=True) # Critic score (0-10)
+    validation_flag = Column(String, nullable=True) # OK, HALLUCINATION, HYPE, SPAM, FORMAT
+    validation_reason = deferred(Column(Text, nullable=True), group="reasons")
+    validation_hash = Column(String, nullable=True) # summary_hash() at validation time
     
-    # Delivery Status (Simple tracking for now)
+    # Delivery Status (PENDING, QUEUED once planned into the ledger, SENT once every recipient is done)
     delivery_status = Column(String, default="PENDING")
 
+    # Lifecycle stage (src/core/lifecycle.py); agents select their work by it
+    stage = Column(Enum(ItemStage, native_enum=False, length=16), nullable=False, default=ItemStage.NEW)
+
+    # Worker lease (src/worker.py): which process holds the item, for which stage, until when
+    lease_owner = Column(String, nullable=True)
+    lease_stage = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    lease_attempts = Column(Integer, nullable=False, default=0) # Claims since the last success; parked at WORKER_MAX_ATTEMPTS
+
+    @property
+    def embedding_vector(self) -> Optional[List[float]]:
+        return self.embedding.vector if self.embedding else None
+
+    @embedding_vector.setter
+    def embedding_vector(self, vector: Optional[List[float]]):
+        if vector is None:
+            self.embedding = None
+        elif self.embedding is None:
+            self.embedding = ContentEmbedding(vector=vector)
+        else:
+            self.embedding.vector = vector
+
+class ContentEmbedding(Base):
+    """
+    Embeddings live beside Content rather than in it: at ~30KB of JSON each
+    they would make every content row scan walk overflow pages.
+    """
+    __tablename__ = "content_embeddings"
+
+    content_id = Column(Integer, ForeignKey("content.id"), primary_key=True)
+    vector = Column(JSON, nullable=False) # List of floats
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True) # similarity.py reloads only rows changed since its last refresh
+
+class ArchivedContent(Base):
+    """
+    What stays in the hot database after retention archives an item: enough
+    to keep acquisition from fetching it again, plus where the full row went.
+    """
+    __tablename__ = "archived_content"
+
+    fingerprint = Column(String, primary_key=True) # retention.url_fingerprint(url)
+    canonical_url = Column(String)
+    partition = Column(String) # Archive file name under ARCHIVE_DIR
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+class StageCount(Base):
+    """
+    Items per lifecycle stage, maintained by triggers on content
+    (src/core/stats.py) so the dashboard never counts the table.
+    """
+    __tablename__ = "stage_counts"
+
+    stage = Column(String(16), primary_key=True) # ItemStage name
+    count = Column(Integer, nullable=False, default=0)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -56,6 +138,92 @@ class User(Base):
     topic_preferences = Column(JSON, default=list)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+class Digest(Base):
+    __tablename__ = "digests"
+
+    id = Column(String, primary_key=True) # sha1 of the sorted item ids
+    item_ids = Column(JSON, default=list)
+    parts = Column(JSON, default=list) # Rendered message bodies, in send order
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class Delivery(Base):
+    """
+    Delivery ledger: one row per (user, digest, message part).
+    """
+    __tablename__ = "deliveries"
+    __table_args__ = (
+        UniqueConstraint("user_id", "digest_id", "part", name="uq_deliveries_user_digest_part"),
+        Index("ix_deliveries_status_id", "status", "id"), # Pending-work scan
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    digest_id = Column(String, ForeignKey("digests.id"), nullable=False, index=True)
+    part = Column(Integer, default=0)
+    status = Column(String, default="PENDING") # PENDING, SENDING, SENT, FAILED, UNKNOWN, CANCELLED
+    message_sid = Column(String, nullable=True, index=True)
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+    # Twilio status callbacks (queued, sent, delivered, read, failed, undelivered)
+    provider_status = Column(String, nullable=True)
+    provider_error_code = Column(String, nullable=True)
+    provider_updated_at = Column(DateTime, nullable=True)
+
+class PipelineRun(Base):
+    __tablename__ = "pipeline_runs"
+
+    id = Column(Integer, primary_key=True)
+    mode = Column(String) # batch, streaming
+    status = Column(String, default="RUNNING") # RUNNING, OK, ERROR
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime, default=datetime.utcnow, index=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    stages = relationship("StageRun", back_populates="pipeline_run", order_by="StageRun.id")
+
+class StageRun(Base):
+    """
+    One agent run (BaseAgent.run) or one streaming stage. pipeline_run_id is
+    empty for agents run on their own.
+    """
+    __tablename__ = "stage_runs"
+    __table_args__ = (
+        Index("ix_stage_runs_stage_started", "stage", "started_at"), # Per-stage trends
+    )
+
+    id = Column(Integer, primary_key=True)
+    pipeline_run_id = Column(Integer, ForeignKey("pipeline_runs.id"), nullable=True, index=True)
+    stage = Column(String)
+    status = Column(String) # OK, ERROR
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    duration = Column(Float) # Seconds
+    items_in = Column(Integer, nullable=True) # Items the stage picked up, where the agent reports it
+    items_out = Column(Integer, nullable=True) # Items processed (the agent's return value)
+    errors = Column(Integer, default=0) # Error log records during the run
+    # LLM and embedding usage; empty for streaming stages, which run concurrently
+    llm_calls = Column(Integer, nullable=True)
+    llm_tokens_in = Column(Integer, nullable=True)
+    llm_tokens_out = Column(Integer, nullable=True)
+
+    pipeline_run = relationship("PipelineRun", back_populates="stages")
+
+class RunLock(Base):
+    """
+    Named single-flight lock (src/core/run_lock.py). The row stays after
+    release with owner cleared.
+    """
+    __tablename__ = "run_locks"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=True) # host:pid/token of the holder
+    acquired_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True) # Older than RUN_LOCK_STALE_SECONDS = holder presumed dead
+
 # --- Pydantic Models for Data Transfer ---
 
 class ContentBase(BaseModel):
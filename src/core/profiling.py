@@ -0,0 +1,130 @@
+"""
+Opt-in profiling around BaseAgent._execute, selected with PROFILE_MODE:
+
+    cprofile     deterministic profile -> <agent>-<ts>-<pid>.pstats (+ .txt top functions)
+    tracemalloc  allocation diff over the run -> <agent>-<ts>-<pid>.alloc.txt
+    sample       periodic stack sampler -> <agent>-<ts>-<pid>.collapsed (flamegraph.pl / speedscope)
+
+Artifacts go to LOGS_DIR/profiles. PROFILE_AGENTS limits profiling to some agents.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from .config import Config
+from .logger import setup_logger
+
+logger = setup_logger("profiling")
+
+PROFILE_DIR = Config.LOGS_DIR / "profiles"
+TOP_N = 40
+
+def enabled_for(agent_name: str) -> bool:
+    if Config.PROFILE_MODE in ("", "off"):
+        return False
+    agents = [a.strip() for a in Config.PROFILE_AGENTS if a.strip()]
+    return not agents or agent_name in agents
+
+def profile(agent_name: str):
+    """Context manager for one agent run; a no-op unless profiling is on for it."""
+    if not enabled_for(agent_name):
+        return nullcontext()
+    mode = Config.PROFILE_MODE
+    if mode not in PROFILERS:
+        logger.warning(f"Unknown PROFILE_MODE '{mode}'; expected one of {', '.join(PROFILERS)}")
+        return nullcontext()
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    base = PROFILE_DIR / f"{agent_name}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+    return PROFILERS[mode](base)
+
+@contextmanager
+def profile_cprofile(base: Path):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(f"{base}.pstats")
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(TOP_N)
+        Path(f"{base}.txt").write_text(text.getvalue())
+        logger.info(f"cProfile written to {base}.pstats")
+
+@contextmanager
+def profile_tracemalloc(base: Path):
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(Config.PROFILE_TRACEMALLOC_FRAMES)
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started:
+            tracemalloc.stop()
+        lines = [f"Traced memory: current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB", "",
+                 f"Top {TOP_N} allocation sites by growth during the run:"]
+        lines += [str(stat) for stat in after.compare_to(before, "lineno")[:TOP_N]]
+        lines += ["", f"Top {TOP_N} live allocations at the end of the run:"]
+        lines += [str(stat) for stat in after.statistics("lineno")[:TOP_N]]
+        Path(f"{base}.alloc.txt").write_text("\n".join(lines) + "\n")
+        logger.info(f"tracemalloc report written to {base}.alloc.txt")
+
+class StackSampler:
+    """
+    Samples every thread's stack each `interval` seconds from a daemon
+    thread. Only the sampler pays the cost; the profiled code runs untouched
+    apart from GIL contention.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks = Counter()
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+
+    def run(self):
+        names = {}
+        while not self.stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.thread.ident:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+@contextmanager
+def profile_sample(base: Path):
+    sampler = StackSampler(Config.PROFILE_SAMPLE_INTERVAL)
+    sampler.thread.start()
+    try:
+        yield
+    finally:
+        sampler.stop.set()
+        sampler.thread.join()
+        Path(f"{base}.collapsed").write_text(sampler.collapsed())
+        logger.info(f"{sum(sampler.stacks.values())} stack samples written to {base}.collapsed")
+
+PROFILERS = {
+    "cprofile": profile_cprofile,
+    "tracemalloc": profile_tracemalloc,
+    "sample": profile_sample,
+}
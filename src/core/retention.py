@@ -0,0 +1,193 @@
+"""
+Retention: finished items (delivered, merged into a delivered story,
+rejected, irrelevant, or prioritized but never picked for a digest) older
+than RETENTION_DAYS move out of the hot database into gzipped JSON Lines
+files, one per fetch month:
+
+    ARCHIVE_DIR/content-2026-01.jsonl.gz   one JSON object per item, embedding included
+
+Only a fingerprint of the canonical URL stays behind (archived_content), so
+acquisition still skips items it has seen, and the static export's item
+pages are removed. `compact` then returns the freed space and refreshes
+planner statistics.
+"""
+import enum
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+from typing import Dict, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from sqlalchemy import delete, exists, select, text
+from sqlalchemy.orm import aliased
+from .config import Config
+from .database import SessionLocal, engine
+from .lifecycle import ItemStage
+from .logger import setup_logger
+from .models import ArchivedContent, Content, ContentEmbedding
+
+logger = setup_logger("retention")
+
+# PRIORITIZED items this old lost every daily top-N pick
+ARCHIVABLE_STAGES = (ItemStage.DELIVERED, ItemStage.MERGED, ItemStage.REJECTED, ItemStage.IRRELEVANT, ItemStage.PRIORITIZED)
+# A merged item goes with its story: once the lead is one of these, or archived itself
+FINISHED_LEAD_STAGES = (ItemStage.DELIVERED, ItemStage.REJECTED)
+TRACKING_PARAMS = ("utm_", "ref", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+def canonical_url(url: str) -> str:
+    """Lowercased scheme and host, no fragment, tracking parameters or trailing slash; query sorted."""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+def url_fingerprint(url: str) -> str:
+    return hashlib.sha1(canonical_url(url).encode("utf-8")).hexdigest()
+
+def is_archived(db, url: str) -> bool:
+    return db.get(ArchivedContent, url_fingerprint(url)) is not None
+
+def partition_for(row: dict) -> str:
+    when = row.get("fetched_at") or row.get("published_at") or datetime.utcnow()
+    return f"content-{when:%Y-%m}.jsonl.gz"
+
+def to_json(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.name
+    return value
+
+def write_partition(name: str, rows: List[dict]):
+    """
+    Appends a gzip member to the month's file and syncs it before the rows
+    are deleted. A crash in between leaves duplicates in the archive
+    (same id), never a lost item.
+    """
+    Config.ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    path = Config.ARCHIVE_DIR / name
+    payload = "".join(json.dumps({k: to_json(v) for k, v in row.items()}) + "\n" for row in rows)
+    with open(path, "ab") as f:
+        f.write(gzip.compress(payload.encode("utf-8")))
+        f.flush()
+        os.fsync(f.fileno())
+
+def remove_site_pages(ids: List[int]) -> int:
+    """Deletes the static export's pages for `ids` (item/<id>/ and item/<id>.html). Returns pages removed."""
+    pages = Config.STATIC_SITE_DIR / "item"
+    if not pages.is_dir():
+        return 0
+    removed = 0
+    for item_id in ids:
+        page_dir, page = pages / str(item_id), pages / f"{item_id}.html"
+        if page_dir.is_dir():
+            shutil.rmtree(page_dir)
+            removed += 1
+        if page.is_file():
+            page.unlink()
+            removed += 1
+    return removed
+
+def archive_old_content(days: int = None, batch_size: int = None) -> Dict[str, int]:
+    """
+    Archives eligible items in id order, `batch_size` per transaction.
+    A merged item waits for its lead to be delivered (or rejected), and a
+    cluster lead waits until none of its members are still hot.
+    Returns items archived per partition.
+    """
+    days = Config.RETENTION_DAYS if days is None else days
+    batch_size = batch_size or Config.RETENTION_BATCH_SIZE
+    if days <= 0:
+        return {}
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    table = Content.__table__
+    lead = aliased(Content)
+    archived: Dict[str, int] = {}
+    pages_removed = 0
+    last_id = 0
+
+    while True:
+        with SessionLocal() as db:
+            ids = list(db.execute(
+                select(Content.id).where(
+                    Content.id > last_id,
+                    Content.stage.in_(ARCHIVABLE_STAGES),
+                    Content.fetched_at < cutoff,
+                    ~exists().where(lead.id == Content.summary_parent_id, lead.stage.notin_(FINISHED_LEAD_STAGES))
+                ).order_by(Content.id).limit(batch_size)
+            ).scalars())
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            held = set(db.execute(
+                select(Content.summary_parent_id).where(
+                    Content.summary_parent_id.in_(ids), Content.id.notin_(ids)
+                ).distinct()
+            ).scalars())
+            ids = [i for i in ids if i not in held]
+            if not ids:
+                continue
+
+            rows = [dict(row._mapping) for row in db.execute(select(table).where(table.c.id.in_(ids)))]
+            vectors = dict(db.execute(
+                select(ContentEmbedding.content_id, ContentEmbedding.vector).where(ContentEmbedding.content_id.in_(ids))
+            ).all())
+            partitions: Dict[str, List[dict]] = {}
+            for row in rows:
+                row["embedding_vector"] = vectors.get(row["id"])
+                partitions.setdefault(partition_for(row), []).append(row)
+
+            for name, partition_rows in partitions.items():
+                write_partition(name, partition_rows)
+
+            keys = {}
+            for name, partition_rows in partitions.items():
+                for row in partition_rows:
+                    keys[url_fingerprint(row["url"])] = (canonical_url(row["url"]), name)
+            known = set(db.execute(
+                select(ArchivedContent.fingerprint).where(ArchivedContent.fingerprint.in_(list(keys)))
+            ).scalars())
+            db.add_all(
+                ArchivedContent(fingerprint=fp, canonical_url=url, partition=name)
+                for fp, (url, name) in keys.items() if fp not in known
+            )
+            db.execute(delete(ContentEmbedding).where(ContentEmbedding.content_id.in_(ids)))
+            db.execute(delete(Content).where(Content.id.in_(ids)), execution_options={"synchronize_session": False})
+            db.commit()
+            pages_removed += remove_site_pages(ids)
+
+            for name, partition_rows in partitions.items():
+                archived[name] = archived.get(name, 0) + len(partition_rows)
+
+    if archived:
+        logger.info(f"Archived {sum(archived.values())} items older than {days} days: "
+                    + ", ".join(f"{name} ({count})" for name, count in sorted(archived.items()))
+                    + f"; removed {pages_removed} static pages")
+    return archived
+
+def compact():
+    """
+    SQLite: ANALYZE, plus VACUUM once VACUUM_MIN_FREE_RATIO of the pages
+    are free (it rewrites the whole file, so not every night).
+    Postgres: VACUUM ANALYZE, which needs to run outside a transaction.
+    """
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            pages = conn.exec_driver_sql("PRAGMA page_count").scalar() or 0
+            free = conn.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+            conn.exec_driver_sql("ANALYZE")
+            if pages and free / pages >= Config.VACUUM_MIN_FREE_RATIO:
+                logger.info(f"VACUUM: {free} of {pages} pages free")
+                conn.exec_driver_sql("VACUUM")
+                conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)") # Shrinks the WAL file too; no-op otherwise
+            conn.commit()
+    elif engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM (ANALYZE)"))
+    logger.info("Database compaction complete.")
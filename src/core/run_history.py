@@ -0,0 +1,151 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from .database import SessionLocal
+from .logger import setup_logger
+from .models import PipelineRun, StageRun
+from . import metrics
+
+logger = setup_logger("run_history")
+
+# Set by `pipeline_run` so agent runs inside it are linked to the pipeline row
+current_pipeline_run: ContextVar[Optional[int]] = ContextVar("current_pipeline_run", default=None)
+
+class ErrorCounter(logging.Handler):
+    """Counts ERROR records logged while attached to an agent's logger."""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+@contextmanager
+def pipeline_run(mode: str):
+    """
+    Records one orchestrator run in pipeline_runs. History writes never fail
+    the pipeline: if the row can't be written, the run proceeds unrecorded.
+    """
+    run_id = None
+    try:
+        with SessionLocal() as db:
+            run = PipelineRun(mode=mode, started_at=datetime.utcnow())
+            db.add(run)
+            db.commit()
+            run_id = run.id
+    except Exception as e:
+        logger.error(f"Could not record pipeline run: {e}")
+
+    token = current_pipeline_run.set(run_id)
+    status, error = "OK", None
+    try:
+        yield run_id
+    except Exception as e:
+        status, error = "ERROR", str(e)
+        raise
+    finally:
+        current_pipeline_run.reset(token)
+        if run_id is not None:
+            try:
+                with SessionLocal() as db:
+                    db.query(PipelineRun).filter(PipelineRun.id == run_id).update(
+                        {"status": status, "error": error, "finished_at": datetime.utcnow()}
+                    )
+                    db.commit()
+            except Exception as e:
+                logger.error(f"Could not finish pipeline run {run_id}: {e}")
+
+class StageRecorder:
+    """
+    Captures one stage's window: wall time, error log records and the LLM
+    usage delta. LLM counters are process-wide, so usage from other threads
+    running at the same time is attributed here too.
+    """
+
+    def __init__(self, stage: str, stage_logger: Optional[logging.Logger] = None):
+        self.stage = stage
+        self.stage_logger = stage_logger
+        self.errors = ErrorCounter()
+
+    def __enter__(self):
+        self.started_at = datetime.utcnow()
+        self.usage = metrics.llm_usage()
+        if self.stage_logger:
+            self.stage_logger.addHandler(self.errors)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.stage_logger:
+            self.stage_logger.removeHandler(self.errors)
+        self.finished_at = datetime.utcnow()
+        self.usage = tuple(after - before for after, before in zip(metrics.llm_usage(), self.usage))
+        self.error = str(exc) if exc else None
+        return False
+
+    def save(self, items_in: Optional[int] = None, items_out: Optional[int] = None):
+        calls, tokens_in, tokens_out = self.usage
+        record_stage_run(
+            self.stage, self.started_at, self.finished_at,
+            status="ERROR" if self.error else "OK",
+            error=self.error,
+            items_in=items_in,
+            items_out=items_out,
+            errors=self.errors.count + (1 if self.error else 0),
+            llm_calls=calls,
+            llm_tokens_in=tokens_in,
+            llm_tokens_out=tokens_out,
+        )
+
+def record_stage_run(stage: str, started_at: datetime, finished_at: datetime, **fields):
+    """Writes a stage_runs row linked to the current pipeline run, if any."""
+    try:
+        with SessionLocal() as db:
+            db.add(StageRun(
+                pipeline_run_id=current_pipeline_run.get(),
+                stage=stage,
+                started_at=started_at,
+                finished_at=finished_at,
+                duration=(finished_at - started_at).total_seconds(),
+                **fields
+            ))
+            db.commit()
+    except Exception as e:
+        logger.error(f"Could not record {stage} run: {e}")
+
+@dataclass
+class StageTotals:
+    """
+    A stage's StageRun rows within one pipeline run, summed: a processing
+    pass runs each agent once per loop. Counts stay None if no row had them.
+    """
+    passes: int = 0
+    status: str = "OK"
+    duration: float = 0.0
+    errors: int = 0
+    items_in: Optional[int] = None
+    items_out: Optional[int] = None
+    llm_calls: Optional[int] = None
+    llm_tokens_in: Optional[int] = None
+    llm_tokens_out: Optional[int] = None
+
+    def add(self, row: StageRun):
+        self.passes += 1
+        if row.status == "ERROR":
+            self.status = "ERROR"
+        self.duration += row.duration or 0.0
+        self.errors += row.errors or 0
+        for name in ("items_in", "items_out", "llm_calls", "llm_tokens_in", "llm_tokens_out"):
+            value = getattr(row, name)
+            if value is not None:
+                setattr(self, name, (getattr(self, name) or 0) + value)
+
+def stage_totals(rows: Iterable[StageRun]) -> Dict[int, Dict[str, StageTotals]]:
+    """{pipeline_run_id: {stage: totals}}, stages in first-seen order."""
+    totals = {}
+    for row in rows:
+        totals.setdefault(row.pipeline_run_id, {}).setdefault(row.stage, StageTotals()).add(row)
+    return totals
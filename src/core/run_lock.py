@@ -0,0 +1,119 @@
+"""
+DB-backed single-flight lock. The holder heartbeats the row; a holder that
+stops (crash, kill -9) loses the lock once its heartbeat is stale.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from .config import Config
+from .database import SessionLocal
+from .logger import setup_logger
+from .models import RunLock
+
+logger = setup_logger("run_lock")
+
+class RunLockHeld(Exception):
+    def __init__(self, name: str, owner: Optional[str]):
+        super().__init__(f"'{name}' is held by {owner or 'another process'}")
+        self.name = name
+        self.owner = owner
+
+def try_acquire(name: str, owner: str, stale_after: float) -> bool:
+    """
+    One atomic attempt: claim the row if it is free or its heartbeat is stale,
+    creating it on first use. Works the same on SQLite and Postgres.
+    """
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        result = db.execute(
+            update(RunLock).where(
+                RunLock.name == name,
+                or_(RunLock.owner == None, RunLock.heartbeat_at < now - timedelta(seconds=stale_after))
+            ).values(owner=owner, acquired_at=now, heartbeat_at=now),
+            execution_options={"synchronize_session": False}
+        )
+        if result.rowcount == 1:
+            db.commit()
+            return True
+        try:
+            db.add(RunLock(name=name, owner=owner, acquired_at=now, heartbeat_at=now))
+            db.commit()
+            return True
+        except IntegrityError:
+            # Row exists and is held
+            db.rollback()
+            return False
+
+def holder(name: str) -> Optional[RunLock]:
+    with SessionLocal() as db:
+        lock = db.get(RunLock, name)
+        if lock is not None:
+            db.expunge(lock)
+        return lock
+
+class Heartbeat:
+    """Refreshes heartbeat_at while the lock is held; notices if it was taken over."""
+
+    def __init__(self, name: str, owner: str, interval: float):
+        self.name = name
+        self.owner = owner
+        self.interval = interval
+        self.stop = threading.Event()
+        self.lost = False
+        self.thread = threading.Thread(target=self.run, name=f"run-lock-{name}", daemon=True)
+
+    def run(self):
+        while not self.stop.wait(self.interval):
+            try:
+                with SessionLocal() as db:
+                    result = db.execute(
+                        update(RunLock).where(RunLock.name == self.name, RunLock.owner == self.owner)
+                        .values(heartbeat_at=datetime.utcnow()),
+                        execution_options={"synchronize_session": False}
+                    )
+                    db.commit()
+                if result.rowcount == 0:
+                    self.lost = True
+                    logger.error(f"Run lock '{self.name}' was taken over from {self.owner}; stopping heartbeat.")
+                    return
+            except Exception as e:
+                logger.warning(f"Run lock '{self.name}' heartbeat failed: {e}")
+
+@contextmanager
+def run_lock(name: str, wait: float = 0, stale_after: float = None, heartbeat: float = None):
+    """
+    Holds the named lock for the duration of the block, across processes and
+    hosts sharing the database. Waits up to `wait` seconds, then raises
+    RunLockHeld. A holder that stops heartbeating for `stale_after` seconds
+    (crashed, killed) is taken over.
+    """
+    stale_after = Config.RUN_LOCK_STALE_SECONDS if stale_after is None else stale_after
+    heartbeat = Config.RUN_LOCK_HEARTBEAT_SECONDS if heartbeat is None else heartbeat
+    owner = f"{socket.gethostname()}:{os.getpid()}/{uuid.uuid4().hex[:8]}"
+
+    deadline = time.monotonic() + wait
+    while not try_acquire(name, owner, stale_after):
+        if time.monotonic() >= deadline:
+            current = holder(name)
+            raise RunLockHeld(name, current.owner if current else None)
+        time.sleep(min(5.0, max(0.1, deadline - time.monotonic())))
+
+    beat = Heartbeat(name, owner, heartbeat)
+    beat.thread.start()
+    try:
+        yield owner
+    finally:
+        beat.stop.set()
+        with SessionLocal() as db:
+            db.execute(
+                update(RunLock).where(RunLock.name == name, RunLock.owner == owner).values(owner=None),
+                execution_options={"synchronize_session": False}
+            )
+            db.commit()
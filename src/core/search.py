@@ -0,0 +1,200 @@
+"""
+Full-text search over title, body, summary and topics.
+
+SQLite: an external-content FTS5 table over the `content_search` view, kept
+in sync by triggers on content, so every write path (ORM, bulk updates,
+retention deletes) updates the index. Ranked with BM25, title and summary
+weighted above the body.
+
+Postgres: a generated, weighted tsvector column with a GIN index, ranked
+with ts_rank_cd (Postgres has no BM25).
+
+Results are keyset-paginated on (score, id): page N costs the same as page 1.
+"""
+import html
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import load_only
+from .models import Content
+
+PAGE_SIZE = 20
+SNIPPET_TOKENS = 24
+# BM25 column weights: title, body, summary, topics
+BM25_WEIGHTS = (10.0, 1.0, 5.0, 2.0)
+# Highlight markers that can't occur in stored text; swapped for <mark> after escaping
+MARK_START, MARK_END = "\x02", "\x03"
+
+SUMMARY_SQL = ("coalesce({p}summary_headline, '') || ' ' || coalesce({p}summary_tldr, '') || ' ' || "
+               "coalesce({highlights}, '') || ' ' || coalesce({p}summary_why_matters, '')")
+INDEXED_COLUMNS = "title, abstract_or_body, summary_headline, summary_tldr, summary_highlights, summary_why_matters, topics"
+
+def _sqlite_words(column: str) -> str:
+    """
+    A JSON list of strings as its space-separated values, so snippets show
+    words rather than JSON. String functions only: FTS5 can't rebuild from a
+    view that calls json_each.
+    """
+    joined = f"""replace(replace({column}, '", "', ' '), '","', ' ')"""
+    return f"""replace(replace(replace({joined}, '[', ''), ']', ''), '"', '')"""
+
+def _sqlite_summary(prefix: str) -> str:
+    return SUMMARY_SQL.format(p=prefix, highlights=_sqlite_words(f"{prefix}summary_highlights"))
+
+def _sqlite_values(prefix: str) -> str:
+    return f"{prefix}id, {prefix}title, {prefix}abstract_or_body, {_sqlite_summary(prefix)}, {_sqlite_words(f'{prefix}topics')}"
+
+# Dropped and recreated when the view's definition changed; the FTS table is then rebuilt from it
+SQLITE_OUTDATED = [
+    "DROP TRIGGER IF EXISTS content_fts_insert",
+    "DROP TRIGGER IF EXISTS content_fts_delete",
+    "DROP TRIGGER IF EXISTS content_fts_update",
+    "DROP VIEW IF EXISTS content_search",
+]
+
+SQLITE_DDL = [
+    f"""CREATE VIEW IF NOT EXISTS content_search AS
+        SELECT id, title, abstract_or_body AS body, {_sqlite_summary('')} AS summary, {_sqlite_words('topics')} AS topics
+        FROM content""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS content_fts USING fts5(
+        title, body, summary, topics, content='content_search', content_rowid='id', tokenize='porter unicode61')""",
+    f"""CREATE TRIGGER IF NOT EXISTS content_fts_insert AFTER INSERT ON content BEGIN
+        INSERT INTO content_fts(rowid, title, body, summary, topics) VALUES ({_sqlite_values('new.')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS content_fts_delete AFTER DELETE ON content BEGIN
+        INSERT INTO content_fts(content_fts, rowid, title, body, summary, topics) VALUES ('delete', {_sqlite_values('old.')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS content_fts_update AFTER UPDATE OF {INDEXED_COLUMNS} ON content BEGIN
+        INSERT INTO content_fts(content_fts, rowid, title, body, summary, topics) VALUES ('delete', {_sqlite_values('old.')});
+        INSERT INTO content_fts(rowid, title, body, summary, topics) VALUES ({_sqlite_values('new.')});
+    END""",
+    f"INSERT INTO content_fts(content_fts, rank) VALUES ('rank', 'bm25({', '.join(map(str, BM25_WEIGHTS))})')",
+]
+
+POSTGRES_DDL = [
+    f"""ALTER TABLE content ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', {SUMMARY_SQL.format(p='', highlights='summary_highlights::text')}), 'B') ||
+        setweight(to_tsvector('english', coalesce(topics::text, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(abstract_or_body, '')), 'D')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_content_search_vector ON content USING GIN (search_vector)",
+]
+
+def ensure_search_index(engine: Engine):
+    """
+    Creates the index on first run, indexing existing rows, and rebuilds it
+    if it was created by an earlier version. Called from init_db.
+    """
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            view = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'content_search'").scalar()
+            if view is None or _sqlite_words("topics") not in view:
+                for statement in SQLITE_OUTDATED + SQLITE_DDL:
+                    conn.exec_driver_sql(statement)
+                conn.exec_driver_sql("INSERT INTO content_fts(content_fts) VALUES ('rebuild')")
+        elif engine.dialect.name == "postgresql":
+            for statement in POSTGRES_DDL:
+                conn.exec_driver_sql(statement)
+
+def fts5_query(q: str) -> str:
+    """
+    User input as a safe FTS5 expression: "quoted phrases" stay phrases,
+    every other word is quoted (so operators and punctuation can't break the
+    query) and the last word matches as a prefix, for search-as-you-type.
+    """
+    terms = re.findall(r'"[^"]+"|[^\s"]+', q)
+    parts = []
+    for n, term in enumerate(terms):
+        phrase = term.strip('"').replace('"', '""')
+        if not phrase.strip():
+            continue
+        prefix = "*" if n == len(terms) - 1 and not term.startswith('"') else ""
+        parts.append(f'"{phrase}"{prefix}')
+    return " ".join(parts)
+
+def highlight(snippet: Optional[str]) -> str:
+    """Escapes the snippet and turns the markers into <mark> tags."""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+def parse_cursor(after: Optional[str]) -> Optional[Tuple[float, int]]:
+    if not after:
+        return None
+    try:
+        score, item_id = after.rsplit(":", 1)
+        return float(score), int(item_id)
+    except ValueError:
+        return None
+
+@dataclass
+class SearchHit:
+    id: int
+    title: str
+    url: str
+    source: str
+    published_at: object
+    stage: str
+    score: float
+    snippet: str # HTML, highlighted
+
+def search(db, q: str, after: Optional[str] = None, limit: int = PAGE_SIZE) -> Tuple[List[SearchHit], Optional[str]]:
+    """
+    One page of hits, best first, and the cursor for the next page (None on
+    the last). Scores are "lower is better" on both backends. Snippets are
+    built only for the page, not for every match.
+    """
+    cursor = parse_cursor(after)
+    dialect = db.get_bind().dialect.name
+    params = {"limit": limit + 1}
+    keyset = ""
+    if cursor:
+        params.update(score=cursor[0], after_id=cursor[1])
+        keyset = "AND (score > :score OR (score = :score AND id > :after_id))"
+
+    if dialect == "sqlite":
+        params["q"] = fts5_query(q)
+        if not params["q"]:
+            return [], None
+        ranked = f"""
+            SELECT * FROM (
+                SELECT rowid AS id, rank AS score FROM content_fts WHERE content_fts MATCH :q
+            ) WHERE 1 = 1 {keyset} ORDER BY score, id LIMIT :limit"""
+        snippets = f"""
+            SELECT rowid, snippet(content_fts, -1, '{MARK_START}', '{MARK_END}', '…', {SNIPPET_TOKENS})
+            FROM content_fts WHERE content_fts MATCH :q AND rowid IN :ids"""
+    elif dialect == "postgresql":
+        params["q"] = q
+        ranked = f"""
+            SELECT * FROM (
+                SELECT c.id, -ts_rank_cd(c.search_vector, query) AS score
+                FROM content c, websearch_to_tsquery('english', :q) AS query
+                WHERE c.search_vector @@ query
+            ) hits WHERE 1 = 1 {keyset} ORDER BY score, id LIMIT :limit"""
+        snippets = f"""
+            SELECT c.id, ts_headline('english', coalesce(c.summary_tldr, c.abstract_or_body, c.title), websearch_to_tsquery('english', :q),
+                                     'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SNIPPET_TOKENS}, MinWords=8')
+            FROM content c WHERE c.id IN :ids"""
+    else:
+        raise NotImplementedError(f"Search is not supported on {dialect}")
+
+    rows = db.execute(text(ranked), params).all()
+    page, has_more = rows[:limit], len(rows) > limit
+    if not page:
+        return [], None
+    ids = [row.id for row in page]
+    snippet_params = {"ids": ids, "q": params["q"]}
+    marked = dict(db.execute(text(snippets).bindparams(bindparam("ids", expanding=True)), snippet_params).all())
+    items = {c.id: c for c in db.query(Content).options(load_only(
+        Content.title, Content.url, Content.source, Content.published_at, Content.stage
+    )).filter(Content.id.in_(ids))}
+
+    hits = [
+        SearchHit(row.id, items[row.id].title, items[row.id].url, items[row.id].source, items[row.id].published_at,
+                  items[row.id].stage.name, row.score, highlight(marked.get(row.id)))
+        for row in page if row.id in items
+    ]
+    next_cursor = f"{page[-1].score!r}:{page[-1].id}" if has_more else None
+    return hits, next_cursor
@@ -0,0 +1,163 @@
+"""
+Related items: nearest neighbours by cosine similarity over the stored
+embeddings.
+
+Each process keeps every embedding in one L2-normalised float32 matrix, so a
+lookup is a single matrix-vector product instead of decoding JSON per row.
+The matrix is shared by all requests and refreshed at most every
+SIMILARITY_REFRESH_SECONDS: only embeddings whose updated_at moved since the
+last refresh are read again. A full reload happens only when the row count
+stops matching, i.e. retention archived items or rows arrived without a
+timestamp.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import load_only
+from .config import Config
+from .logger import setup_logger
+from .models import Content, ContentEmbedding
+
+logger = setup_logger("similarity")
+
+BATCH_SIZE = 2000
+# Re-read a little before the newest timestamp seen: a transaction that stamped
+# its rows earlier can commit after the last refresh
+REFRESH_OVERLAP = timedelta(minutes=2)
+RELATED_COLUMNS = load_only(
+    Content.title, Content.url, Content.source, Content.published_at, Content.stage, Content.summary_headline
+)
+
+def embedding_rows(db, since: Optional[datetime] = None, ids: List[int] = None) -> Iterator[Tuple[int, list, Optional[datetime]]]:
+    """(content_id, vector, updated_at) in content_id order, BATCH_SIZE per query."""
+    if ids is not None:
+        for start in range(0, len(ids), BATCH_SIZE):
+            yield from db.execute(
+                select(ContentEmbedding.content_id, ContentEmbedding.vector, ContentEmbedding.updated_at)
+                .where(ContentEmbedding.content_id.in_(ids[start:start + BATCH_SIZE]))
+            ).all()
+        return
+    last_id = 0
+    while True:
+        query = select(ContentEmbedding.content_id, ContentEmbedding.vector, ContentEmbedding.updated_at).where(
+            ContentEmbedding.content_id > last_id
+        )
+        if since is not None:
+            query = query.where(ContentEmbedding.updated_at > since)
+        rows = db.execute(query.order_by(ContentEmbedding.content_id).limit(BATCH_SIZE)).all()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1].content_id
+
+class EmbeddingIndex:
+    """In-memory vectors for one process. Thread-safe; lookups never wait for a full reload."""
+
+    def __init__(self):
+        self._lock = threading.Lock() # Guards the arrays below
+        self._refresh_lock = threading.Lock() # One refresh at a time
+        self._matrix = np.zeros((0, 0), dtype=np.float32) # Grows by doubling; rows past _size are unused
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._size = 0
+        self._rows: Dict[int, int] = {} # content_id -> matrix row
+        self._stamps: Dict[int, Optional[datetime]] = {} # content_id -> updated_at as loaded
+        self._skipped: Set[int] = set() # Rows that can't be indexed (wrong dimension, zero vector)
+        self._newest: Optional[datetime] = None
+        self._loaded = False
+        self._checked_at = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _add(self, content_id: int, vector: list, updated_at: Optional[datetime]):
+        self._stamps[content_id] = updated_at
+        if updated_at and (self._newest is None or updated_at > self._newest):
+            self._newest = updated_at
+        v = np.asarray(vector, dtype=np.float32)
+        if not self._matrix.shape[1] and not self._size:
+            self._matrix = np.zeros((1024, len(v)), dtype=np.float32)
+            self._ids = np.zeros(1024, dtype=np.int64)
+        norm = float(np.linalg.norm(v))
+        if v.ndim != 1 or len(v) != self._matrix.shape[1] or not norm:
+            # Mixed dimensions happen when the embedding model changes; the old rows can't be compared
+            self._skipped.add(content_id)
+            return
+        self._skipped.discard(content_id)
+        row = self._rows.get(content_id)
+        if row is None:
+            if self._size == len(self._ids):
+                self._matrix = np.concatenate([self._matrix, np.zeros_like(self._matrix)])
+                self._ids = np.concatenate([self._ids, np.zeros_like(self._ids)])
+            row = self._rows[content_id] = self._size
+            self._ids[row] = content_id
+            self._size += 1
+        self._matrix[row] = v / norm
+
+    def refresh(self, db, force: bool = False):
+        """Picks up changed embeddings. Cheap when nothing changed: one indexed range query and a count."""
+        if not force and self._loaded and time.monotonic() - self._checked_at < Config.SIMILARITY_REFRESH_SECONDS:
+            return
+        # The first load makes everyone wait; later refreshes are left to whichever request started one
+        if not self._refresh_lock.acquire(blocking=not self._loaded):
+            return
+        try:
+            if self._loaded:
+                since = self._newest - REFRESH_OVERLAP if self._newest else None
+                changed = []
+                if since:
+                    # Timestamps first: rows in the overlap that were already loaded don't need their vectors again
+                    stamps = db.execute(select(ContentEmbedding.content_id, ContentEmbedding.updated_at).where(
+                        ContentEmbedding.updated_at > since
+                    )).all()
+                    stale = [content_id for content_id, updated_at in stamps if self._stamps.get(content_id) != updated_at]
+                    changed = list(embedding_rows(db, ids=stale))
+                with self._lock:
+                    for content_id, vector, updated_at in changed:
+                        self._add(content_id, vector, updated_at)
+                    held = self._size + len(self._skipped)
+                if db.scalar(select(func.count()).select_from(ContentEmbedding)) == held:
+                    self._checked_at = time.monotonic()
+                    return
+            self._reload(db)
+        finally:
+            self._refresh_lock.release()
+
+    def _reload(self, db):
+        started = time.perf_counter()
+        fresh = EmbeddingIndex()
+        for content_id, vector, updated_at in embedding_rows(db):
+            fresh._add(content_id, vector, updated_at)
+        with self._lock:
+            self._matrix, self._ids, self._size = fresh._matrix, fresh._ids, fresh._size
+            self._rows, self._stamps, self._skipped, self._newest = fresh._rows, fresh._stamps, fresh._skipped, fresh._newest
+        self._loaded = True
+        self._checked_at = time.monotonic()
+        logger.info(f"Loaded {self._size} embeddings ({self._matrix.nbytes / 1e6:.1f} MB, "
+                    f"{len(self._skipped)} skipped) in {time.perf_counter() - started:.2f}s")
+
+    def neighbours(self, content_id: int, k: int) -> List[Tuple[int, float]]:
+        """The k most similar items to `content_id`, best first, as (content_id, cosine similarity)."""
+        with self._lock:
+            row = self._rows.get(content_id)
+            if row is None or self._size < 2 or k <= 0:
+                return []
+            scores = self._matrix[:self._size] @ self._matrix[row]
+            scores[row] = -np.inf
+            k = min(k, self._size - 1)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(int(self._ids[i]), float(scores[i])) for i in top]
+
+index = EmbeddingIndex()
+
+def related_items(db, item_id: int, k: int = None) -> List[Tuple[Content, float]]:
+    """Most similar items with their cosine similarity, for the detail page and /item/<id>/related."""
+    index.refresh(db)
+    pairs = index.neighbours(item_id, k or Config.RELATED_ITEMS_K)
+    if not pairs:
+        return []
+    items = {c.id: c for c in db.query(Content).options(RELATED_COLUMNS).filter(Content.id.in_([i for i, _ in pairs]))}
+    return [(items[i], score) for i, score in pairs if i in items]
@@ -0,0 +1,89 @@
+"""
+Dashboard counters. stage_counts holds the number of items in each lifecycle
+stage and is maintained by triggers on content, in the same transaction as
+the write, whichever path made it (ORM, bulk inserts, retention deletes,
+backfills). The dashboard reads a dozen rows, however large content grows.
+"""
+from typing import Dict
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Engine
+from .lifecycle import ItemStage
+from .models import StageCount
+
+# Dashboard tiles as stage sets
+RELEVANT_STAGES = frozenset(ItemStage) - {ItemStage.NEW, ItemStage.IRRELEVANT}
+SYNTHESIZED_STAGES = frozenset({ItemStage.SYNTHESIZED, ItemStage.PASSED, ItemStage.REJECTED, ItemStage.QUEUED, ItemStage.DELIVERED})
+
+SQLITE_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS stage_counts_insert AFTER INSERT ON content BEGIN
+        INSERT INTO stage_counts(stage, count) VALUES (new.stage, 1) ON CONFLICT(stage) DO UPDATE SET count = count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stage_counts_delete AFTER DELETE ON content BEGIN
+        UPDATE stage_counts SET count = count - 1 WHERE stage = old.stage;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stage_counts_update AFTER UPDATE OF stage ON content WHEN old.stage IS NOT new.stage BEGIN
+        UPDATE stage_counts SET count = count - 1 WHERE stage = old.stage;
+        INSERT INTO stage_counts(stage, count) VALUES (new.stage, 1) ON CONFLICT(stage) DO UPDATE SET count = count + 1;
+    END""",
+]
+
+POSTGRES_DDL = [
+    """CREATE OR REPLACE FUNCTION stage_counts_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE stage_counts SET count = count - 1 WHERE stage = OLD.stage;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'INSERT') THEN
+            INSERT INTO stage_counts(stage, count) VALUES (NEW.stage, 1)
+            ON CONFLICT (stage) DO UPDATE SET count = stage_counts.count + 1;
+        END IF;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER stage_counts_write AFTER INSERT OR DELETE ON content
+        FOR EACH ROW EXECUTE FUNCTION stage_counts_apply()""",
+    """CREATE TRIGGER stage_counts_update AFTER UPDATE OF stage ON content
+        FOR EACH ROW WHEN (OLD.stage IS DISTINCT FROM NEW.stage) EXECUTE FUNCTION stage_counts_apply()""",
+]
+
+TRIGGER_EXISTS = {
+    "sqlite": "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'stage_counts_update'",
+    "postgresql": "SELECT 1 FROM pg_trigger WHERE tgname = 'stage_counts_update'",
+}
+
+def ensure_stage_counts(engine: Engine):
+    """
+    Installs the triggers and counts the existing rows, once. Called from
+    init_db; databases still missing content.stage get it from
+    scripts/backfill_stages.py, which calls this again afterwards.
+    """
+    dialect = engine.dialect.name
+    if dialect not in TRIGGER_EXISTS:
+        return
+    if "stage" not in {c["name"] for c in inspect(engine).get_columns("content")}:
+        return
+    with engine.begin() as conn:
+        if conn.exec_driver_sql(TRIGGER_EXISTS[dialect]).first():
+            return
+        # Creating the triggers locks content against writes until commit, so the recount can't miss one
+        for statement in SQLITE_DDL if dialect == "sqlite" else POSTGRES_DDL:
+            conn.exec_driver_sql(statement)
+        conn.execute(text("DELETE FROM stage_counts"))
+        conn.execute(text("INSERT INTO stage_counts (stage, count) SELECT stage, COUNT(*) FROM content GROUP BY stage"))
+
+def stage_counts(db) -> Dict[ItemStage, int]:
+    counts = dict.fromkeys(ItemStage, 0)
+    for stage, count in db.execute(select(StageCount.stage, StageCount.count)):
+        if stage in ItemStage.__members__:
+            counts[ItemStage[stage]] = count
+    return counts
+
+def dashboard_stats(db) -> Dict[str, int]:
+    """The dashboard tiles, from stage_counts."""
+    counts = stage_counts(db)
+    return {
+        "total": sum(counts.values()),
+        "pending_rel": counts[ItemStage.NEW],
+        "relevant": sum(counts[s] for s in RELEVANT_STAGES),
+        "synthesized": sum(counts[s] for s in SYNTHESIZED_STAGES),
+        "delivered": counts[ItemStage.DELIVERED],
+    }
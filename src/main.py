@@ -1,95 +1,231 @@
-import time
-import logging
-from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.triggers.cron import CronTrigger
+import argparse
+import importlib
+from typing import Callable, List
 from src.core.config import Config
 from src.core.logger import setup_logger
-from src.core.database import init_db
-
-# Agents
-from src.agents.acquisition import ContentAcquisitionAgent
-from src.agents.relevance import RelevanceDecisionAgent
-from src.agents.enrichment import ContextEnrichmentAgent
-from src.agents.prioritization import PrioritizationAgent
-from src.agents.synthesis import InsightSynthesisAgent
-from src.agents.guardrail import QualityGuardrailAgent
-from src.agents.delivery import DeliveryAgent
+from src.core.database import SessionLocal, init_db
+from src.core import metrics
+from src.core.run_history import pipeline_run
+from src.core.run_lock import RunLockHeld, run_lock
 
 logger = setup_logger("orchestrator")
 
-def run_pipeline():
+# Pipeline order. Agent modules (and the SDKs behind them) are imported only when a stage runs.
+STAGES = {
+    "acquisition": ("src.agents.acquisition", "ContentAcquisitionAgent"),
+    "relevance": ("src.agents.relevance", "RelevanceDecisionAgent"),
+    "enrichment": ("src.agents.enrichment", "ContextEnrichmentAgent"),
+    "prioritization": ("src.agents.prioritization", "PrioritizationAgent"),
+    "synthesis": ("src.agents.synthesis", "InsightSynthesisAgent"),
+    "guardrail": ("src.agents.guardrail", "QualityGuardrailAgent"),
+    "delivery": ("src.agents.delivery", "DeliveryAgent"),
+}
+STAGE_NAMES = list(STAGES)
+PROCESSING_STAGES = ["relevance", "enrichment", "prioritization", "synthesis", "guardrail"]
+
+# One lock for every entry point (scheduler jobs, UI trigger, --stages) so two runs never work the same pending rows
+PIPELINE_LOCK = "pipeline"
+
+def run_exclusive(job: str, fn: Callable[[], None], wait: float = 0) -> bool:
+    """
+    Runs `fn` holding the pipeline lock. Returns False without running it
+    if another run still holds the lock after `wait` seconds.
+    """
+    try:
+        with run_lock(PIPELINE_LOCK, wait=wait):
+            fn()
+            return True
+    except RunLockHeld as e:
+        logger.warning(f"Skipping {job}: {e}")
+        return False
+
+def run_pipeline() -> bool:
     """
-    Execute the full signal digest pipeline.
+    Execute the full signal digest pipeline, recorded in pipeline_runs.
+    Returns False if another run held the pipeline lock.
+    """
+    def run():
+        with pipeline_run(Config.PIPELINE_MODE):
+            if Config.PIPELINE_MODE == "streaming":
+                from src.streaming import run_streaming_pipeline
+                run_streaming_pipeline()
+            else:
+                run_batch_pipeline()
+    return run_exclusive("pipeline run", run)
+
+def run_batch_pipeline():
+    """
+    Run each agent in turn over everything pending.
     """
     logger.info(">>> Starting Pipeline Execution <<<")
-    
-    # 1. Acquisition
-    acq_agent = ContentAcquisitionAgent("acquisition")
-    new_items = acq_agent.run()
-    
-    if new_items == 0:
-        logger.info("No new content. Skipping remaining steps (or maybe we process pending?).")
-        # For robustness, we should continue to process pending items even if no NEW items fetched.
-        # But for efficiency, maybe skip? 
-        # Let's continues, as Relevance might have pending items from previous failed runs.
-    
-    # 2. Relevance
-    rel_agent = RelevanceDecisionAgent("relevance")
-    rel_agent.run()
-    
-    # 3. Enrichment
-    enr_agent = ContextEnrichmentAgent("enrichment")
-    enr_agent.run()
-    
-    # 4. Prioritization
-    prio_agent = PrioritizationAgent("prioritization")
-    prio_agent.run()
-    
-    # 5. Synthesis
-    syn_agent = InsightSynthesisAgent("synthesis")
-    syn_agent.run()
-    
-    # 6. Guardrail
-    guard_agent = QualityGuardrailAgent("guardrail")
-    guard_agent.run()
-    
-    # 7. Delivery
-    del_agent = DeliveryAgent("delivery")
-    del_agent.run()
-    
+    # Later stages run even when acquisition finds nothing new: earlier runs may have left items pending.
+    run_stages(STAGE_NAMES)
     logger.info(">>> Pipeline Execution Complete <<<")
 
+def run_stages(names: List[str]):
+    for name in names:
+        load_agent(name).run()
+
+def load_agent(name: str):
+    """Imports the stage's agent module on first use and returns a fresh agent."""
+    module_name, class_name = STAGES[name]
+    return getattr(importlib.import_module(module_name), class_name)(name)
+
+def parse_stages(spec: str) -> List[str]:
+    """
+    "relevance..synthesis", "acquisition,delivery" or a mix of both.
+    Ranges are inclusive; the result is always in pipeline order.
+    """
+    selected = set()
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        first, _, last = part.partition("..")
+        last = last or first
+        for name in (first, last):
+            if name not in STAGES:
+                raise ValueError(f"Unknown stage '{name}'. Stages: {', '.join(STAGE_NAMES)}")
+        start, end = STAGE_NAMES.index(first), STAGE_NAMES.index(last)
+        if start > end:
+            raise ValueError(f"Empty stage range '{part}': {first} runs after {last}")
+        selected.update(STAGE_NAMES[start:end + 1])
+    return [name for name in STAGE_NAMES if name in selected]
+
 def main():
+    parser = argparse.ArgumentParser(description="AI Signal Digest pipeline")
+    parser.add_argument("--stages", help=f"Run these stages once and exit, e.g. relevance..synthesis. Stages: {', '.join(STAGE_NAMES)}")
+    parser.add_argument("--maintenance", action="store_true", help="Archive old finished items, VACUUM/ANALYZE, and exit")
+    args = parser.parse_args()
+
+    stages = None
+    if args.stages:
+        try:
+            stages = parse_stages(args.stages)
+        except ValueError as e:
+            parser.error(str(e))
+
     # Ensure DB exists
     init_db()
+
+    if Config.METRICS_PORT:
+        metrics.serve(Config.METRICS_PORT)
+        logger.info(f"Serving metrics on :{Config.METRICS_PORT}")
     
+    if args.maintenance:
+        if not run_maintenance():
+            parser.exit(1, "Another pipeline run is in progress.\n")
+        return
+
+    if stages:
+        def run():
+            with pipeline_run("stages"):
+                run_stages(stages)
+        if not run_exclusive(f"stages {', '.join(stages)}", run):
+            parser.exit(1, "Another pipeline run is in progress.\n")
+        return
+
     if Config.DRY_RUN:
         logger.info("Running in DRY_RUN mode. One-off execution.")
         run_pipeline()
         return
 
-    # Scheduler Setup
-    scheduler = BlockingScheduler()
-    
-    # Schedule: Run daily at 9:00 AM
+    run_scheduler()
+
+def run_scheduler():
+    """
+    Each part of the pipeline on its own cadence: acquisition every
+    ACQUISITION_INTERVAL_MINUTES, the LLM stages continuously over whatever is
+    pending, and the digest (top-N synthesis, validation, send) on DELIVERY_CRON.
+    A job still running when its next turn comes is skipped, not stacked,
+    and all of them share the pipeline lock with manual runs.
+    """
+    from datetime import datetime
+    from apscheduler.schedulers.blocking import BlockingScheduler
+    from apscheduler.triggers.cron import CronTrigger
+
+    scheduler = BlockingScheduler(job_defaults={"coalesce": True, "max_instances": 1})
+    now = datetime.now()
+
     scheduler.add_job(
-        run_pipeline,
-        trigger=CronTrigger(hour=9, minute=0),
-        id='signal_digest_pipeline',
-        name='Run Signal Digest Pipeline',
-        replace_existing=True
+        run_acquisition, 'interval', minutes=Config.ACQUISITION_INTERVAL_MINUTES, next_run_time=now,
+        id='signal_digest_acquisition', name='Acquire Content', replace_existing=True
     )
-    
-    logger.info("Scheduler started. Press Ctrl+C to exit.")
-    
+    scheduler.add_job(
+        run_processing, 'interval', seconds=Config.PROCESSING_INTERVAL_SECONDS, next_run_time=now,
+        id='signal_digest_processing', name='Process Pending Content', replace_existing=True
+    )
+    scheduler.add_job(
+        run_delivery, CronTrigger.from_crontab(Config.DELIVERY_CRON),
+        id='signal_digest_delivery', name='Deliver Digest', replace_existing=True
+    )
+    scheduler.add_job(
+        run_maintenance, CronTrigger.from_crontab(Config.MAINTENANCE_CRON),
+        id='signal_digest_maintenance', name='Archive and Compact', replace_existing=True
+    )
+
+    logger.info(f"Scheduler started (acquisition every {Config.ACQUISITION_INTERVAL_MINUTES:g}m, "
+                f"delivery at '{Config.DELIVERY_CRON}'). Press Ctrl+C to exit.")
     try:
-        # Run once immediately on startup?
-        run_pipeline() 
-        
-        # Start blocking loop
         scheduler.start()
     except (KeyboardInterrupt, SystemExit):
         pass
 
+def run_acquisition():
+    def run():
+        with pipeline_run("ingest"):
+            run_stages(["acquisition"])
+    run_exclusive("acquisition", run)
+
+def run_processing():
+    """
+    Drains the LLM stages: passes repeat while a batch-limited stage
+    (relevance, enrichment, synthesis) still finds work. Between digests,
+    synthesis only takes items at or above STREAM_SYNTHESIS_MIN_PRIORITY,
+    and only while the digest has open slots; `run_delivery` fills the rest
+    with the top-N.
+    """
+    from src.streaming import StreamingExecutor, build_stages
+    stages = build_stages()
+    # Idle passes are skipped so they don't flood the run history: nothing claimable, nothing to run
+    with SessionLocal() as db:
+        if not any(stage.backlog(db, limit=1) for stage in stages):
+            return
+
+    def run():
+        with pipeline_run("process"):
+            if Config.PIPELINE_MODE == "streaming":
+                StreamingExecutor(lambda: iter(()), stages, Config.STREAM_QUEUE_SIZE).run()
+                return
+
+            agents = {name: load_agent(name) for name in PROCESSING_STAGES}
+            while True:
+                processed = {}
+                for name, agent in agents.items():
+                    if name == "synthesis":
+                        processed[name] = agent.run(min_priority=Config.STREAM_SYNTHESIS_MIN_PRIORITY)
+                    else:
+                        processed[name] = agent.run()
+                if not any(processed[name] for name in ("relevance", "enrichment", "synthesis")):
+                    break
+    run_exclusive("processing", run)
+
+def run_maintenance():
+    """Archives finished items past RETENTION_DAYS, then VACUUM/ANALYZE. Holds the lock so nothing writes meanwhile."""
+    from src.core import retention
+    def run():
+        with pipeline_run("maintenance"):
+            retention.archive_old_content()
+            retention.compact()
+    return run_exclusive("maintenance", run)
+
+def run_delivery():
+    """
+    Tops the digest up to DIGEST_SIZE with the best remaining prioritized
+    items, validates them and sends. The digest goes out even if a
+    processing pass is running at send time: it waits its turn.
+    """
+    def run():
+        with pipeline_run("delivery"):
+            run_stages(["synthesis", "guardrail", "delivery"])
+    run_exclusive("delivery", run, wait=Config.DELIVERY_LOCK_WAIT_SECONDS)
+
 if __name__ == "__main__":
     main()
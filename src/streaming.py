@@ -0,0 +1,358 @@
+import os
+import queue
+import socket
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional
+from sqlalchemy.orm import undefer_group
+from src.core.config import Config
+from src.core.database import SessionLocal
+from src.core.leases import LeaseLost, claim, claimable, is_parked, release
+from src.core.logger import setup_logger
+from src.core import metrics
+from src.core.run_history import record_stage_run
+from src.core.run_lock import run_lock
+from src.core.models import Content
+from src.core.lifecycle import ItemStage, advance
+
+from src.agents.acquisition import ContentAcquisitionAgent
+from src.agents.relevance import RelevanceDecisionAgent
+from src.agents.enrichment import CLUSTERING_LOCK, ContextEnrichmentAgent
+from src.agents.prioritization import PrioritizationAgent
+from src.agents.synthesis import InsightSynthesisAgent, digest_slots
+from src.agents.guardrail import LOAD_FOR_VALIDATION, QualityGuardrailAgent
+from src.agents.delivery import DeliveryAgent
+
+logger = setup_logger("streaming")
+
+_STOP = object()
+
+class Channel:
+    """
+    Bounded queue of item ids between two stages. `put` blocks when full,
+    which is what pushes backpressure upstream. Once every producer has
+    called `close`, each consumer receives a stop marker.
+    """
+
+    def __init__(self, name: str, maxsize: int, producers: int, consumers: int):
+        self.name = name
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.producers = producers
+        self.consumers = consumers
+        self.lock = threading.Lock()
+
+    def put(self, item_id: int):
+        self.queue.put(item_id)
+        metrics.QUEUE_DEPTH.set(self.name, value=self.queue.qsize())
+
+    def get(self):
+        item_id = self.queue.get()
+        metrics.QUEUE_DEPTH.set(self.name, value=self.queue.qsize())
+        return item_id
+
+    def close(self):
+        with self.lock:
+            self.producers -= 1
+            done = self.producers == 0
+        if done:
+            for _ in range(self.consumers):
+                self.queue.put(_STOP)
+
+class Stage:
+    """
+    One pipeline step. `handler(db, item)` does the work for a single item
+    and returns True to pass it downstream. `pending` holds the filter
+    criteria selecting items waiting at this stage (its backlog), `load`
+    the loader options for the deferred columns the handler reads. With
+    `serial` set, items are handled one at a time across every process
+    sharing the database, under the run lock of that name. `capacity(db)`,
+    if given, caps how many pending items the stage can take right now.
+    """
+
+    def __init__(self, name: str, handler: Callable, workers: int = 1, pending: tuple = (), load: tuple = (),
+                 serial: Optional[str] = None, capacity: Optional[Callable] = None):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.pending = pending
+        self.load = load
+        self.serial = serial
+        self.capacity = capacity
+
+    def room(self, db, limit: Optional[int] = None) -> Optional[int]:
+        """`limit` lowered to the stage's capacity (None = no limit)."""
+        if self.capacity is None:
+            return limit
+        capacity = max(0, self.capacity(db))
+        return capacity if limit is None else min(limit, capacity)
+
+    def backlog(self, db, limit: Optional[int] = None) -> List[int]:
+        """Pending items a claim could take now, up to `limit` and the stage's capacity."""
+        query = db.query(Content.id).filter(*self.pending, *claimable(datetime.utcnow()))
+        return [i for (i,) in query.order_by(Content.id).limit(self.room(db, limit))]
+
+    def process(self, item_id: int, token: str) -> bool:
+        """
+        Runs the handler on one leased item and releases the lease in the
+        same transaction as the item's results. Returns whether to pass the
+        item downstream. Raises LeaseLost if the lease ran out and was
+        re-claimed meanwhile; on any other error the lease is kept, so the
+        item is retried once it expires instead of hot-looping, until it is
+        parked.
+        """
+        with run_lock(self.serial, wait=Config.WORKER_LEASE_SECONDS / 2) if self.serial else nullcontext():
+            with SessionLocal() as db:
+                try:
+                    item = db.get(Content, item_id, options=self.load)
+                    if item is None:
+                        return False
+                    forward = self.handler(db, item)
+                    db.flush()
+                    if not release(db, item_id, token):
+                        db.rollback()
+                        raise LeaseLost(f"{self.name}: lease on {item_id} expired before it finished; discarded.")
+                    db.commit()
+                    return forward
+                except LeaseLost:
+                    raise
+                except Exception:
+                    db.rollback()
+                    if is_parked(db, item_id):
+                        logger.warning(f"{self.name}: parking {item_id} after {Config.WORKER_MAX_ATTEMPTS} failed attempts.")
+                    raise
+
+class StreamingExecutor:
+    """
+    Runs stages concurrently, connected by bounded channels, so each item
+    moves on as soon as its stage is done with it. Every item is leased,
+    processed and committed in its own short session by the worker thread
+    that owns it. The lease keeps an id that reaches a stage twice (its
+    backlog and its upstream) from being processed twice, and keeps `src.worker`
+    processes off the items this run is working on.
+    """
+
+    def __init__(self, source: Callable[[], Iterable[int]], stages: List[Stage], queue_size: int):
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.counts = {stage.name: 0 for stage in stages}
+        self.errors = {stage.name: 0 for stage in stages}
+        self.finished_at = {}
+        self.counts_lock = threading.Lock()
+        self.first_item_at = None
+        self.started_at = None
+        self.owner = f"{socket.gethostname()}:{os.getpid()}/stream"
+
+    def run(self) -> dict:
+        self.started_at = time.monotonic()
+        started_at = datetime.utcnow()
+
+        # Producers of stage i: stage i-1 workers (or the source) plus stage i's own backlog feeder
+        channels = []
+        for i, stage in enumerate(self.stages):
+            upstream = 1 if i == 0 else self.stages[i - 1].workers
+            channels.append(Channel(stage.name, self.queue_size, upstream + (1 if stage.pending else 0), stage.workers))
+
+        threads = []
+        for i, stage in enumerate(self.stages):
+            outbox = channels[i + 1] if i + 1 < len(channels) else None
+            for n in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self.work, args=(stage, channels[i], outbox), name=f"{stage.name}-{n}", daemon=True
+                ))
+            if stage.pending:
+                threads.append(threading.Thread(
+                    target=self.feed_backlog, args=(stage, channels[i]), name=f"{stage.name}-backlog", daemon=True
+                ))
+        threads.append(threading.Thread(target=self.feed_source, args=(channels[0],), name="source", daemon=True))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        logger.info(f"Streaming run finished in {time.monotonic() - self.started_at:.2f}s: {self.counts}")
+        # Stages overlap, so LLM usage can't be split per stage and is left empty
+        for stage in self.stages:
+            record_stage_run(
+                stage.name, started_at, self.finished_at.get(stage.name, datetime.utcnow()),
+                status="OK", items_out=self.counts[stage.name], errors=self.errors[stage.name]
+            )
+        return self.counts
+
+    def feed_source(self, channel: Channel):
+        try:
+            for item_id in self.source():
+                channel.put(item_id)
+        except Exception as e:
+            logger.error(f"Source failed: {e}", exc_info=True)
+        finally:
+            channel.close()
+
+    def feed_backlog(self, stage: Stage, channel: Channel):
+        try:
+            with SessionLocal() as db:
+                item_ids = stage.backlog(db)
+            logger.info(f"{stage.name}: {len(item_ids)} backlog items.")
+            for item_id in item_ids:
+                channel.put(item_id)
+        except Exception as e:
+            logger.error(f"{stage.name} backlog failed: {e}", exc_info=True)
+        finally:
+            channel.close()
+
+    def work(self, stage: Stage, inbox: Channel, outbox: Optional[Channel]):
+        try:
+            while True:
+                item_id = inbox.get()
+                if item_id is _STOP:
+                    return
+                try:
+                    with SessionLocal() as db:
+                        token, claimed = claim(
+                            db, stage.name, (Content.id == item_id, *stage.pending), self.owner, 1, Config.WORKER_LEASE_SECONDS
+                        )
+                    if not claimed:
+                        # Already done or in flight elsewhere; whoever holds it passes it on
+                        continue
+                    forward = stage.process(item_id, token)
+                except LeaseLost as e:
+                    logger.warning(str(e))
+                    continue
+                except Exception as e:
+                    logger.error(f"{stage.name} failed on {item_id}: {e}")
+                    with self.counts_lock:
+                        self.errors[stage.name] += 1
+                    continue
+
+                metrics.ITEMS_PROCESSED.inc(stage.name)
+                with self.counts_lock:
+                    self.counts[stage.name] += 1
+                    if outbox is None and self.first_item_at is None:
+                        self.first_item_at = time.monotonic()
+                        logger.info(f"First item through all stages after {self.first_item_at - self.started_at:.2f}s.")
+                if forward and outbox is not None:
+                    outbox.put(item_id)
+        finally:
+            self.finished_at[stage.name] = datetime.utcnow() # The stage's last worker writes last
+            if outbox is not None:
+                outbox.close()
+
+def build_stages() -> List[Stage]:
+    """
+    relevance -> enrichment -> prioritization -> synthesis -> guardrail.
+    Each handler only acts on items at its own lifecycle stage, so backlog
+    ids, re-delivered ids and re-claimed leases are safe.
+    """
+    rel = RelevanceDecisionAgent("relevance")
+    enr = ContextEnrichmentAgent("enrichment")
+    prio = PrioritizationAgent("prioritization")
+    syn = InsightSynthesisAgent("synthesis")
+    guard = QualityGuardrailAgent("guardrail")
+
+    def relevance(db, item):
+        if item.stage == ItemStage.NEW:
+            decision = rel.evaluate_relevance(item)
+            item.relevance_label = decision.label
+            item.relevance_confidence = decision.confidence_score
+            item.relevance_reason = decision.reason
+            advance(item, ItemStage.IRRELEVANT if decision.label == "IRRELEVANT" else ItemStage.RELEVANT)
+            rel.logger.info(f"Classified {item.id} as {decision.label} ({decision.confidence_score})")
+        return item.stage != ItemStage.IRRELEVANT
+
+    def enrichment(db, item):
+        if item.stage == ItemStage.RELEVANT:
+            item.embedding_vector = enr.generate_embedding(item.title + "\n" + (item.abstract_or_body or ""))
+            item.topics = enr.extract_topics(item.abstract_or_body or "")
+            enr.assign_cluster(db, item)
+            advance(item, ItemStage.ENRICHED)
+            enr.logger.info(f"Enriched {item.id} (Cluster: {item.cluster_id})")
+        return True
+
+    def prioritization(db, item):
+        if item.stage == ItemStage.ENRICHED:
+            item.priority_score = prio.calculate_priority(item)
+            advance(item, ItemStage.PRIORITIZED)
+            prio.logger.info(f"Prioritized {item.id}: Score {item.priority_score}")
+        return True
+
+    def synthesis(db, item):
+        if item.stage != ItemStage.PRIORITIZED:
+            return item.stage == ItemStage.SYNTHESIZED
+        # Only strong items are synthesized on arrival; the rest wait for the top-N pass before delivery.
+        if item.priority_score < Config.STREAM_SYNTHESIS_MIN_PRIORITY:
+            return False
+        if Config.SYNTHESIS_MODE == "cluster" and item.cluster_id:
+            lead = db.query(Content).filter(
+                Content.cluster_id == item.cluster_id,
+                Content.summary_headline.isnot(None),
+                Content.summary_parent_id == None,
+                Content.id != item.id
+            ).first()
+            if lead:
+                item.summary_parent_id = lead.id
+                advance(item, ItemStage.MERGED)
+                syn.logger.info(f"Linked {item.id} to cluster lead {lead.id}")
+                return False
+        # This item's own lease already counts against the digest
+        if digest_slots(db) < 0:
+            return False
+        syn.apply_summary([item], syn.generate_summary(item))
+        return True
+
+    def guardrail(db, item):
+        if item.stage == ItemStage.SYNTHESIZED:
+            guard.validate(db, [item])
+            if item.stage == ItemStage.SYNTHESIZED:
+                raise RuntimeError(f"No verdict for {item.id}") # Keeps the lease, so it is retried later
+        return False
+
+    workers = Config.STREAM_LLM_WORKERS
+    body = (undefer_group("body"),)
+    return [
+        Stage("relevance", relevance, workers, (Content.stage == ItemStage.NEW,), body),
+        # One at a time across processes: assign_cluster compares against the items clustered before it
+        Stage("enrichment", enrichment, 1, (Content.stage == ItemStage.RELEVANT,), body, serial=CLUSTERING_LOCK),
+        Stage("prioritization", prioritization, 1, (Content.stage == ItemStage.ENRICHED,)),
+        Stage("synthesis", synthesis, workers, (
+            Content.stage == ItemStage.PRIORITIZED, Content.priority_score >= Config.STREAM_SYNTHESIS_MIN_PRIORITY
+        ), body, capacity=digest_slots),
+        Stage("guardrail", guardrail, workers, (Content.stage == ItemStage.SYNTHESIZED,), LOAD_FOR_VALIDATION),
+    ]
+
+def build_pipeline() -> StreamingExecutor:
+    """
+    Acquisition feeds newly saved items into the stages from `build_stages`.
+    """
+    acq = ContentAcquisitionAgent("acquisition")
+
+    def source():
+        batches = [acq.fetch_arxiv] + [lambda f=f: acq.fetch_rss_feed(f) for f in acq.RSS_FEEDS]
+        for fetch in batches:
+            try:
+                fetched = fetch()
+            except Exception as e:
+                logger.error(f"Acquisition fetch failed: {e}")
+                continue
+            with SessionLocal() as db:
+                for entry in fetched:
+                    if acq.save_content(db, entry):
+                        db.commit()
+                        yield db.query(Content.id).filter(Content.url == entry["url"]).scalar()
+
+    return StreamingExecutor(source, build_stages(), Config.STREAM_QUEUE_SIZE)
+
+def run_streaming_pipeline():
+    """
+    Streaming counterpart of `run_pipeline`: items flow through the LLM stages
+    concurrently, the digest's remaining slots take the top-N of what is
+    left, and validated items are delivered.
+    """
+    logger.info(">>> Starting Streaming Pipeline Execution <<<")
+    build_pipeline().run()
+    InsightSynthesisAgent("synthesis").run()
+    QualityGuardrailAgent("guardrail").run()
+    DeliveryAgent("delivery").run()
+    logger.info(">>> Streaming Pipeline Execution Complete <<<")
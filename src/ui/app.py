@@ -1,10 +1,17 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, flash
+from flask import Flask, Response, render_template, request, redirect, url_for, jsonify, flash
 from sqlalchemy import desc
+from sqlalchemy.orm import load_only, undefer_group
 from src.core.database import SessionLocal, init_db
-from src.core.models import Content, User
+from src.core.models import Content, User, PipelineRun, StageRun, RunLock
 from src.core.config import Config
-from src.main import run_pipeline
-import threading
+from src.core import listing, metrics, search as content_search, similarity
+from src.core.lifecycle import ItemStage
+from src.core.listing import ContentFilter
+from src.core.run_history import stage_totals
+from src.core.stats import dashboard_stats
+from src.main import PIPELINE_LOCK, run_pipeline
+from src.ui.jobs import JobRunner
+from src.ui.status_buffer import StatusCallbackBuffer
 import os
 
 app = Flask(__name__)
@@ -13,6 +20,15 @@ app.secret_key = os.urandom(24) # Valid for MVP session handling
 # Ensure DB is ready
 init_db()
 
+status_buffer = StatusCallbackBuffer(Config.STATUS_FLUSH_INTERVAL, Config.STATUS_FLUSH_BATCH)
+pipeline_jobs = JobRunner("pipeline", run_pipeline)
+
+try:
+    from twilio.request_validator import RequestValidator
+    twilio_validator = RequestValidator(Config.TWILIO_AUTH_TOKEN) if Config.TWILIO_AUTH_TOKEN else None
+except ImportError:
+    twilio_validator = None
+
 def get_db_session():
     return SessionLocal()
 
@@ -28,6 +44,8 @@ def get_lifecycle_status(item):
         return 'Ready', 'info'
     if item.summary_headline:
         return 'Synthesized', 'primary'
+    if item.summary_parent_id:
+        return 'Merged', 'primary' # Covered by its cluster lead's summary
     if item.relevance_label == 'IRRELEVANT':
         return 'Irrelevant', 'secondary'
     if item.relevance_label:
@@ -36,26 +54,22 @@ def get_lifecycle_status(item):
 
 app.add_template_global(get_lifecycle_status, name='get_lifecycle_status')
 
+# Columns list views and get_lifecycle_status read; bodies, summaries and embeddings stay in the database
+LIST_COLUMNS = load_only(
+    Content.title, Content.url, Content.source, Content.published_at, Content.fetched_at,
+    Content.relevance_label, Content.relevance_confidence, Content.priority_score, Content.summary_headline,
+    Content.summary_parent_id, Content.validation_status, Content.delivery_status
+)
+
 @app.route('/')
 def index():
     """Dashboard view."""
     with get_db_session() as db:
-        total_content = db.query(Content).count()
-        pending_relevance = db.query(Content).filter(Content.relevance_label == None).count()
-        relevant_items = db.query(Content).filter(Content.relevance_label.notin_(['IRRELEVANT', None])).count()
-        synthesized = db.query(Content).filter(Content.summary_headline.isnot(None)).count()
-        delivered = db.query(Content).filter(Content.delivery_status == 'SENT').count()
-        
+        stats = dashboard_stats(db)
+
         # Recent activity
-        recent_items = db.query(Content).order_by(Content.fetched_at.desc()).limit(5).all()
-        
-    stats = {
-        "total": total_content,
-        "pending_rel": pending_relevance,
-        "relevant": relevant_items,
-        "synthesized": synthesized,
-        "delivered": delivered
-    }
+        recent_items = db.query(Content).options(LIST_COLUMNS).order_by(Content.fetched_at.desc()).limit(5).all()
+
     return render_template('index.html', stats=stats, recent=recent_items)
 
 @app.route('/content/')
@@ -73,42 +87,155 @@ def synthesized_content():
     return content_list_filtered('synthesized')
 
 def content_list_filtered(filter_status):
-    """Helper for filtered views."""
+    """Helper for filtered views: one keyset page, filters from the query string."""
+    content_filter = ContentFilter.from_args(request.args, status=filter_status)
+    after = request.args.get('after')
     with get_db_session() as db:
-        query = db.query(Content).order_by(Content.fetched_at.desc())
-        
-        if filter_status == 'relevant':
-             # Explicitly exclude IRRELEVANT and NULL
-             query = query.filter(Content.relevance_label != 'IRRELEVANT', Content.relevance_label.isnot(None))
-        elif filter_status == 'synthesized':
-             query = query.filter(Content.summary_headline.isnot(None))
-        elif filter_status == 'pending':
-             query = query.filter(Content.relevance_label == None)
-             
-        items = query.limit(50).all()
-        
-    return render_template('content.html', items=items, filter=filter_status)
+        items, next_cursor = listing.page(db.query(Content).options(LIST_COLUMNS), content_filter, after)
+
+    page_args = content_filter.args() # Filters carried into the page links
+    if request.endpoint == 'content_list' and filter_status != 'all':
+        page_args['status'] = filter_status
+    return render_template('content.html', items=items, filter=filter_status, filters=content_filter, page_args=page_args,
+                           after=after, next_cursor=next_cursor, stages=[s.name for s in ItemStage])
+
+@app.route('/search')
+def search():
+    """Full-text search (BM25 on SQLite), one keyset page at a time."""
+    q = request.args.get('q', '').strip()
+    after = request.args.get('after')
+    hits, next_cursor = [], None
+    if q:
+        with get_db_session() as db:
+            hits, next_cursor = content_search.search(db, q, after)
+    if wants_json():
+        return jsonify({
+            "q": q,
+            "results": [{**hit.__dict__, "published_at": hit.published_at.isoformat() if hit.published_at else None} for hit in hits],
+            "next": url_for('search', q=q, after=next_cursor, format='json') if next_cursor else None,
+        })
+    return render_template('search.html', q=q, hits=hits, after=after, next_cursor=next_cursor)
 
 @app.route('/item/<int:item_id>/')
 def content_detail(item_id):
     with get_db_session() as db:
-        item = db.query(Content).get(item_id)
+        item = db.get(Content, item_id, options=[undefer_group("body"), undefer_group("summary"), undefer_group("reasons")])
         if not item:
             return "Item not found", 404
-        return render_template('detail.html', item=item)
+        return render_template('detail.html', item=item, related=similarity.related_items(db, item_id))
+
+@app.route('/item/<int:item_id>/related')
+def related_content(item_id):
+    """Nearest items by embedding similarity, as JSON."""
+    k = min(request.args.get('k', Config.RELATED_ITEMS_K, type=int), 50)
+    with get_db_session() as db:
+        if db.get(Content, item_id, options=[load_only(Content.id)]) is None:
+            return jsonify({"error": "Item not found"}), 404
+        return jsonify({
+            "item_id": item_id,
+            "related": [
+                {"id": item.id, "title": item.title, "url": item.url, "source": item.source,
+                 "stage": item.stage.name, "similarity": round(score, 4)}
+                for item, score in similarity.related_items(db, item_id, k)
+            ],
+        })
+
+@app.route('/runs/')
+def pipeline_runs():
+    """Pipeline run history: per-stage duration and throughput trends."""
+    limit = request.args.get('limit', 30, type=int)
+    with get_db_session() as db:
+        runs = db.query(PipelineRun).order_by(PipelineRun.id.desc()).limit(limit).all()
+        runs.reverse() # Oldest first for the charts
+        stage_rows = db.query(StageRun).filter(
+            StageRun.pipeline_run_id.in_([r.id for r in runs])
+        ).order_by(StageRun.id).all() if runs else []
+
+    # Processing passes run each stage several times per pipeline run
+    by_run = stage_totals(stage_rows)
+    stage_names = []
+    for row in stage_rows:
+        if row.stage not in stage_names:
+            stage_names.append(row.stage)
+
+    # A stage more than twice its median duration over the window is flagged
+    medians = {}
+    for name in stage_names:
+        durations = sorted(r[name].duration for r in by_run.values() if name in r)
+        medians[name] = durations[len(durations) // 2]
+
+    def series(name, value):
+        return [value(by_run[r.id][name]) if name in by_run.get(r.id, {}) else None for r in runs]
+
+    chart = {
+        "labels": [f"#{r.id}" for r in runs],
+        "durations": {n: series(n, lambda s: round(s.duration, 2)) for n in stage_names},
+        "throughput": {n: series(n, lambda s: round(s.items_out / s.duration, 2) if s.items_out and s.duration else 0)
+                       for n in stage_names},
+    }
+    return render_template('runs.html', runs=list(reversed(runs)), by_run=by_run, stages=stage_names,
+                           medians=medians, chart=chart)
+
+def wants_json():
+    return request.args.get('format') == 'json' or request.accept_mimetypes.best == 'application/json'
 
 @app.route('/run_pipeline', methods=['POST'])
 def trigger_pipeline():
-    """Manually trigger the pipeline in a background thread."""
-    def run_job():
-        print("Manual pipeline run started...")
-        run_pipeline()
-        print("Manual pipeline run finished.")
-        
-    thread = threading.Thread(target=run_job)
-    thread.start()
+    """
+    Manually trigger the pipeline. Triggers while a run is queued or running
+    join that run; poll /jobs/pipeline for its status.
+    """
+    job, created = pipeline_jobs.trigger()
+    if wants_json():
+        return jsonify({"job": job, "created": created, "status_url": url_for('pipeline_job_status')}), 202
+    if created:
+        flash("Pipeline run queued.", "info")
+    else:
+        flash(f"A pipeline run is already {job['status']}.", "warning")
     return redirect(url_for('index'))
 
+@app.route('/jobs/pipeline')
+def pipeline_job_status():
+    """Manual runs from this web process, plus the DB lock (which also covers scheduler runs)."""
+    with get_db_session() as db:
+        lock = db.get(RunLock, PIPELINE_LOCK)
+        lock_info = {
+            "held": bool(lock and lock.owner),
+            "owner": lock.owner if lock else None,
+            "acquired_at": lock.acquired_at.isoformat() if lock and lock.acquired_at else None,
+            "heartbeat_at": lock.heartbeat_at.isoformat() if lock and lock.heartbeat_at else None,
+        }
+    return jsonify({**pipeline_jobs.status(), "lock": lock_info})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint (metrics of pipeline runs started from this process)."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/twilio/status', methods=['POST'])
+def twilio_status_callback():
+    """
+    Twilio message status webhook. Buffered in memory and written to the
+    delivery ledger in batches, so no DB work happens per request. Only
+    requests signed with TWILIO_AUTH_TOKEN are accepted; without a token
+    configured, none are.
+    """
+    if not twilio_validator:
+        return "Status callbacks need TWILIO_AUTH_TOKEN", 403
+    # Twilio signs the public URL; behind a proxy request.url may differ, hence the setting
+    url = Config.TWILIO_STATUS_CALLBACK_URL or request.url
+    signature = request.headers.get('X-Twilio-Signature')
+    if not signature or not twilio_validator.validate(url, request.form, signature):
+        return "Invalid signature", 403
+
+    sid = request.form.get('MessageSid')
+    status = request.form.get('MessageStatus')
+    if not sid or not status:
+        return "MessageSid and MessageStatus required", 400
+
+    status_buffer.add(sid, status, request.form.get('ErrorCode') or None)
+    return "", 204
+
 @app.route('/subscribe', methods=['POST'])
 def subscribe_user():
     phone = request.form.get('phone')
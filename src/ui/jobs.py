@@ -0,0 +1,67 @@
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+from src.core.logger import setup_logger
+
+logger = setup_logger("ui_jobs")
+
+class JobRunner:
+    """
+    Runs one kind of background job from the web app, one at a time.
+
+    A trigger while a job is queued or running returns that job instead of
+    starting another, so a burst of clicks becomes a single run. `job` returns
+    False when it didn't run (the pipeline lock was held by another process);
+    that job is reported as "skipped".
+    """
+
+    def __init__(self, name: str, job: Callable[[], bool], history: int = 20):
+        self.name = name
+        self.job = job
+        self.lock = threading.Lock()
+        self.current: Optional[Dict] = None
+        self.recent = deque(maxlen=history)
+
+    def trigger(self) -> Tuple[Dict, bool]:
+        """Returns (job, created). created is False when an active job was reused."""
+        with self.lock:
+            if self.current and self.current["status"] in ("queued", "running"):
+                return dict(self.current), False
+            self.current = {
+                "id": uuid.uuid4().hex[:12],
+                "name": self.name,
+                "status": "queued",
+                "queued_at": datetime.utcnow().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+            }
+            self.recent.appendleft(self.current)
+            job = dict(self.current)
+        threading.Thread(target=self.run, args=(self.current,), name=f"job-{self.name}", daemon=True).start()
+        return job, True
+
+    def run(self, job: Dict):
+        self.update(job, status="running", started_at=datetime.utcnow().isoformat())
+        logger.info(f"{self.name} job {job['id']} started")
+        try:
+            ran = self.job()
+            status, error = ("finished" if ran is not False else "skipped"), None
+        except Exception as e:
+            logger.error(f"{self.name} job {job['id']} failed: {e}")
+            status, error = "failed", str(e)
+        self.update(job, status=status, error=error, finished_at=datetime.utcnow().isoformat())
+        logger.info(f"{self.name} job {job['id']} {status}")
+
+    def update(self, job: Dict, **fields):
+        with self.lock:
+            job.update(fields)
+
+    def status(self) -> Dict:
+        with self.lock:
+            return {
+                "current": dict(self.current) if self.current else None,
+                "recent": [dict(job) for job in self.recent],
+            }
@@ -0,0 +1,103 @@
+import atexit
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Tuple
+from sqlalchemy import and_, bindparam, or_, true, update
+from src.core.database import SessionLocal
+from src.core.models import Delivery
+from src.core.logger import setup_logger
+
+logger = setup_logger("status_callbacks")
+
+# Twilio message lifecycle. A callback never moves a message backwards.
+STATUS_RANK = {
+    "accepted": 0, "scheduled": 0, "queued": 1, "sending": 2, "sent": 3,
+    "delivered": 4, "undelivered": 5, "failed": 5, "read": 5, "canceled": 5,
+}
+
+class StatusCallbackBuffer:
+    """
+    In-memory buffer for Twilio status callbacks.
+
+    Requests only touch a dict (latest status per SID wins, by lifecycle rank);
+    a background thread flushes it to the delivery ledger in one transaction
+    every `interval` seconds, or sooner once `batch_size` SIDs are waiting.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pending: Dict[str, Tuple[str, str, datetime]] = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def add(self, sid: str, status: str, error_code: str = None):
+        status = (status or "").lower()
+        with self.lock:
+            current = self.pending.get(sid)
+            if current is None or STATUS_RANK.get(status, 0) >= STATUS_RANK.get(current[0], 0):
+                self.pending[sid] = (status, error_code, datetime.utcnow())
+            size = len(self.pending)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="status-callback-flusher", daemon=True)
+                self.thread.start()
+                atexit.register(self.flush)
+        if size >= self.batch_size:
+            self.wakeup.set()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Status callback flush failed: {e}", exc_info=True)
+                time.sleep(self.interval)
+
+    def flush(self) -> int:
+        with self.lock:
+            batch, self.pending = self.pending, {}
+        if not batch:
+            return 0
+
+        # One executemany per status, each guarded so older statuses never overwrite newer ones
+        by_status = {}
+        for sid, (status, error_code, received_at) in batch.items():
+            by_status.setdefault(status, []).append(
+                {"b_sid": sid, "b_error": error_code, "b_updated_at": received_at}
+            )
+
+        table = Delivery.__table__
+        try:
+            with SessionLocal() as db:
+                for status, rows in by_status.items():
+                    newer = [s for s, rank in STATUS_RANK.items() if rank > STATUS_RANK.get(status, 0)]
+                    # Plain != terms: expanding IN parameters can't be used with executemany
+                    not_newer = or_(
+                        table.c.provider_status.is_(None),
+                        and_(*[table.c.provider_status != s for s in newer])
+                    ) if newer else true()
+                    stmt = update(table).where(
+                        table.c.message_sid == bindparam("b_sid"),
+                        not_newer
+                    ).values(
+                        provider_status=status,
+                        provider_error_code=bindparam("b_error"),
+                        provider_updated_at=bindparam("b_updated_at")
+                    )
+                    db.execute(stmt, rows)
+                db.commit()
+        except Exception:
+            # Put the batch back (without clobbering anything newer) so the next flush retries it
+            with self.lock:
+                for sid, entry in batch.items():
+                    current = self.pending.get(sid)
+                    if current is None or STATUS_RANK.get(entry[0], 0) > STATUS_RANK.get(current[0], 0):
+                        self.pending[sid] = entry
+            raise
+
+        logger.debug(f"Flushed {len(batch)} status callbacks.")
+        return len(batch)
@@ -0,0 +1,87 @@
+"""
+Lease-based pipeline worker. Run as many as you like, on one or several
+machines sharing DATABASE_URL:
+
+    python -m src.worker                                  # every LLM stage
+    python -m src.worker --stages relevance,synthesis     # just these
+
+Each round the worker leases a batch of items waiting at a stage, processes
+them one by one and releases each lease in the same transaction as the
+item's results. A worker that dies leaves its leases to expire after
+WORKER_LEASE_SECONDS, at which point another worker re-claims the items.
+"""
+import argparse
+import os
+import socket
+import time
+from typing import List
+from src.core.config import Config
+from src.core.database import SessionLocal, init_db
+from src.core.leases import LeaseLost, claim
+from src.core.logger import setup_logger
+from src.core import metrics
+from src.streaming import Stage, build_stages
+
+logger = setup_logger("worker")
+
+class Worker:
+    def __init__(self, stages: List[Stage], batch_size: int, lease_seconds: int, idle_seconds: float):
+        self.stages = stages
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.idle_seconds = idle_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    def run(self, once: bool = False):
+        logger.info(f"Worker {self.owner} started for stages: {', '.join(s.name for s in self.stages)}")
+        while True:
+            claimed = sum(self.run_stage(stage) for stage in self.stages)
+            if claimed == 0:
+                if once:
+                    return
+                time.sleep(self.idle_seconds)
+
+    def run_stage(self, stage: Stage) -> int:
+        with SessionLocal() as db:
+            limit = stage.room(db, self.batch_size)
+            if not limit:
+                return 0
+            token, item_ids = claim(db, stage.name, stage.pending, self.owner, limit, self.lease_seconds)
+        if item_ids:
+            logger.info(f"{stage.name}: claimed {len(item_ids)} items ({token}).")
+
+        for item_id in item_ids:
+            try:
+                stage.process(item_id, token)
+                metrics.ITEMS_PROCESSED.inc(stage.name)
+            except LeaseLost as e:
+                logger.warning(str(e))
+            except Exception as e:
+                logger.error(f"{stage.name} failed on {item_id}: {e}")
+        return len(item_ids)
+
+def main():
+    stages = build_stages()
+    names = [stage.name for stage in stages]
+
+    parser = argparse.ArgumentParser(description="Lease-based pipeline worker")
+    parser.add_argument("--stages", default=",".join(names), help=f"Comma-separated subset of: {', '.join(names)}")
+    parser.add_argument("--batch", type=int, default=Config.WORKER_BATCH_SIZE)
+    parser.add_argument("--once", action="store_true", help="Exit when no stage has work instead of polling")
+    args = parser.parse_args()
+
+    selected = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(selected) - set(names)
+    if unknown:
+        parser.error(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+    init_db()
+    if Config.METRICS_PORT:
+        metrics.serve(Config.METRICS_PORT)
+    Worker(
+        [stage for stage in stages if stage.name in selected],
+        args.batch, Config.WORKER_LEASE_SECONDS, Config.WORKER_IDLE_SECONDS
+    ).run(once=args.once)
+
+if __name__ == "__main__":
+    main()
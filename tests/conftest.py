@@ -0,0 +1,70 @@
+"""
+Tests run against a throwaway SQLite file, recreated for each test that asks
+for the `db` fixture. The environment has to be set before src.core.config
+is imported, hence at the top of this module.
+"""
+import itertools
+import os
+import tempfile
+
+TEST_DIR = tempfile.mkdtemp(prefix="signal_digest_tests_")
+DB_PATH = os.path.join(TEST_DIR, "test.db")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{DB_PATH}",
+    ARCHIVE_DIR=os.path.join(TEST_DIR, "archive"),
+    LOG_LEVEL="WARNING",
+    # Empty rather than unset, so a developer's .env can't fill them in
+    OPENAI_API_KEY="",
+    GEMINI_API_KEY="",
+    TWILIO_ACCOUNT_SID="",
+    TWILIO_AUTH_TOKEN="",
+    TWILIO_STATUS_CALLBACK_URL="",
+)
+
+import pytest
+from src.core.database import SessionLocal, engine, init_db
+from src.core.models import Content
+
+def reset_database():
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+
+@pytest.fixture
+def empty_db():
+    """An engine on a database with no tables at all."""
+    reset_database()
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db():
+    """A session on a freshly initialized database."""
+    reset_database()
+    init_db()
+    with SessionLocal() as session:
+        yield session
+    engine.dispose()
+
+@pytest.fixture
+def add_content(db):
+    """
+    add_content(count=1, **fields) adds and commits `count` Content rows and
+    returns them. A field given as a callable is called with the row's number,
+    which runs on across calls so titles and URLs stay unique within a test.
+    """
+    numbers = itertools.count()
+
+    def add(count=1, **fields):
+        items = []
+        for n in itertools.islice(numbers, count):
+            values = {"source": "arxiv", "type": "research", "title": f"Item {n}",
+                      "url": f"https://example.com/{n}", "abstract_or_body": "Body."}
+            values.update({name: value(n) if callable(value) else value for name, value in fields.items()})
+            items.append(Content(**values))
+        db.add_all(items)
+        db.commit()
+        return items
+
+    return add
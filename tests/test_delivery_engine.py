@@ -0,0 +1,82 @@
+import threading
+import pytest
+from requests import ConnectionError as RequestsConnectionError
+from twilio.base.exceptions import TwilioRestException
+from src.agents import delivery_engine
+from src.agents.delivery_engine import DeliveryEngine, TokenBucket, is_retryable
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(delivery_engine, "time", clock)
+    return clock
+
+def test_bucket_allows_a_burst_then_holds_the_rate(clock):
+    # Rates with exact binary fractions, so the fake clock adds up exactly
+    bucket = TokenBucket(rate=4, capacity=2)
+    for _ in range(2):
+        bucket.acquire()
+    assert clock.now == 0
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.now == 1.0
+    # Idle time refills up to the capacity only
+    clock.now += 60
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.now == 61.25
+
+@pytest.mark.parametrize("error, retryable", [
+    (TwilioRestException(429, "/Messages.json", "Too Many Requests"), True),
+    (TwilioRestException(503, "/Messages.json", "Unavailable"), True),
+    (TwilioRestException(400, "/Messages.json", "Invalid number"), False),
+    (RequestsConnectionError("reset"), True),
+    (TimeoutError("timed out"), True),
+    (TypeError("send() got an unexpected keyword"), False),
+    (KeyError("sid"), False),
+])
+def test_is_retryable(error, retryable):
+    assert is_retryable(error) is retryable
+
+def test_a_failing_recipient_does_not_stop_the_others():
+    calls, lock = [], threading.Lock()
+    flaky = iter([TwilioRestException(503, "/Messages.json", "Unavailable")])
+
+    def send(body, to):
+        with lock:
+            calls.append((to, body))
+        if to == "+invalid":
+            raise TwilioRestException(400, "/Messages.json", "Invalid number")
+        if to == "+bug":
+            raise KeyError("sid")
+        if to == "+flaky":
+            error = next(flaky, None)
+            if error:
+                raise error
+        return f"SM-{to}-{body}"
+
+    engine = DeliveryEngine(send, rate=1000, concurrency=4, max_attempts=3)
+    jobs = [("+ok", ["p0", "p1"]), ("+invalid", ["p0", "p1"]), ("+bug", ["p0"]), ("+flaky", ["p0"])]
+    report = engine.broadcast(jobs)
+
+    results = {(job, part): (sid, attempts, type(error).__name__ if error else None)
+               for job, part, sid, attempts, error in report.results}
+    assert results == {
+        (0, 0): ("SM-+ok-p0", 1, None), (0, 1): ("SM-+ok-p1", 1, None),
+        (1, 0): (None, 1, "TwilioRestException"),
+        (2, 0): (None, 1, "KeyError"),
+        (3, 0): ("SM-+flaky-p0", 2, None),
+    }
+    assert sorted(report.failed) == ["+bug", "+invalid"]
+    assert (report.sent, report.retries) == (3, 1)
+    assert ("+invalid", "p1") not in calls
@@ -0,0 +1,90 @@
+from twilio.base.exceptions import TwilioRestException
+from src.agents.delivery import DeliveryAgent
+from src.core.config import Config
+from src.core.lifecycle import ItemStage
+from src.core.models import Content, Delivery, Digest, User
+
+class Rejected(TwilioRestException):
+    def __init__(self, message):
+        super().__init__(400, "/Messages.json", message)
+
+def make_agent(sent, fail_parts=()):
+    """A delivery agent whose sends are recorded in `sent` instead of reaching Twilio."""
+    agent = DeliveryAgent("test_delivery")
+
+    def send(body, to):
+        if body in fail_parts:
+            raise Rejected(f"Rejected {body}")
+        sent.append((to, body))
+        return f"SM{len(sent)}"
+
+    agent.send_whatsapp = send
+    return agent
+
+def add_digest(db, add_content, parts, phones=("+100",), attempts=0):
+    [item] = add_content(stage=ItemStage.QUEUED)
+    digest = Digest(id="d1", item_ids=[item.id], parts=parts)
+    db.add(digest)
+    for phone in phones:
+        user = User(phone_number=phone)
+        db.add(user)
+        db.flush()
+        for part in range(len(parts)):
+            db.add(Delivery(user_id=user.id, digest_id="d1", part=part, status="PENDING", attempts=attempts))
+    db.commit()
+    return item
+
+def statuses(db):
+    return [status for (status,) in db.query(Delivery.status).order_by(Delivery.user_id, Delivery.part)]
+
+def test_recover_interrupted_parks_sending_rows(db, add_content):
+    add_digest(db, add_content, ["p0"])
+    db.query(Delivery).update({"status": "SENDING"})
+    db.commit()
+    sent = []
+    agent = make_agent(sent)
+    agent.recover_interrupted(db)
+    agent.send_pending(db)
+    assert statuses(db) == ["UNKNOWN"]
+    assert sent == []
+
+def test_send_pending_sends_each_part_once(db, add_content):
+    add_digest(db, add_content, ["p0", "p1"], phones=("+100", "+200"))
+    sent = []
+    agent = make_agent(sent)
+    assert agent.send_pending(db).sent == 4
+    assert agent.send_pending(db).sent == 0
+    assert sorted(sent) == [("+100", "p0"), ("+100", "p1"), ("+200", "p0"), ("+200", "p1")]
+    assert statuses(db) == ["SENT"] * 4
+
+def test_rejected_part_cancels_later_parts(db, add_content):
+    add_digest(db, add_content, ["p0", "p1", "p2"])
+    sent = []
+    make_agent(sent, fail_parts={"p1"}).send_pending(db)
+    assert sent == [("+100", "p0")]
+    assert statuses(db) == ["SENT", "FAILED", "CANCELLED"]
+
+def test_exhausted_rows_fail_and_cancel_siblings(db, add_content):
+    item = add_digest(db, add_content, ["p0", "p1"])
+    db.query(Delivery).filter(Delivery.part == 0).update({"attempts": Config.DELIVERY_MAX_ATTEMPTS})
+    db.commit()
+    sent = []
+    agent = make_agent(sent)
+    agent.send_pending(db)
+    agent.finalize_items(db)
+    db.commit()
+    assert sent == []
+    assert statuses(db) == ["FAILED", "CANCELLED"]
+    assert db.get(Content, item.id).stage == ItemStage.DELIVERED
+
+def test_later_part_waits_for_earlier_part_in_another_chunk(db, add_content, monkeypatch):
+    add_digest(db, add_content, ["p0", "p1"])
+    # p0 comes after p1 in id order, so the first one-row chunk holds only p1
+    p0, p1 = db.query(Delivery).order_by(Delivery.part).all()
+    p0.id, p1.id = 20, 10
+    db.commit()
+    monkeypatch.setattr(Config, "DELIVERY_CHUNK_SIZE", 1)
+    sent = []
+    make_agent(sent).send_pending(db)
+    assert sent == [("+100", "p0")]
+    assert statuses(db) == ["SENT", "PENDING"]
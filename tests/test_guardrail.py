@@ -0,0 +1,75 @@
+import json
+import re
+from types import SimpleNamespace
+from src.agents import guardrail
+from src.agents.guardrail import QualityGuardrailAgent
+from src.core.lifecycle import ItemStage
+from src.core.models import Content
+
+# Rules leave these UNCERTAIN (an unknown name, nothing else), so they reach the critic
+SUMMARY = dict(
+    abstract_or_body="A cache that cuts memory use by 40%.", stage=ItemStage.SYNTHESIZED,
+    summary_headline="Cache Cuts Memory by 40%", summary_tldr="The cache cuts memory use by 40%.",
+    summary_highlights=["Cuts memory use", "Built by Anthropic", "No accuracy loss"],
+    summary_why_matters="Cheaper serving.",
+)
+
+class FakeCritic:
+    """Answers with `verdict(id)` for each id asked about, skipping None; records the ids of each request."""
+
+    def __init__(self, verdict):
+        self.verdict = verdict
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **kwargs):
+        ids = [int(i) for i in re.findall(r"### Item id=(\d+)", messages[-1]["content"])]
+        self.requests.append(ids)
+        results = [self.verdict(i) for i in ids]
+        content = json.dumps({"results": [r for r in results if r is not None]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+def use_critic(monkeypatch, verdict):
+    critic = FakeCritic(verdict)
+    monkeypatch.setattr(guardrail, "openai_client", lambda: critic)
+    return critic
+
+def test_critic_results_are_parsed(monkeypatch):
+    use_critic(monkeypatch, lambda i: [
+        {"id": "1", "score": 8, "flag": "OK", "reason": "Fine"},
+        {"id": 2},
+        {"id": "x", "score": 3},
+        {"score": 2},
+    ][i - 1])
+    items = [Content(id=i, **SUMMARY) for i in range(1, 5)]
+    results = QualityGuardrailAgent("test_guardrail").call_critic(items)
+    assert results == {1: (8.0, "OK", "Fine"), 2: (5.0, "OK", "No reason provided")}
+
+def test_unchanged_summary_reuses_the_critic_verdict(db, add_content, monkeypatch):
+    critic = use_critic(monkeypatch, lambda i: {"id": i, "score": 8, "flag": "OK", "reason": "Grounded"})
+    [item] = add_content(**SUMMARY)
+    assert QualityGuardrailAgent("test_guardrail").run() == 1
+    assert critic.requests == [[item.id]]
+
+    # Re-validated with the same summary: no critic call
+    db.query(Content).update({Content.stage: ItemStage.SYNTHESIZED})
+    db.commit()
+    assert QualityGuardrailAgent("test_guardrail").run() == 1
+    assert critic.requests == [[item.id]]
+    db.refresh(item)
+    assert (item.stage, item.validation_path, item.validation_reason) == (ItemStage.PASSED, "CRITIC", "Grounded")
+
+    db.query(Content).update({Content.stage: ItemStage.SYNTHESIZED, Content.summary_tldr: "Memory use drops by 40%."})
+    db.commit()
+    assert QualityGuardrailAgent("test_guardrail").run() == 1
+    assert critic.requests == [[item.id], [item.id]]
+
+def test_items_missing_from_the_response_are_asked_again_then_left_for_retry(db, add_content, monkeypatch):
+    answered, missing = add_content(2, **SUMMARY)
+    critic = use_critic(monkeypatch, lambda i: {"id": i, "score": 9} if i == answered.id else None)
+    assert QualityGuardrailAgent("test_guardrail").run() == 1
+    assert critic.requests == [[answered.id, missing.id], [missing.id]]
+    db.expire_all()
+    assert answered.stage == ItemStage.PASSED and answered.lease_owner is None
+    assert missing.stage == ItemStage.SYNTHESIZED and missing.lease_owner is not None
+    assert missing.validation_path is None
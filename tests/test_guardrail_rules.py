@@ -0,0 +1,47 @@
+from src.agents.guardrail_rules import FAIL, PASS, UNCERTAIN, GuardrailRules
+from src.core.models import Content
+
+SOURCE = ("FlashKV: a Transformer cache for long contexts. FlashKV compresses the key-value cache, "
+          "cutting memory use by 40% at a 128k-token context with no loss in accuracy.")
+
+def summary(**fields):
+    values = dict(
+        source="arxiv", url="https://arxiv.org/abs/1", title="FlashKV", abstract_or_body=SOURCE,
+        summary_headline="FlashKV Cuts Long-Context Memory by 40%",
+        summary_tldr="The FlashKV Transformer cache cuts memory use by 40% at 128k tokens.",
+        summary_highlights=["Compresses the key-value cache", "No accuracy loss", "Targets 128k contexts"],
+        summary_why_matters="For AI Engineers building RAG pipelines on Kubernetes, this lowers GPU cost.",
+    )
+    values.update(fields)
+    return Content(**values)
+
+def evaluate(**fields):
+    return GuardrailRules(banned_sources=[]).evaluate(summary(**fields))
+
+def test_faithful_summary_passes():
+    verdict = evaluate()
+    assert (verdict.decision, verdict.reason) == (PASS, "OK")
+
+def test_why_it_matters_is_not_grounded():
+    # Commentary may name things the source doesn't; hype in it still counts
+    assert evaluate(summary_why_matters="Teams on Azure save 75% of their bill.").decision == PASS
+    assert evaluate(summary_why_matters="A revolutionary, game-changing result.").decision == FAIL
+
+def test_acronyms_and_common_vocabulary_are_not_claims():
+    verdict = evaluate(summary_tldr="For AI Engineers and LLM Researchers, the FlashKV Transformer cuts GPU memory 40%.")
+    assert verdict.decision == PASS
+
+def test_unknown_names_alone_are_uncertain():
+    verdict = evaluate(summary_highlights=["Built by Anthropic", "Tested with Mistral and Cohere", "Targets 128k contexts"])
+    assert verdict.decision == UNCERTAIN
+    assert verdict.reason == "Unsupported claims: Anthropic, Mistral, Cohere"
+
+def test_invented_figures_fail():
+    verdict = evaluate(summary_tldr="FlashKV from Anthropic cuts memory by 75% across 64 GPUs.")
+    assert (verdict.decision, verdict.flag) == (FAIL, "HALLUCINATION")
+    assert verdict.reason == "Unsupported claims: 75%, 64, Anthropic"
+
+def test_structure_and_banned_sources_fail():
+    assert evaluate(summary_highlights=[]).flag == "FORMAT"
+    verdict = GuardrailRules(banned_sources=["arxiv.org"]).evaluate(summary())
+    assert (verdict.decision, verdict.flag) == (FAIL, "SPAM")
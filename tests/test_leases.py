@@ -0,0 +1,66 @@
+import time
+from src.agents.relevance import RelevanceDecisionAgent
+from src.core.config import Config
+from src.core.database import SessionLocal
+from src.core.leases import claim, is_parked, release
+from src.core.lifecycle import ItemStage
+from src.core.models import Content
+
+NEW = (Content.stage == ItemStage.NEW,)
+
+def test_concurrent_claims_are_disjoint(db, add_content):
+    ids = [item.id for item in add_content(5)]
+    _, first = claim(db, "relevance", NEW, "a", 3, 300)
+    _, second = claim(db, "relevance", NEW, "b", 3, 300)
+    assert first == ids[:3]
+    assert second == ids[3:]
+
+def test_claim_order(db, add_content):
+    ids = [item.id for item in add_content(5, priority_score=lambda n: n / 10)]
+    _, claimed = claim(db, "synthesis", (), "a", 2, 300, order_by=(Content.priority_score.desc(),))
+    assert sorted(claimed) == ids[3:]
+
+def test_expired_lease_is_reclaimed_and_release_needs_the_current_token(db, add_content):
+    item_id = add_content()[0].id
+    stale_token, _ = claim(db, "relevance", NEW, "a", 1, 0)
+    time.sleep(0.01)
+    token, claimed = claim(db, "relevance", NEW, "b", 1, 300)
+    assert claimed == [item_id]
+    assert not release(db, item_id, stale_token)
+    assert release(db, item_id, token)
+    db.commit()
+    item = db.get(Content, item_id)
+    assert (item.lease_owner, item.lease_attempts) == (None, 0)
+
+def test_item_is_parked_after_max_attempts(db, add_content, monkeypatch):
+    monkeypatch.setattr(Config, "WORKER_MAX_ATTEMPTS", 2)
+    item_id = add_content()[0].id
+    for _ in range(2):
+        assert claim(db, "relevance", NEW, "a", 1, 0)[1] == [item_id]
+        time.sleep(0.01)
+    assert claim(db, "relevance", NEW, "a", 1, 0)[1] == []
+    assert is_parked(db, item_id)
+
+def test_batch_agent_skips_items_leased_elsewhere(db, add_content):
+    ids = [item.id for item in add_content(3)]
+    with SessionLocal() as other:
+        claim(other, "relevance", (Content.id == ids[0],), "worker", 1, 300)
+    assert RelevanceDecisionAgent("relevance").run() == 2
+    db.expire_all()
+    stages = {item.id: (item.stage, item.lease_owner) for item in db.query(Content)}
+    assert stages[ids[0]][0] == ItemStage.NEW
+    assert stages[ids[1]] == stages[ids[2]] == (ItemStage.RELEVANT, None)
+
+def test_batch_agent_keeps_the_lease_of_failed_items(db, add_content):
+    item_id = add_content()[0].id
+    agent = RelevanceDecisionAgent("relevance")
+    def fail(item):
+        raise RuntimeError("LLM down")
+    agent.evaluate_relevance = fail
+    assert agent.run() == 0
+    db.expire_all()
+    item = db.get(Content, item_id)
+    assert item.stage == ItemStage.NEW
+    assert item.lease_owner is not None and item.lease_attempts == 1
+    # Not retried before the lease expires
+    assert RelevanceDecisionAgent("relevance").run() == 0
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+import pytest
+from src.core.lifecycle import ItemStage
+from src.core.listing import ContentFilter, page
+from src.core.models import Content
+
+START = datetime(2026, 3, 1, 12, 0)
+
+@pytest.fixture
+def add_items(add_content):
+    # Pairs of items share a fetched_at, so the id has to break ties
+    return lambda count: add_content(count, source=lambda n: "arxiv" if n % 2 else "techcrunch",
+                                     fetched_at=lambda n: START + timedelta(hours=n // 2))
+
+def walk(db, content_filter, limit):
+    seen, after = [], None
+    while True:
+        items, after = page(db.query(Content), content_filter, after, limit)
+        seen.append([item.id for item in items])
+        if after is None:
+            return seen
+
+def newest_first(db, *criteria):
+    rows = db.query(Content).filter(*criteria).order_by(Content.fetched_at.desc(), Content.id.desc())
+    return [item.id for item in rows]
+
+def test_pages_are_disjoint_and_cover_every_row_in_order(db, add_items):
+    add_items(11)
+    pages = walk(db, ContentFilter(), limit=3)
+    assert [len(ids) for ids in pages] == [3, 3, 3, 2]
+    assert sum(pages, []) == newest_first(db)
+
+def test_ties_on_fetched_at_are_broken_by_id(db, add_items):
+    add_items(4)
+    first, cursor = page(db.query(Content), ContentFilter(), limit=1)
+    second, _ = page(db.query(Content), ContentFilter(), cursor, limit=1)
+    assert first[0].fetched_at == second[0].fetched_at
+    assert first[0].id > second[0].id
+
+def test_last_page_has_no_cursor(db, add_items):
+    add_items(3)
+    assert page(db.query(Content), ContentFilter(), limit=3)[1] is None
+    assert page(db.query(Content), ContentFilter(), limit=2)[1] is not None
+
+def test_malformed_cursor_starts_from_the_top(db, add_items):
+    add_items(3)
+    for cursor in ("garbage", "2026-03-01:x", ":12"):
+        items, _ = page(db.query(Content), ContentFilter(), cursor)
+        assert [item.id for item in items] == newest_first(db)
+
+def test_filters_apply_across_pages(db, add_items):
+    add_items(10)
+    db.query(Content).filter(Content.id % 3 == 0).update({Content.stage: ItemStage.RELEVANT,
+                                                          Content.relevance_label: "AGENTIC_AI"})
+    db.commit()
+    cases = [
+        (ContentFilter(source="arxiv"), (Content.source == "arxiv",)),
+        (ContentFilter(stage="relevant"), (Content.stage == ItemStage.RELEVANT,)),
+        (ContentFilter(status="relevant"), (Content.stage == ItemStage.RELEVANT,)),
+        (ContentFilter(label="agentic_ai"), (Content.relevance_label == "AGENTIC_AI",)),
+        (ContentFilter(since="2026-03-01", until="2026-03-01"), (Content.fetched_at < START + timedelta(hours=12),)),
+        (ContentFilter(since="2026-03-02"), (Content.id < 0,)),
+    ]
+    for content_filter, criteria in cases:
+        assert sum(walk(db, content_filter, limit=2), []) == newest_first(db, *criteria)
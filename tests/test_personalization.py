@@ -0,0 +1,41 @@
+from src.agents.personalization import DigestIndex
+from src.core.models import Content, User
+
+def index():
+    return DigestIndex([
+        Content(id=1, relevance_label="AGENTIC_AI", topics=["Agents"]),
+        Content(id=2, relevance_label="RESEARCH", topics=["efficiency", " agents "]),
+        Content(id=3, relevance_label="RESEARCH", topics=[]),
+    ])
+
+def ids(digest, selected):
+    return [item.id for item in digest.items_for(selected)]
+
+def test_user_mask_and_item_set():
+    digest = index()
+    assert ids(digest, digest.item_set(digest.user_mask(["agents"]))) == [1, 2]
+    assert ids(digest, digest.item_set(digest.user_mask(["Research", "unknown"]))) == [2, 3]
+    assert digest.user_mask(["unknown"]) == 0 and digest.item_set(0) == 0
+    assert digest.user_mask([]) == digest.user_mask(None) == -1
+    assert ids(digest, digest.item_set(-1)) == [1, 2, 3]
+
+def test_users_are_grouped_by_item_set():
+    digest = index()
+    users = [User(id=1, topic_preferences=["agents", "efficiency"]), User(id=2, topic_preferences=["Efficiency", "AGENTS"]),
+             User(id=3, topic_preferences=["agentic_ai"]), User(id=4, topic_preferences=[])]
+    groups = {tuple(ids(digest, selected)): [u.id for u in group] for selected, group in digest.group_users(users).items()}
+    assert groups == {(1, 2): [1, 2], (1,): [3], (1, 2, 3): [4]}
+
+def test_users_matching_nothing_get_the_full_digest():
+    digest = index()
+    groups = digest.group_users([User(id=1, topic_preferences=["robotics"]), User(id=2)])
+    assert [(ids(digest, selected), [u.id for u in group]) for selected, group in groups.items()] == [([1, 2, 3], [1, 2])]
+    assert digest.unmatched_users == 1
+
+def test_preference_cache_ignores_order_and_case(monkeypatch):
+    digest = index()
+    calls = []
+    user_mask = digest.user_mask
+    monkeypatch.setattr(digest, "user_mask", lambda preferences: calls.append(preferences) or user_mask(preferences))
+    digest.group_users([User(id=1, topic_preferences=["agents", "research"]), User(id=2, topic_preferences=["Research", "agents"])])
+    assert len(calls) == 1
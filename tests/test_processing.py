@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta
+from src import main
+from src.core.config import Config
+from src.core.models import PipelineRun
+
+def passes(monkeypatch):
+    started = []
+    monkeypatch.setattr(main, "run_exclusive", lambda name, run, **kwargs: started.append(name))
+    main.run_processing()
+    return started
+
+def test_parked_and_leased_items_do_not_start_a_pass(db, add_content, monkeypatch):
+    add_content(lease_attempts=Config.WORKER_MAX_ATTEMPTS)
+    add_content(lease_owner="worker/1", lease_stage="relevance", lease_expires_at=datetime.utcnow() + timedelta(minutes=5))
+    for _ in range(3):
+        main.run_processing()
+    assert db.query(PipelineRun).count() == 0
+    assert passes(monkeypatch) == []
+
+def test_claimable_item_starts_a_pass(db, add_content, monkeypatch):
+    add_content(lease_owner="worker/1", lease_stage="relevance", lease_expires_at=datetime.utcnow() - timedelta(minutes=5))
+    assert passes(monkeypatch) == ["processing"]
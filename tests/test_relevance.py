@@ -0,0 +1,30 @@
+import json
+from types import SimpleNamespace
+from src.agents import relevance
+from src.agents.relevance import RelevanceDecisionAgent
+from src.core.config import Config
+from src.core.models import Content
+
+class FakeModel:
+    requests = []
+
+    def __init__(self, model_name, system_instruction=None, generation_config=None):
+        self.model_name = model_name
+        self.generation_config = generation_config
+
+    def generate_content(self, text):
+        FakeModel.requests.append((self.model_name, self.generation_config["response_mime_type"], text))
+        payload = {"label": "AGENTIC_AI", "confidence_score": 0.82, "reason": "Agent benchmark."}
+        return SimpleNamespace(text=json.dumps(payload),
+                               usage_metadata=SimpleNamespace(prompt_token_count=12, candidates_token_count=3))
+
+def test_gemini_classifies_when_openai_is_not_configured(monkeypatch):
+    monkeypatch.setattr(Config, "GEMINI_API_KEY", "gemini-key")
+    monkeypatch.setattr(relevance, "openai_client", lambda: None)
+    monkeypatch.setattr(relevance, "gemini", lambda: SimpleNamespace(GenerativeModel=FakeModel))
+    item = Content(title="Agents", source="arxiv", abstract_or_body="An agent benchmark.")
+
+    result = RelevanceDecisionAgent("relevance").evaluate_relevance(item)
+
+    assert (result.label, result.confidence_score) == ("AGENTIC_AI", 0.82)
+    assert FakeModel.requests == [(Config.GEMINI_MODEL, "application/json", "Title: Agents\nSource: arxiv\nContent: An agent benchmark.")]
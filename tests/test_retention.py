@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+import pytest
+from src.core import retention
+from src.core.config import Config
+from src.core.lifecycle import ItemStage
+from src.core.models import ArchivedContent, Content
+
+OLD = datetime.utcnow() - timedelta(days=Config.RETENTION_DAYS + 30)
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "STATIC_SITE_DIR", tmp_path / "docs")
+    return tmp_path / "docs" / "item"
+
+@pytest.fixture
+def add(add_content):
+    def add(stage, fetched_at=OLD, parent=None):
+        return add_content(stage=stage, fetched_at=fetched_at, summary_parent_id=parent)[0].id
+    return add
+
+def remaining(db):
+    db.expire_all()
+    return sorted(item_id for (item_id,) in db.query(Content.id))
+
+def test_finished_old_items_are_archived(db, add, site):
+    delivered = add(ItemStage.DELIVERED)
+    stale = add(ItemStage.PRIORITIZED)
+    fresh = add(ItemStage.DELIVERED, fetched_at=datetime.utcnow())
+    pending = add(ItemStage.SYNTHESIZED)
+
+    assert sum(retention.archive_old_content().values()) == 2
+    assert remaining(db) == [fresh, pending]
+    assert retention.is_archived(db, "https://EXAMPLE.com/0/?utm_source=x")
+    assert db.query(ArchivedContent).count() == 2
+    assert (Config.ARCHIVE_DIR / f"content-{OLD:%Y-%m}.jsonl.gz").stat().st_size > 0
+
+def test_merged_items_wait_for_their_lead(db, add, site):
+    lead = add(ItemStage.PASSED, fetched_at=datetime.utcnow())
+    member = add(ItemStage.MERGED, parent=lead)
+    retention.archive_old_content()
+    assert remaining(db) == [lead, member]
+
+    db.query(Content).filter(Content.id == lead).update({"stage": ItemStage.DELIVERED})
+    db.commit()
+    retention.archive_old_content()
+    assert remaining(db) == [lead]
+
+def test_lead_waits_for_its_members(db, add, site):
+    lead = add(ItemStage.DELIVERED)
+    member = add(ItemStage.MERGED, fetched_at=datetime.utcnow(), parent=lead)
+    retention.archive_old_content()
+    assert remaining(db) == [lead, member]
+
+def test_static_pages_of_archived_items_are_removed(db, add, site):
+    archived = add(ItemStage.DELIVERED)
+    kept = add(ItemStage.SYNTHESIZED)
+    for item_id in (archived, kept):
+        (site / str(item_id)).mkdir(parents=True)
+        (site / str(item_id) / "index.html").write_text("page")
+    (site / f"{archived}.html").write_text("page")
+
+    retention.archive_old_content()
+    assert sorted(p.name for p in site.iterdir()) == [str(kept)]
@@ -0,0 +1,32 @@
+from datetime import datetime
+from src.core.models import PipelineRun, StageRun
+from src.core.run_history import stage_totals
+from src.ui import app as app_module
+
+def stage_run(run_id, stage, duration, items_out, tokens=None, status="OK"):
+    now = datetime.utcnow()
+    return StageRun(pipeline_run_id=run_id, stage=stage, status=status, started_at=now, finished_at=now,
+                    duration=duration, items_out=items_out, errors=0, llm_tokens_in=tokens)
+
+def test_repeated_passes_are_summed():
+    totals = stage_totals([
+        stage_run(1, "relevance", 2.0, 10, tokens=100),
+        stage_run(1, "synthesis", 1.0, 0),
+        stage_run(1, "relevance", 3.0, 4, tokens=50, status="ERROR"),
+        stage_run(2, "relevance", 1.0, None),
+    ])
+    relevance = totals[1]["relevance"]
+    assert (relevance.passes, relevance.duration, relevance.items_out, relevance.llm_tokens_in) == (2, 5.0, 14, 150)
+    assert relevance.status == "ERROR"
+    assert list(totals[1]) == ["relevance", "synthesis"]
+    assert totals[2]["relevance"].items_out is None
+
+def test_runs_page_shows_summed_passes(db):
+    run = PipelineRun(mode="process", status="OK", started_at=datetime.utcnow())
+    db.add(run)
+    db.flush()
+    db.add_all([stage_run(run.id, "relevance", 2.0, 10), stage_run(run.id, "relevance", 3.0, 4)])
+    db.commit()
+    html = app_module.app.test_client().get("/runs/").get_data(as_text=True)
+    assert "5.0s / 14" in html
+    assert "2 passes" in html
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+import pytest
+from src.core.models import RunLock
+from src.core.run_lock import RunLockHeld, holder, run_lock
+from src.main import run_exclusive
+
+def test_second_holder_is_refused_until_release(db):
+    with run_lock("pipeline") as owner:
+        assert holder("pipeline").owner == owner
+        with pytest.raises(RunLockHeld):
+            with run_lock("pipeline"):
+                pass
+    assert holder("pipeline").owner is None
+    with run_lock("pipeline"):
+        pass
+
+def test_stale_holder_is_taken_over(db):
+    db.add(RunLock(name="pipeline", owner="crashed:1/abc", acquired_at=datetime.utcnow(),
+                   heartbeat_at=datetime.utcnow() - timedelta(minutes=10)))
+    db.commit()
+    with run_lock("pipeline", stale_after=60) as owner:
+        assert holder("pipeline").owner == owner
+
+def test_locks_are_independent_by_name(db):
+    with run_lock("pipeline"):
+        with run_lock("clustering"):
+            pass
+
+def test_run_exclusive_skips_while_held(db):
+    calls = []
+    with run_lock("pipeline"):
+        assert run_exclusive("test", lambda: calls.append(1)) is False
+    assert run_exclusive("test", lambda: calls.append(1)) is True
+    assert calls == [1]
@@ -0,0 +1,51 @@
+import pytest
+from src.core.models import Content
+from src.core.search import fts5_query, search
+
+@pytest.mark.parametrize("q, expected", [
+    ("agent memory", '"agent" "memory"*'),
+    ('"tool use" agents', '"tool use" "agents"*'),
+    ("c++ AND (x OR y*", '"c++" "AND" "(x" "OR" "y*"*'),
+    ('say "hi', '"say" "hi"*'),
+    ('"" ', ""),
+])
+def test_fts5_query_quotes_every_term(q, expected):
+    assert fts5_query(q) == expected
+
+def test_operators_and_punctuation_are_searched_literally(db, add_content):
+    add_content(title="Agents OR robots")
+    for q in ["NEAR(agents", "agents AND", 'agents"', "-robots", "title:agents", "*"]:
+        search(db, q)
+    assert search(db, '"" ') == ([], None)
+
+def test_pages_are_disjoint_and_ranked(db, add_content):
+    # More mentions of "cache" rank higher
+    add_content(5, abstract_or_body=lambda n: " ".join(["cache"] * (n + 1) + ["filler"] * 20))
+    seen, after = [], None
+    while True:
+        hits, after = search(db, "cache", after, limit=2)
+        seen.append([hit.title for hit in hits])
+        if after is None:
+            break
+    assert seen == [["Item 4", "Item 3"], ["Item 2", "Item 1"], ["Item 0"]]
+
+def test_index_follows_updates_and_deletes(db, add_content):
+    [item] = add_content(title="Speculative decoding")
+    assert [hit.id for hit in search(db, "speculative")[0]] == [item.id]
+
+    item.title = "Quantized attention"
+    db.commit()
+    assert search(db, "speculative")[0] == []
+    assert [hit.id for hit in search(db, "quantiz")[0]] == [item.id]
+
+    db.query(Content).filter(Content.id == item.id).delete()
+    db.commit()
+    assert search(db, "quantized")[0] == []
+
+def test_topics_and_highlights_are_indexed_as_words(db, add_content):
+    add_content(title="Cache", abstract_or_body="", topics=["efficiency", "serving"],
+                summary_highlights=["Lower latency", "Smaller memory"])
+    [hit], _ = search(db, "efficiency")
+    assert hit.snippet == "<mark>efficiency</mark> serving"
+    [hit], _ = search(db, "latency")
+    assert "[" not in hit.snippet and "&quot;" not in hit.snippet
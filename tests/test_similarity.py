@@ -0,0 +1,66 @@
+from datetime import datetime
+import pytest
+from src.core.models import ContentEmbedding
+from src.core.similarity import EmbeddingIndex
+
+@pytest.fixture
+def embed(db, add_content):
+    def embed(*vectors, updated_at=None):
+        items = add_content(len(vectors))
+        db.add_all(ContentEmbedding(content_id=item.id, vector=vector, updated_at=updated_at or datetime.utcnow())
+                   for item, vector in zip(items, vectors))
+        db.commit()
+        return [item.id for item in items]
+    return embed
+
+@pytest.fixture
+def index(monkeypatch):
+    index = EmbeddingIndex()
+    reloads = []
+    reload = index._reload
+    monkeypatch.setattr(index, "_reload", lambda db: reloads.append(1) or reload(db))
+    index.reloads = reloads
+    return index
+
+def ranked(index, content_id, k=10):
+    return [other for other, _ in index.neighbours(content_id, k)]
+
+def test_neighbours_best_first(db, embed, index):
+    a, b, c, d = embed([1, 0], [0.9, 0.1], [0, 1], [-1, 0])
+    index.refresh(db)
+    assert ranked(index, a) == [b, c, d]
+    assert ranked(index, a, k=1) == [b]
+    [(_, score)] = index.neighbours(a, 1)
+    assert score == pytest.approx(0.9 / (0.9 ** 2 + 0.1 ** 2) ** 0.5)
+    assert index.neighbours(12345, 3) == []
+
+def test_changed_vectors_are_picked_up_without_a_reload(db, embed, index):
+    a, b, c = embed([1, 0], [0.5, 0.5], [0, 1])
+    index.refresh(db)
+    assert ranked(index, a) == [b, c]
+
+    db.get(ContentEmbedding, c).vector = [1, 0.01]
+    db.commit()
+    [d] = embed([0.7, 0.3])
+    index.refresh(db, force=True)
+    assert ranked(index, a) == [c, d, b]
+    assert len(index) == 4
+    assert index.reloads == [1]
+
+def test_deleted_rows_force_a_reload(db, embed, index):
+    a, b, c = embed([1, 0], [0.5, 0.5], [0, 1])
+    index.refresh(db)
+    db.delete(db.get(ContentEmbedding, b))
+    db.commit()
+    index.refresh(db, force=True)
+    assert ranked(index, a) == [c]
+    assert index.reloads == [1, 1]
+
+def test_unindexable_vectors_are_skipped_without_reloading(db, embed, index):
+    a, b = embed([1, 0], [0, 1])
+    zero, wrong_size = embed([0, 0], [1, 0, 0])
+    index.refresh(db)
+    index.refresh(db, force=True)
+    assert (len(index), index.reloads) == (2, [1])
+    assert ranked(index, a) == [b]
+    assert index.neighbours(zero, 3) == index.neighbours(wrong_size, 3) == []
@@ -0,0 +1,51 @@
+from collections import Counter
+from sqlalchemy import delete, func, insert, update
+from src.core.database import engine
+from src.core.lifecycle import ItemStage
+from src.core.models import Content
+from src.core.stats import dashboard_stats, ensure_stage_counts, stage_counts
+
+def actual(db):
+    return Counter({stage: count for stage, count in db.query(Content.stage, func.count()).group_by(Content.stage)})
+
+def assert_in_sync(db):
+    db.expire_all()
+    counts = {stage: count for stage, count in stage_counts(db).items() if count}
+    assert counts == dict(actual(db))
+
+def test_triggers_follow_inserts_updates_and_deletes(db, add_content):
+    items = add_content(4)
+    assert_in_sync(db)
+
+    items[0].stage = ItemStage.RELEVANT
+    items[1].stage = ItemStage.IRRELEVANT
+    db.commit()
+    assert_in_sync(db)
+
+    db.delete(items[2])
+    db.commit()
+    assert_in_sync(db)
+    assert stage_counts(db)[ItemStage.NEW] == 1
+
+def test_triggers_follow_bulk_statements(db):
+    db.execute(insert(Content), [
+        {"source": "arxiv", "type": "research", "title": f"Item {n}", "url": f"https://example.com/{n}", "stage": ItemStage.NEW}
+        for n in range(10)
+    ])
+    db.execute(update(Content).where(Content.id <= 6).values(stage=ItemStage.DELIVERED))
+    db.execute(delete(Content).where(Content.id > 8))
+    db.commit()
+    assert_in_sync(db)
+    assert dashboard_stats(db) == {"total": 8, "pending_rel": 2, "relevant": 6, "synthesized": 6, "delivered": 6}
+
+def test_updates_to_other_columns_leave_counts_alone(db, add_content):
+    item = add_content()[0]
+    item.title = "Renamed"
+    db.commit()
+    assert_in_sync(db)
+
+def test_install_is_idempotent_and_counts_existing_rows(db, add_content):
+    add_content()
+    add_content(stage=ItemStage.PASSED)
+    ensure_stage_counts(engine)
+    assert_in_sync(db)
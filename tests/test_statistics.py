@@ -0,0 +1,33 @@
+from sqlalchemy import insert
+from src.core.database import engine, ensure_statistics
+from src.core.lifecycle import ItemStage
+from src.core.models import Content
+
+CLAIM = ("SELECT id FROM content WHERE stage = 'NEW' AND (lease_owner IS NULL OR lease_expires_at < '2026-01-01') "
+         "AND lease_attempts < 3 ORDER BY id LIMIT 10")
+
+def plan(sql):
+    with engine.connect() as conn:
+        return " / ".join(row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+def statistics():
+    with engine.connect() as conn:
+        return dict(conn.exec_driver_sql("SELECT idx, stat FROM sqlite_stat1 WHERE tbl = 'content'").all())
+
+def test_fresh_database_claims_use_the_pending_indexes(db):
+    assert statistics()["ix_content_pending_new"] == "1000 1"
+    assert plan(CLAIM) == "SCAN content USING INDEX ix_content_pending_new"
+    assert "ix_content_stage_fetched" in plan("SELECT id FROM content WHERE stage = 'DELIVERED' ORDER BY fetched_at DESC, id DESC")
+
+def test_real_statistics_replace_the_seeded_ones(db):
+    db.execute(insert(Content), [
+        {"source": "arxiv", "type": "research", "title": f"Item {n}", "url": f"https://example.com/{n}",
+         "stage": ItemStage.NEW if n % 20 == 0 else ItemStage.DELIVERED}
+        for n in range(2000)
+    ])
+    db.commit()
+    ensure_statistics(engine)
+    assert statistics()["ix_content_pending_new"] == "1000 1" # Only missing statistics are filled in
+    ensure_statistics(engine, refresh=True)
+    assert statistics()["ix_content_pending_new"] == "100 1"
+    assert plan(CLAIM) == "SCAN content USING INDEX ix_content_pending_new"
@@ -0,0 +1,48 @@
+import threading
+from src.core.database import SessionLocal
+from src.core.leases import claim
+from src.core.lifecycle import ItemStage, advance
+from src.core.models import Content
+from src.streaming import Stage, StreamingExecutor
+from src.worker import Worker
+
+def counting_stage(calls, workers):
+    lock = threading.Lock()
+
+    def relevance(db, item):
+        with lock:
+            calls.append(item.id)
+        advance(item, ItemStage.RELEVANT)
+        return False
+
+    return Stage("relevance", relevance, workers, (Content.stage == ItemStage.NEW,))
+
+def test_an_id_queued_twice_is_processed_once(db, add_content):
+    ids = [item.id for item in add_content(20)]
+    calls = []
+    # The backlog feeder queues every NEW id and the source queues them again
+    executor = StreamingExecutor(lambda: iter(ids), [counting_stage(calls, workers=4)], queue_size=8)
+    counts = executor.run()
+    assert sorted(calls) == ids
+    assert counts["relevance"] == 20
+    db.expire_all()
+    assert db.query(Content).filter(Content.stage == ItemStage.RELEVANT, Content.lease_owner == None).count() == 20
+
+def test_items_leased_elsewhere_are_skipped(db, add_content):
+    ids = [item.id for item in add_content(3)]
+    with SessionLocal() as other:
+        claim(other, "relevance", (Content.id == ids[0],), "other-worker", 1, 300)
+    calls = []
+    StreamingExecutor(lambda: iter(()), [counting_stage(calls, workers=2)], queue_size=8).run()
+    assert sorted(calls) == ids[1:]
+
+def test_worker_claims_no_more_than_the_stage_capacity(db, add_content):
+    ids = [item.id for item in add_content(3)]
+    calls = []
+    stage = counting_stage(calls, workers=1)
+    stage.capacity = lambda db: 1
+    worker = Worker([stage], batch_size=5, lease_seconds=300, idle_seconds=0)
+    assert worker.run_stage(stage) == 1
+    assert calls == ids[:1]
+    stage.capacity = lambda db: 0
+    assert worker.run_stage(stage) == 0
@@ -0,0 +1,124 @@
+import json
+from types import SimpleNamespace
+import pytest
+from pydantic import ValidationError
+from src.agents import synthesis
+from src.agents.synthesis import InsightSynthesisAgent, digest_slots
+from src.core.config import Config
+from src.core.database import SessionLocal
+from src.core.leases import claim
+from src.core.lifecycle import ItemStage
+from src.core.models import Content, InsightSummary
+
+def fake_client(payload: dict):
+    response = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(payload)))],
+        usage=None,
+    )
+    create = lambda **kwargs: response
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+SUMMARY = {"headline": "A headline", "tldr": "Short.", "highlights": ["One", "Two", "Three"], "why_it_matters": "Because."}
+
+def test_batch_summary_is_validated(monkeypatch):
+    monkeypatch.setattr(synthesis, "openai_client", lambda: fake_client(SUMMARY))
+    summary = InsightSynthesisAgent("test_synthesis").complete_summary("system", "content", "https://example.com/a")
+    assert isinstance(summary, InsightSummary)
+    assert summary.source_url == "https://example.com/a"
+
+@pytest.mark.parametrize("payload", [
+    {**SUMMARY, "headline": "x" * 121},
+    {key: value for key, value in SUMMARY.items() if key != "tldr"},
+])
+def test_batch_summary_rejects_schema_violations(monkeypatch, payload):
+    monkeypatch.setattr(synthesis, "openai_client", lambda: fake_client(payload))
+    with pytest.raises(ValidationError):
+        InsightSynthesisAgent("test_synthesis").complete_summary("system", "content", "https://example.com/a")
+
+def add_prioritized(add_content, scores):
+    for score in scores:
+        add_content(priority_score=score, stage=ItemStage.PRIORITIZED)
+
+def synthesized_scores(db):
+    return sorted(score for (score,) in db.query(Content.priority_score).filter(Content.stage == ItemStage.SYNTHESIZED))
+
+def test_synthesis_fills_open_digest_slots_with_top_n(db, add_content, monkeypatch):
+    monkeypatch.setattr(Config, "DIGEST_SIZE", 3)
+    add_prioritized(add_content, [0.2, 0.95, 0.4, 0.6, 0.3])
+    agent = InsightSynthesisAgent("test_synthesis")
+
+    # Between digests only items over the threshold go ahead
+    assert agent.run(min_priority=0.9) == 1
+    # At delivery time the rest of the slots take the best remaining items
+    assert agent.run() == 2
+    assert agent.run() == 0
+    db.expire_all()
+    assert synthesized_scores(db) == [0.4, 0.6, 0.95]
+
+def test_delivered_stories_free_their_slots(db, add_content, monkeypatch):
+    monkeypatch.setattr(Config, "DIGEST_SIZE", 1)
+    add_prioritized(add_content, [0.5, 0.7])
+    agent = InsightSynthesisAgent("test_synthesis")
+    assert agent.run() == 1
+    db.query(Content).filter(Content.stage == ItemStage.SYNTHESIZED).update({"stage": ItemStage.DELIVERED})
+    db.commit()
+    assert digest_slots(db) == 1
+    assert agent.run() == 1
+
+def test_cluster_becomes_one_summarized_lead_with_merged_members(db, add_content, monkeypatch):
+    monkeypatch.setattr(Config, "DIGEST_SIZE", 5)
+    lead, second, third = add_content(3, cluster_id="story-1", stage=ItemStage.PRIORITIZED,
+                                      priority_score=lambda n: 0.9 - n / 10)
+    [alone] = add_content(stage=ItemStage.PRIORITIZED, priority_score=0.85)
+    agent = InsightSynthesisAgent("test_synthesis")
+
+    jobs = agent.select_cluster_jobs(db, limit=5)
+    assert [[member.id for member in members] for members in jobs] == [[lead.id, second.id, third.id], [alone.id]]
+
+    assert agent.run(mode="cluster", streaming=False) == 2
+    db.expire_all()
+    assert (lead.stage, lead.summary_parent_id, lead.lease_owner) == (ItemStage.SYNTHESIZED, None, None)
+    assert "3 sources" in lead.summary_tldr
+    for member in (second, third):
+        assert (member.stage, member.summary_parent_id, member.summary_headline) == (ItemStage.MERGED, lead.id, None)
+    assert alone.stage == ItemStage.SYNTHESIZED
+    assert digest_slots(db) == 3 # One slot per story, not per member
+
+def test_claim_jobs_drops_stories_and_members_leased_elsewhere(db, add_content):
+    first_lead, first_member = add_content(2, cluster_id="story-1", stage=ItemStage.PRIORITIZED, priority_score=0.9)
+    second_lead, second_member = add_content(2, cluster_id="story-2", stage=ItemStage.PRIORITIZED, priority_score=0.8)
+    with SessionLocal() as other:
+        claim(other, "synthesis", (Content.id.in_([first_member.id, second_lead.id]),), "other-worker", None, 300)
+    agent = InsightSynthesisAgent("test_synthesis")
+
+    jobs = agent.claim_jobs(db, [[first_lead, first_member], [second_lead, second_member]])
+    assert [[member.id for member in members] for members in jobs] == [[first_lead.id]]
+    db.expire_all()
+    # The dropped story's free member is released straight away
+    assert second_member.lease_owner is None
+
+def test_streaming_commits_each_summary_before_handing_it_on(db, add_content, monkeypatch):
+    monkeypatch.setattr(Config, "DIGEST_SIZE", 5)
+    monkeypatch.setattr(synthesis, "openai_client", lambda: object())
+    good, bad = add_content(2, stage=ItemStage.PRIORITIZED, priority_score=lambda n: 0.9 - n / 10)
+    agent = InsightSynthesisAgent("test_synthesis")
+
+    def stream_summary(system_prompt, content_text, source_url):
+        if source_url == bad.url:
+            raise ValueError("Truncated JSON")
+        return InsightSummary(**SUMMARY, source_url=source_url)
+
+    agent.stream_summary = stream_summary
+    committed = []
+
+    def on_ready(item_id):
+        # Visible to another session by the time the callback runs
+        with SessionLocal() as other:
+            item = other.get(Content, item_id)
+            committed.append((item_id, item.stage, item.summary_headline, item.lease_owner))
+
+    assert agent.run(streaming=True, on_ready=on_ready) == 1
+    assert committed == [(good.id, ItemStage.SYNTHESIZED, "A headline", None)]
+    db.expire_all()
+    # The failed item keeps its lease and is retried once it expires
+    assert bad.stage == ItemStage.PRIORITIZED and bad.lease_owner is not None
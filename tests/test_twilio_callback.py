@@ -0,0 +1,37 @@
+import pytest
+from twilio.request_validator import RequestValidator
+from src.core.config import Config
+from src.ui import app as app_module
+
+URL = "http://localhost/twilio/status"
+FORM = {"MessageSid": "SM1", "MessageStatus": "delivered"}
+
+@pytest.fixture
+def client(monkeypatch):
+    received = []
+    monkeypatch.setattr(app_module, "twilio_validator", RequestValidator("token"))
+    monkeypatch.setattr(app_module.status_buffer, "add", lambda *args: received.append(args))
+    client = app_module.app.test_client()
+    client.received = received
+    return client
+
+def test_unsigned_callback_is_rejected(client):
+    assert client.post("/twilio/status", data=FORM).status_code == 403
+    assert client.received == []
+
+def test_callbacks_are_rejected_without_an_auth_token(client, monkeypatch):
+    monkeypatch.setattr(app_module, "twilio_validator", None)
+    assert client.post("/twilio/status", data=FORM).status_code == 403
+    assert client.received == []
+
+def test_callback_signed_for_request_url_is_accepted(client):
+    signature = RequestValidator("token").compute_signature(URL, FORM)
+    response = client.post("/twilio/status", data=FORM, headers={"X-Twilio-Signature": signature})
+    assert response.status_code == 204
+    assert client.received == [("SM1", "delivered", None)]
+
+def test_configured_url_takes_precedence(client, monkeypatch):
+    monkeypatch.setattr(Config, "TWILIO_STATUS_CALLBACK_URL", "https://digest.example.com/twilio/status")
+    signature = RequestValidator("token").compute_signature(URL, FORM)
+    response = client.post("/twilio/status", data=FORM, headers={"X-Twilio-Signature": signature})
+    assert response.status_code == 403
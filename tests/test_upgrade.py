@@ -0,0 +1,46 @@
+from sqlalchemy import inspect, text
+from src.core.database import SessionLocal, init_db
+from src.core.lifecycle import ItemStage
+from src.core.models import Content
+from scripts.backfill_stages import add_columns, backfill_stages, create_indexes
+
+# content as the first release created it
+BASELINE_CONTENT = """
+CREATE TABLE content (
+    id INTEGER PRIMARY KEY, source VARCHAR, type VARCHAR, title VARCHAR, url VARCHAR UNIQUE,
+    published_at DATETIME, fetched_at DATETIME, abstract_or_body TEXT, authors JSON, topics JSON,
+    embedding_vector JSON, relevance_label VARCHAR, relevance_confidence FLOAT, relevance_reason TEXT,
+    priority_score FLOAT, cluster_id VARCHAR, summary_headline VARCHAR, summary_tldr TEXT,
+    summary_highlights JSON, summary_why_matters TEXT, validation_status VARCHAR, delivery_status VARCHAR
+)"""
+
+def create_baseline(engine):
+    with engine.begin() as conn:
+        conn.execute(text(BASELINE_CONTENT))
+        conn.execute(text(
+            "INSERT INTO content (source, type, title, url, relevance_label, summary_headline, validation_status, delivery_status) "
+            "VALUES ('arxiv', 'research', 'Old item', 'https://example.com/old', 'AGENTIC_AI', 'Headline', 'PASS', 'PENDING')"
+        ))
+
+def test_upgrade_adds_every_model_column(empty_db):
+    create_baseline(empty_db)
+    init_db()
+    add_columns()
+    create_indexes()
+
+    columns = {c["name"] for c in inspect(empty_db).get_columns("content")}
+    assert {c.name for c in Content.__table__.columns} <= columns
+    indexes = {i["name"] for i in inspect(empty_db).get_indexes("content")}
+    assert {i.name for i in Content.__table__.indexes} <= indexes
+
+def test_upgrade_is_idempotent_and_backfills_stage(empty_db):
+    create_baseline(empty_db)
+    init_db()
+    assert "stage" in add_columns()
+    assert add_columns() == []
+    create_indexes()
+    create_indexes()
+
+    assert backfill_stages() == {"PASSED": 1}
+    with SessionLocal() as db:
+        assert db.query(Content).one().stage == ItemStage.PASSED